@@ -2,20 +2,43 @@
 Application Factory Module
 
 Creates and configures the Flask application.
+
+The web stack is imported inside the factory, so importing app.services
+or app.models (as cli.py and worker.py do) never loads Flask.
 """
-import os
-from flask import Flask, render_template, send_from_directory
-from app.routes import health_bp, storyboard_bp, storyboard_stream_bp
-from app.config import settings
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from flask import Flask
 
 
-def create_app() -> Flask:
+def create_app() -> 'Flask':
     """
     Create and configure the Flask application.
     
     Returns:
         Configured Flask application instance
+    
+    Raises:
+        ValueError: If JOB_EXECUTION is not a known job execution mode
     """
+    from flask import Flask, render_template
+    from app.routes import health_bp, storyboard_bp, storyboard_stream_bp, jobs_bp, output_bp, sessions_bp
+    from app.services import GenerationCheckpoint, JobStore, JobQueue, ServiceRegistry
+    from app.services.metrics_store import MetricsPublisher, MetricsStore
+    from app.services.output_sweeper import OutputSweeper
+    from app.services.session_catalog import session_catalog
+    from app.services.workspace import JobWorkspace
+    from app.config import settings
+    from app.metrics import metrics
+    
+    # A misspelt mode would otherwise leave every job queued with nothing running it
+    if settings.JOB_EXECUTION not in settings.JOB_EXECUTION_MODES:
+        raise ValueError(
+            f"JOB_EXECUTION must be one of {', '.join(settings.JOB_EXECUTION_MODES)}, "
+            f"not {settings.JOB_EXECUTION!r}"
+        )
+    
     app = Flask(
         __name__,
         static_folder='static',
@@ -26,16 +49,55 @@ def create_app() -> Flask:
     app.register_blueprint(health_bp)
     app.register_blueprint(storyboard_bp)
     app.register_blueprint(storyboard_stream_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(output_bp)
+    app.register_blueprint(sessions_bp)
+    
+    # Clear scratch space left behind by jobs killed mid-run
+    JobWorkspace.remove_stale(settings.WORKSPACE_MAX_AGE_SECONDS)
+    
+    # Catalog sessions written before the session catalog existed
+    GenerationCheckpoint.index_existing_sessions()
+    
+    # Long-lived clients, agents and services shared by all requests
+    registry = ServiceRegistry()
+    app.extensions['registry'] = registry
+    
+    # Background job queue shared by all requests
+    job_store = JobStore(settings.JOB_DB_PATH)
+    job_store.fail_orphaned_jobs()
+    app.extensions['job_queue'] = JobQueue(
+        job_store,
+        registry=registry,
+        max_workers=settings.JOB_WORKERS,
+        run_jobs=settings.JOB_EXECUTION == 'in_process'
+    )
+    
+    # Retention and disk quota enforcement for session directories
+    output_sweeper = OutputSweeper(
+        job_store,
+        session_catalog,
+        ttl_seconds=settings.OUTPUT_TTL_SECONDS,
+        quota_bytes=settings.OUTPUT_QUOTA_BYTES,
+        min_idle_seconds=settings.OUTPUT_MIN_IDLE_SECONDS,
+        job_retention_seconds=settings.JOB_RETENTION_SECONDS,
+        dry_run=settings.OUTPUT_SWEEP_DRY_RUN
+    )
+    output_sweeper.start(settings.OUTPUT_SWEEP_INTERVAL_SECONDS)
+    app.extensions['output_sweeper'] = output_sweeper
+    
+    # Metrics shared with the other web workers and the job worker
+    metrics_publisher = MetricsPublisher(
+        MetricsStore(settings.METRICS_DB_PATH, settings.METRICS_STALE_SECONDS),
+        metrics,
+        role='web'
+    )
+    metrics_publisher.start(settings.METRICS_PUBLISH_SECONDS)
+    app.extensions['metrics_publisher'] = metrics_publisher
     
     # Root endpoint - serve the frontend
     @app.route('/')
     def index():
         return render_template('index.html')
     
-    # Serve output files (generated images and PDFs)
-    @app.route('/output/<path:filename>')
-    def serve_output(filename):
-        output_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'output')
-        return send_from_directory(output_dir, filename)
-    
     return app
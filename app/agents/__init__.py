@@ -1,5 +1,6 @@
 """Agent package."""
 from app.agents.storyboard_agent import create_storyboard_agent
 from app.agents.image_generation_agent import ImageGenerationAgent
+from app.agents.model_backend import ModelBackend, create_model_backend
 
-__all__ = ['create_storyboard_agent', 'ImageGenerationAgent']
+__all__ = ['create_storyboard_agent', 'ImageGenerationAgent', 'ModelBackend', 'create_model_backend']
@@ -0,0 +1,360 @@
+"""
+Fake Model Backend Module
+
+Local stand-in for the Gemini models, for benchmarking and developing the
+pipeline offline. Responses are deterministic; latency and failures are
+drawn from configurable distributions.
+"""
+import io
+import re
+import json
+import math
+import time
+import random
+import asyncio
+import threading
+from typing import Any, AsyncGenerator, Callable, ClassVar, Dict, List, Optional, Tuple, Union
+from PIL import Image, ImageDraw, ImageFilter
+from pydantic import PrivateAttr
+from google.adk.models.base_llm import BaseLlm, LlmCapabilities
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import errors as genai_errors
+from google.genai import types
+from app.agents.model_backend import ModelBackend, request_key
+from app.config import settings
+
+
+class LatencyDistribution:
+    """
+    Latency of fake model calls, in seconds.
+    
+    Specs have the form '<kind>:<parameters>':
+    
+        fixed:S                  always S
+        uniform:LO,HI            uniformly between LO and HI
+        normal:MEAN,STDDEV       normally distributed, never below 0
+        lognormal:MEDIAN,SIGMA   log-normally distributed, the usual shape
+                                 of model latencies with their long tail
+    """
+    
+    KINDS = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+    
+    def __init__(self, spec: str):
+        """
+        Parse a latency spec.
+        
+        Args:
+            spec: The latency spec
+        
+        Raises:
+            ValueError: If the spec is malformed
+        """
+        kind, _, parameters = spec.strip().partition(':')
+        try:
+            values = [float(value) for value in parameters.split(',')]
+        except ValueError:
+            values = []
+        if kind not in self.KINDS or len(values) != self.KINDS[kind] or min(values) < 0:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+        
+        self.spec = spec
+        self.kind = kind
+        self.values = values
+    
+    def sample(self, rng: random.Random) -> float:
+        """
+        Draw a latency.
+        
+        Args:
+            rng: Random number generator to draw from
+        
+        Returns:
+            Latency in seconds
+        """
+        if self.kind == 'fixed':
+            return self.values[0]
+        if self.kind == 'uniform':
+            return rng.uniform(*self.values)
+        if self.kind == 'normal':
+            return max(0.0, rng.gauss(*self.values))
+        median, sigma = self.values
+        return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+
+class FakeBackend(ModelBackend):
+    """
+    Answers model calls locally.
+    
+    Images are noisy, photo-like PNGs at the size the image model returns,
+    so decoding, caching and PDF export cost what they cost with real
+    frames. They are picked from a few variants rendered once, which keeps
+    the fake's own CPU time out of the pipeline being measured. Storyboards
+    split the description into one frame per sentence. The same request
+    always gets the same response; latencies and injected errors come from
+    one seeded generator, so a run's sequence of them is reproducible too.
+    """
+    
+    name = 'fake'
+    IMAGE_VARIANTS = 16
+    
+    def __init__(
+        self,
+        text_latency: Optional[str] = None,
+        image_latency: Optional[str] = None,
+        error_rate: Optional[float] = None,
+        error_code: Optional[int] = None,
+        image_size: Optional[str] = None,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the fake backend.
+        
+        Args:
+            text_latency: Latency spec of storyboard calls. Defaults to configured spec.
+            image_latency: Latency spec of image calls. Defaults to configured spec.
+            error_rate: Fraction of calls that fail. Defaults to configured rate.
+            error_code: HTTP status of injected failures. Defaults to configured code.
+            image_size: Image size as 'WIDTHxHEIGHT'. Defaults to configured size.
+            seed: Seed of the latency and error draws. Defaults to configured seed.
+        
+        Raises:
+            ValueError: If a latency spec or the image size is malformed
+        """
+        self.text_latency = LatencyDistribution(text_latency or settings.FAKE_TEXT_LATENCY)
+        self.image_latency = LatencyDistribution(image_latency or settings.FAKE_IMAGE_LATENCY)
+        self.error_rate = settings.FAKE_ERROR_RATE if error_rate is None else error_rate
+        self.error_code = error_code or settings.FAKE_ERROR_CODE
+        self.image_size = _parse_size(image_size or settings.FAKE_IMAGE_SIZE)
+        self._rng = random.Random(settings.FAKE_MODEL_SEED if seed is None else seed)
+        self._rng_lock = threading.Lock()
+        self._images: Dict[int, bytes] = {}
+        self._images_lock = threading.Lock()
+    
+    def cache_model_name(self, model_name: str) -> str:
+        """Key fake results apart from the real model's."""
+        return f"{self.name}/{model_name}"
+    
+    def generate_image(self, model_name: str, contents: Any, config: Any) -> bytes:
+        """Render the request's image, taking a sampled latency in all."""
+        latency, error = self.draw(self.image_latency)
+        started = time.monotonic()
+        image = None if error else self.image_for(request_key(model_name, contents))
+        
+        # Rendering counts towards the latency, so calls take no longer than sampled
+        time.sleep(max(0.0, latency - (time.monotonic() - started)))
+        if error is not None:
+            raise error
+        return image
+    
+    async def agenerate_image(self, model_name: str, contents: Any, config: Any) -> bytes:
+        """Async variant of generate_image, rendering off the event loop."""
+        latency, error = self.draw(self.image_latency)
+        started = time.monotonic()
+        image = None
+        if error is None:
+            image = await asyncio.to_thread(self.image_for, request_key(model_name, contents))
+        
+        await asyncio.sleep(max(0.0, latency - (time.monotonic() - started)))
+        if error is not None:
+            raise error
+        return image
+    
+    def text_model(self, model_name: str) -> Union[str, BaseLlm]:
+        """Build a fake storyboard model drawing from this backend."""
+        return FakeStoryboardLlm(self.cache_model_name(model_name), lambda: self.draw(self.text_latency))
+    
+    def image_for(self, key: str) -> bytes:
+        """
+        Get the image answering a request, rendering its variant on first use.
+        
+        Args:
+            key: Hex request key
+        
+        Returns:
+            PNG bytes
+        """
+        variant = int(key, 16) % self.IMAGE_VARIANTS
+        image = self._images.get(variant)
+        if image is None:
+            with self._images_lock:
+                image = self._images.get(variant)
+                if image is None:
+                    image = render_image(variant, self.image_size)
+                    self._images[variant] = image
+        return image
+    
+    def draw(self, latency: LatencyDistribution) -> Tuple[float, Optional[Exception]]:
+        """
+        Draw the latency and outcome of one call.
+        
+        Args:
+            latency: Latency distribution of the call
+        
+        Returns:
+            Tuple of the latency in seconds and the error to fail with, or None
+        """
+        with self._rng_lock:
+            seconds = latency.sample(self._rng)
+            failed = self._rng.random() < self.error_rate
+        if not failed:
+            return seconds, None
+        
+        error_cls = genai_errors.ServerError if self.error_code >= 500 else genai_errors.ClientError
+        error = error_cls(self.error_code, {
+            'error': {'code': self.error_code, 'message': 'Injected by the fake model backend', 'status': 'UNAVAILABLE'}
+        })
+        return seconds, error
+
+
+class FakeStoryboardLlm(BaseLlm):
+    """
+    ADK model that segments a description into one frame per sentence.
+    
+    Streamed responses arrive as several partial chunks spread over the
+    sampled latency, like a real model's tokens.
+    """
+    
+    STREAM_CHUNK_CHARS: ClassVar[int] = 48
+    
+    _draw: Callable[[], Tuple[float, Optional[Exception]]] = PrivateAttr()
+    
+    def __init__(self, model: str, draw: Callable[[], Tuple[float, Optional[Exception]]]):
+        """
+        Initialize the fake model.
+        
+        Args:
+            model: Model name reported to ADK
+            draw: Returns the latency and outcome of a call
+        """
+        super().__init__(model=model)
+        self._draw = draw
+    
+    @property
+    def capabilities(self) -> LlmCapabilities:
+        """The fake takes no tools."""
+        return LlmCapabilities(output_schema_and_tools=False)
+    
+    async def generate_content_async(
+        self,
+        llm_request: LlmRequest,
+        stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """
+        Answer a storyboard request.
+        
+        Args:
+            llm_request: The request ADK built from the agent and session
+            stream: Whether to stream partial responses
+        
+        Yields:
+            Partial responses when streaming, then the complete response
+        
+        Raises:
+            genai_errors.APIError: If the draw injected a failure
+        """
+        latency, error = self._draw()
+        text = json.dumps(fake_storyboard(_request_text(llm_request)))
+        
+        if not stream:
+            await asyncio.sleep(latency)
+            if error is not None:
+                raise error
+            yield _text_response(text, partial=False)
+            return
+        
+        chunks = [
+            text[start:start + self.STREAM_CHUNK_CHARS]
+            for start in range(0, len(text), self.STREAM_CHUNK_CHARS)
+        ]
+        # A quarter of the latency passes before the first token
+        await asyncio.sleep(latency / 4)
+        if error is not None:
+            raise error
+        for chunk in chunks:
+            await asyncio.sleep(latency * 3 / 4 / len(chunks))
+            yield _text_response(chunk, partial=True)
+        yield _text_response(text, partial=False)
+
+
+def fake_storyboard(description: str) -> dict:
+    """
+    Segment a description into one frame per sentence, at most ten.
+    
+    Args:
+        description: The text description of the video sequence
+    
+    Returns:
+        Storyboard in the agent's output schema
+    """
+    sentences = [
+        sentence.strip()
+        for sentence in re.split(r'(?<=[.!?])\s+', ' '.join(description.split()))
+        if sentence.strip()
+    ]
+    sentences = sentences[:10] or ['An empty scene.']
+    return {
+        'total_frames': len(sentences),
+        'frames': [
+            {'description': sentence, 'frame_number': frame_number}
+            for frame_number, sentence in enumerate(sentences, start=1)
+        ]
+    }
+
+
+def render_image(seed: int, size: Tuple[int, int]) -> bytes:
+    """
+    Render a photo-like PNG.
+    
+    Args:
+        seed: Seed of the image's shapes and noise
+        size: Image width and height in pixels
+    
+    Returns:
+        PNG bytes
+    """
+    rng = random.Random(seed)
+    width, height = size
+    img = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randrange(40, max(41, width // 4))
+        color = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
+    img = img.filter(ImageFilter.GaussianBlur(3))
+    
+    # Sensor-like noise, which is what makes real frames expensive to compress
+    noise = Image.frombytes('L', (width, height), rng.randbytes(width * height)).convert('RGB')
+    img = Image.blend(img, noise, 0.15)
+    
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _parse_size(size: str) -> Tuple[int, int]:
+    """Parse a 'WIDTHxHEIGHT' image size."""
+    match = re.fullmatch(r'\s*(\d+)\s*x\s*(\d+)\s*', size)
+    if not match or not all(int(value) > 0 for value in match.groups()):
+        raise ValueError(f"Invalid image size: {size!r}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def _request_text(llm_request: LlmRequest) -> str:
+    """Text of the latest user message in a request."""
+    for content in reversed(llm_request.contents):
+        if content.role == 'user':
+            texts: List[str] = [part.text for part in content.parts or [] if part.text]
+            if texts:
+                return '\n'.join(texts)
+    return ''
+
+
+def _text_response(text: str, partial: bool) -> LlmResponse:
+    """Build a model response carrying text."""
+    return LlmResponse(
+        content=types.Content(role='model', parts=[types.Part(text=text)]),
+        partial=partial,
+        turn_complete=not partial
+    )
@@ -0,0 +1,202 @@
+"""
+Image Cache Module
+
+Content-addressed, size-bounded disk cache for generated images.
+"""
+import os
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from app.config import settings
+from app.metrics import metrics
+
+
+class ImageCache:
+    """
+    Disk-backed LRU cache of generated images.
+    
+    Entries are keyed on a hash of everything that determines the model's
+    output: model name, fully rendered prompt and reference image bytes.
+    The cache is shared across sessions and survives restarts; total size
+    is bounded in bytes, evicting the least recently used entries first.
+    """
+    
+    # Staging files older than this were left behind by a crashed writer
+    STALE_STAGING_SECONDS = 3600
+    
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Initialize the image cache.
+        
+        Args:
+            cache_dir: Directory holding cached images
+            max_bytes: Maximum total size of cached images. Zero disables the cache.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: Optional['OrderedDict[str, int]'] = None
+        self._total_bytes = 0
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores and serves images."""
+        return self.max_bytes > 0
+    
+    @staticmethod
+    def make_key(model_name: str, prompt: str, reference_image: Optional[bytes] = None) -> str:
+        """
+        Build the cache key for an image request.
+        
+        Args:
+            model_name: The image model name
+            prompt: The fully rendered prompt
+            reference_image: Reference image bytes, if the request has one
+        
+        Returns:
+            Hex SHA-256 key
+        """
+        digest = hashlib.sha256()
+        for part in (model_name.encode('utf-8'), prompt.encode('utf-8')):
+            digest.update(len(part).to_bytes(8, 'big'))
+            digest.update(part)
+        digest.update(hashlib.sha256(reference_image or b'').digest())
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a cached image.
+        
+        Args:
+            key: Cache key from make_key
+        
+        Returns:
+            Image bytes, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                image_bytes = f.read()
+        except OSError:
+            metrics.increment('image_cache.misses')
+            return None
+        
+        with self._lock:
+            entries = self._load_entries()
+            if key not in entries:
+                # Written by another worker process
+                entries[key] = len(image_bytes)
+                self._total_bytes += len(image_bytes)
+            entries.move_to_end(key)
+        
+        # Persist recency so the LRU order survives restarts
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        
+        metrics.increment('image_cache.hits')
+        return image_bytes
+    
+    def put(self, key: str, image_bytes: bytes) -> None:
+        """
+        Store an image, evicting least recently used entries if over budget.
+        
+        Args:
+            key: Cache key from make_key
+            image_bytes: Image bytes to store
+        
+        Raises:
+            OSError: If the image can't be written
+        """
+        if not self.enabled or len(image_bytes) > self.max_bytes:
+            return
+        
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, staging_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(image_bytes)
+            os.replace(staging_path, path)
+        except OSError:
+            try:
+                os.remove(staging_path)
+            except OSError:
+                pass
+            raise
+        
+        with self._lock:
+            entries = self._load_entries()
+            self._total_bytes += len(image_bytes) - entries.pop(key, 0)
+            entries[key] = len(image_bytes)
+            self._evict()
+            metrics.set_gauge('image_cache.bytes', self._total_bytes)
+            metrics.set_gauge('image_cache.entries', len(entries))
+    
+    def stats(self) -> Dict[str, int]:
+        """Get the current number of entries and total size in bytes."""
+        with self._lock:
+            entries = self._load_entries()
+            return {'entries': len(entries), 'bytes': self._total_bytes}
+    
+    def _path(self, key: str) -> str:
+        """Get the file path for a key, sharded by key prefix."""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.img")
+    
+    def _load_entries(self) -> 'OrderedDict[str, int]':
+        """
+        Build the in-memory LRU index from disk on first use. Caller holds the lock.
+        
+        Staging files that crashed writers left behind are removed on the way.
+        """
+        if self._entries is None:
+            found = []
+            stale_before = time.time() - self.STALE_STAGING_SECONDS
+            if os.path.isdir(self.cache_dir):
+                for shard in os.scandir(self.cache_dir):
+                    if not shard.is_dir():
+                        continue
+                    for entry in os.scandir(shard.path):
+                        if entry.name.endswith('.img'):
+                            stat = entry.stat()
+                            found.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+                        elif entry.name.endswith('.tmp'):
+                            self._remove_stale_staging(entry.path, stale_before)
+            
+            found.sort()
+            self._entries = OrderedDict((key, size) for _, key, size in found)
+            self._total_bytes = sum(size for _, _, size in found)
+        return self._entries
+    
+    @staticmethod
+    def _remove_stale_staging(path: str, stale_before: float) -> None:
+        """Remove a staging file unless a writer may still be filling it."""
+        try:
+            if os.stat(path).st_mtime < stale_before:
+                os.remove(path)
+                metrics.increment('image_cache.stale_staging_removed')
+        except OSError:
+            pass  # Renamed into place or removed meanwhile
+    
+    def _evict(self) -> None:
+        """Remove least recently used entries until within budget. Caller holds the lock."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass  # Already evicted by another worker
+            metrics.increment('image_cache.evictions')
+            metrics.increment('image_cache.evicted_bytes', size)
+
+
+# Process-wide cache shared by every image agent
+image_cache = ImageCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_BYTES)
@@ -3,8 +3,6 @@ Image Generation Agent Module
 
 Defines the Google ADK agent for sequential image generation.
 """
-import os
-from google.genai import Client
 from app.config import settings
 from app.agents.prompts import (
     IMAGE_GENERATION_SYSTEM_INSTRUCTION,
@@ -12,132 +10,201 @@ from app.agents.prompts import (
     SEQUENTIAL_IMAGE_PROMPT_TEMPLATE,
     FRAME_EDIT_PROMPT_TEMPLATE
 )
-from typing import Optional
-import base64
+from app.agents.rate_limiter import image_rate_limiter
+from app.agents.resilience import image_resilience
+from app.agents.image_cache import image_cache
+from app.metrics import metrics
+from app.agents.model_backend import ModelBackend, create_model_backend
+from typing import Any, Optional, Tuple
 
 
 class ImageGenerationAgent:
     """Agent for sequential image generation using Gemini's image model."""
     
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: str = None, backend: Optional[ModelBackend] = None):
         """
         Initialize the image generation agent.
         
         Args:
             model_name: The Gemini image model to use. Defaults to configured model.
+            backend: Model backend to call. Defaults to the configured backend.
         """
         if model_name is None:
             model_name = settings.GEMINI_IMAGE_MODEL
         
         self.model_name = model_name
-        self.client = Client()
+        self.backend = backend or create_model_backend()
     
-    def generate_first_image(self, description: str) -> bytes:
+    def generate_first_image(
+        self,
+        description: str,
+        user_id: Optional[str] = None,
+        use_cache: bool = True
+    ) -> bytes:
         """
         Generate the first image from a description only.
         
         Args:
             description: Text description for the image
+            user_id: The user the call is made for, used for fair rate limiting
+            use_cache: Whether a cached image for the same prompt may be returned.
+                Fresh images are cached either way.
         
         Returns:
             Image bytes
         """
-        # Construct prompt following Gemini best practices
-        prompt = FIRST_IMAGE_PROMPT_TEMPLATE.format(
-            system_instruction=IMAGE_GENERATION_SYSTEM_INSTRUCTION,
-            description=description
-        )
+        contents, cache_key = self._first_image_request(description)
+        return self._generate(contents, user_id, cache_key, use_cache)
+    
+    async def agenerate_first_image(
+        self,
+        description: str,
+        user_id: Optional[str] = None,
+        use_cache: bool = True
+    ) -> bytes:
+        """
+        Async variant of generate_first_image using the backend's async call.
         
-        response = self.client.models.generate_content(
-            model=self.model_name,
-            contents=prompt
-        )
+        Args:
+            description: Text description for the image
+            user_id: The user the call is made for, used for fair rate limiting
+            use_cache: Whether a cached image for the same prompt may be returned
         
-        # Extract image from response
-        return self._extract_image_from_response(response)
+        Returns:
+            Image bytes
+        """
+        contents, cache_key = self._first_image_request(description)
+        return await self._agenerate(contents, user_id, cache_key, use_cache)
     
-    def generate_next_image(self, description: str, previous_image_path: str) -> bytes:
+    def generate_next_image(
+        self,
+        description: str,
+        previous_image: bytes,
+        user_id: Optional[str] = None,
+        use_cache: bool = True
+    ) -> bytes:
         """
         Generate an image using both a description and previous image as reference.
         
         Args:
             description: Text description for the new image
-            previous_image_path: Path to the previous image file to use as reference
+            previous_image: Bytes of the previous image to use as reference
+            user_id: The user the call is made for, used for fair rate limiting
+            use_cache: Whether a cached image for the same prompt and reference
+                may be returned. Fresh images are cached either way.
         
         Returns:
             Image bytes
         
         Raises:
-            FileNotFoundError: If the previous image file doesn't exist
-            ValueError: If the file path is invalid
+            ValueError: If the reference image is empty
         """
-        # Validate file exists and is readable
-        if not os.path.isfile(previous_image_path):
-            raise FileNotFoundError(f"Previous image not found: {previous_image_path}")
-        
-        # Read the image file and encode to base64
-        with open(previous_image_path, 'rb') as f:
-            image_bytes = f.read()
-        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+        contents, cache_key = self._next_image_request(description, previous_image)
+        return self._generate(contents, user_id, cache_key, use_cache)
+    
+    async def agenerate_next_image(
+        self,
+        description: str,
+        previous_image: bytes,
+        user_id: Optional[str] = None,
+        use_cache: bool = True
+    ) -> bytes:
+        """
+        Async variant of generate_next_image using the backend's async call.
         
-        # Construct prompt following Gemini best practices
-        prompt = SEQUENTIAL_IMAGE_PROMPT_TEMPLATE.format(
-            system_instruction=IMAGE_GENERATION_SYSTEM_INSTRUCTION,
-            description=description
-        )
+        Args:
+            description: Text description for the new image
+            previous_image: Bytes of the previous image to use as reference
+            user_id: The user the call is made for, used for fair rate limiting
+            use_cache: Whether a cached image for the same prompt and reference may be returned
         
-        # Create multimodal request with previous image and structured prompt
-        response = self.client.models.generate_content(
-            model=self.model_name,
-            contents=[
-                {
-                    'parts': [
-                        {
-                            'inline_data': {
-                                'mime_type': 'image/png',
-                                'data': image_base64
-                            }
-                        },
-                        {
-                            'text': prompt
-                        }
-                    ]
-                }
-            ]
-        )
+        Returns:
+            Image bytes
         
-        return self._extract_image_from_response(response)
+        Raises:
+            ValueError: If the reference image is empty
+        """
+        contents, cache_key = self._next_image_request(description, previous_image)
+        return await self._agenerate(contents, user_id, cache_key, use_cache)
     
     def edit_frame(
         self, 
-        current_image_path: str, 
+        current_image: bytes, 
         edit_instructions: str,
-        storyboard_context: str
+        storyboard_context: str,
+        user_id: Optional[str] = None
     ) -> bytes:
         """
         Edit an existing frame based on user instructions.
         
         Args:
-            current_image_path: Path to the current frame image to edit
+            current_image: Bytes of the current frame image to edit
             edit_instructions: User's instructions on how to modify the frame
             storyboard_context: The overall storyboard description for context
+            user_id: The user the call is made for, used for fair rate limiting
         
         Returns:
             Image bytes of the edited frame
         
         Raises:
-            FileNotFoundError: If the current image file doesn't exist
-            ValueError: If the file path is invalid
+            ValueError: If the current image is empty
         """
-        # Validate file exists and is readable
-        if not os.path.isfile(current_image_path):
-            raise FileNotFoundError(f"Current image not found: {current_image_path}")
+        contents = self._edit_request(current_image, edit_instructions, storyboard_context)
+        return self._generate(contents, user_id)
+    
+    async def aedit_frame(
+        self, 
+        current_image: bytes, 
+        edit_instructions: str,
+        storyboard_context: str,
+        user_id: Optional[str] = None
+    ) -> bytes:
+        """
+        Async variant of edit_frame using the backend's async call.
+        
+        Args:
+            current_image: Bytes of the current frame image to edit
+            edit_instructions: User's instructions on how to modify the frame
+            storyboard_context: The overall storyboard description for context
+            user_id: The user the call is made for, used for fair rate limiting
         
-        # Read the image file and encode to base64
-        with open(current_image_path, 'rb') as f:
-            image_bytes = f.read()
-        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+        Returns:
+            Image bytes of the edited frame
         
+        Raises:
+            ValueError: If the current image is empty
+        """
+        contents = self._edit_request(current_image, edit_instructions, storyboard_context)
+        return await self._agenerate(contents, user_id)
+    
+    def _first_image_request(self, description: str) -> Tuple[Any, str]:
+        """Build the request contents and cache key for a first frame."""
+        # Construct prompt following Gemini best practices
+        prompt = FIRST_IMAGE_PROMPT_TEMPLATE.format(
+            system_instruction=IMAGE_GENERATION_SYSTEM_INSTRUCTION,
+            description=description
+        )
+        return prompt, image_cache.make_key(self.backend.cache_model_name(self.model_name), prompt)
+    
+    def _next_image_request(self, description: str, previous_image: bytes) -> Tuple[Any, str]:
+        """Build the request contents and cache key for a frame with a reference image."""
+        # Construct prompt following Gemini best practices
+        prompt = SEQUENTIAL_IMAGE_PROMPT_TEMPLATE.format(
+            system_instruction=IMAGE_GENERATION_SYSTEM_INSTRUCTION,
+            description=description
+        )
+        
+        # Create multimodal request with previous image and structured prompt
+        contents = self._build_image_contents(previous_image, prompt)
+        return contents, image_cache.make_key(self.backend.cache_model_name(self.model_name), prompt, previous_image)
+    
+    def _edit_request(
+        self,
+        current_image: bytes,
+        edit_instructions: str,
+        storyboard_context: str
+    ) -> Any:
+        """Build the request contents for a frame edit."""
         # Construct prompt for frame editing
         prompt = FRAME_EDIT_PROMPT_TEMPLATE.format(
             system_instruction=IMAGE_GENERATION_SYSTEM_INSTRUCTION,
@@ -146,62 +213,142 @@ class ImageGenerationAgent:
         )
         
         # Create multimodal request with current image and edit instructions
-        response = self.client.models.generate_content(
-            model=self.model_name,
-            contents=[
-                {
-                    'parts': [
-                        {
-                            'inline_data': {
-                                'mime_type': 'image/png',
-                                'data': image_base64
-                            }
-                        },
-                        {
-                            'text': prompt
-                        }
-                    ]
-                }
-            ]
-        )
+        return self._build_image_contents(current_image, prompt)
+    
+    def _generate(
+        self,
+        contents: Any,
+        user_id: Optional[str] = None,
+        cache_key: Optional[str] = None,
+        use_cache: bool = False
+    ) -> bytes:
+        """
+        Call the image model, going through the image cache when a key is given.
+        
+        Each attempt waits for a rate limit token and runs under the image
+        resilience policy (deadline, retries and circuit breaker).
+        
+        Args:
+            contents: Request contents for generate_content
+            user_id: The user the call is made for, used for fair rate limiting
+            cache_key: Image cache key, or None to bypass the cache entirely
+            use_cache: Whether a cached image may be returned instead of calling the model
         
-        return self._extract_image_from_response(response)
+        Returns:
+            Image bytes
+        """
+        if cache_key is not None and use_cache:
+            cached_image = image_cache.get(cache_key)
+            if cached_image is not None:
+                return cached_image
+        
+        def attempt() -> bytes:
+            return self.backend.generate_image(
+                self.model_name,
+                contents,
+                image_resilience.request_config()
+            )
+        
+        image_bytes = image_resilience.call(
+            attempt,
+            before_attempt=lambda: image_rate_limiter.acquire(user_id)
+        )
+        if cache_key is not None:
+            self._cache_image(cache_key, image_bytes)
+        return image_bytes
     
-    def _extract_image_from_response(self, response) -> bytes:
+    async def _agenerate(
+        self,
+        contents: Any,
+        user_id: Optional[str] = None,
+        cache_key: Optional[str] = None,
+        use_cache: bool = False
+    ) -> bytes:
         """
-        Extract image bytes from Gemini API response.
+        Async variant of _generate; waits for rate limit tokens without blocking the loop.
+        
+        Slow attempts may be hedged with a duplicate request when the image
+        resilience policy enables hedging.
         
         Args:
-            response: The API response object
+            contents: Request contents for generate_content
+            user_id: The user the call is made for, used for fair rate limiting
+            cache_key: Image cache key, or None to bypass the cache entirely
+            use_cache: Whether a cached image may be returned instead of calling the model
         
         Returns:
             Image bytes
         """
-        # Gemini returns generated images in the response text as base64
-        # or in inline_data parts
-        if hasattr(response, 'candidates') and response.candidates:
-            candidate = response.candidates[0]
-            if hasattr(candidate, 'content') and candidate.content.parts:
-                for part in candidate.content.parts:
-                    # Check for inline_data (binary image data)
-                    if hasattr(part, 'inline_data') and part.inline_data:
-                        # Data might already be bytes or base64 string
-                        data = part.inline_data.data
-                        if isinstance(data, bytes):
-                            return data
-                        elif isinstance(data, str):
-                            return base64.b64decode(data)
-                    
-                    # Check for text content that might contain base64
-                    if hasattr(part, 'text') and part.text:
-                        # Try to decode if it looks like base64
-                        try:
-                            # Remove any potential data URL prefix
-                            text = part.text.strip()
-                            if text.startswith('data:image'):
-                                text = text.split(',', 1)[1]
-                            return base64.b64decode(text)
-                        except (ValueError, TypeError, base64.binascii.Error):
-                            pass
-        
-        raise ValueError(f"No image found in response. Response structure: {response}")
+        if cache_key is not None and use_cache:
+            cached_image = image_cache.get(cache_key)
+            if cached_image is not None:
+                return cached_image
+        
+        async def attempt() -> bytes:
+            return await self.backend.agenerate_image(
+                self.model_name,
+                contents,
+                image_resilience.request_config()
+            )
+        
+        image_bytes = await image_resilience.acall(
+            attempt,
+            before_attempt=lambda: image_rate_limiter.acquire_async(user_id)
+        )
+        if cache_key is not None:
+            self._cache_image(cache_key, image_bytes)
+        return image_bytes
+    
+    @staticmethod
+    def _cache_image(cache_key: str, image_bytes: bytes) -> None:
+        """Cache a generated image; a failed write never fails the frame it was paid for."""
+        try:
+            image_cache.put(cache_key, image_bytes)
+        except OSError:
+            metrics.increment('image_cache.write_failures')
+    
+    @staticmethod
+    def _build_image_contents(image: bytes, prompt: str) -> list:
+        """
+        Build a multimodal request from a reference image and a text prompt.
+        
+        The SDK takes raw bytes for inline data, so the image is handed over
+        as-is with no base64 round trip on our side.
+        
+        Args:
+            image: Reference image bytes
+            prompt: The text prompt
+        
+        Returns:
+            Request contents for generate_content
+        
+        Raises:
+            ValueError: If the image is empty
+        """
+        if not image:
+            raise ValueError("Reference image is empty")
+        
+        return [
+            {
+                'parts': [
+                    {
+                        'inline_data': {
+                            'mime_type': _detect_image_mime_type(image),
+                            'data': bytes(image)
+                        }
+                    },
+                    {
+                        'text': prompt
+                    }
+                ]
+            }
+        ]
+
+
+def _detect_image_mime_type(image: bytes) -> str:
+    """Detect the MIME type of image bytes from their signature."""
+    if image[:3] == b'\xff\xd8\xff':
+        return 'image/jpeg'
+    if image[:4] == b'RIFF' and image[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'image/png'
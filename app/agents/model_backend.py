@@ -0,0 +1,239 @@
+"""
+Model Backend Module
+
+Where the agents' text and image model calls go: the Gemini API, a local
+fake, or responses recorded from the API.
+"""
+import base64
+import hashlib
+import json
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Optional, Union
+from google.adk.models.base_llm import BaseLlm
+from google.genai import Client
+from app.config import settings
+
+
+class ModelBackend(ABC):
+    """
+    Interface between the agents and the models they call.
+    
+    The image agent hands its requests to generate_image and agenerate_image;
+    the storyboard agent is built with the model text_model returns, which
+    is either a model name ADK resolves itself or an ADK model instance.
+    Either way, rate limiting, resilience and caching stay in the agents and
+    services, so every backend is exercised by the same pipeline.
+    """
+    
+    name = 'base'
+    
+    def cache_model_name(self, model_name: str) -> str:
+        """
+        Model name to key cached results by.
+        
+        Backends whose results don't come from the model itself use a
+        distinct name, so their results never answer for real ones.
+        
+        Args:
+            model_name: The model name
+        
+        Returns:
+            The name cache keys are built from
+        """
+        return model_name
+    
+    @abstractmethod
+    def generate_image(self, model_name: str, contents: Any, config: Any) -> bytes:
+        """
+        Generate an image.
+        
+        Args:
+            model_name: The image model to use
+            contents: Request contents for generate_content
+            config: Request config for generate_content
+        
+        Returns:
+            Image bytes
+        """
+    
+    @abstractmethod
+    async def agenerate_image(self, model_name: str, contents: Any, config: Any) -> bytes:
+        """
+        Async variant of generate_image.
+        
+        Args:
+            model_name: The image model to use
+            contents: Request contents for generate_content
+            config: Request config for generate_content
+        
+        Returns:
+            Image bytes
+        """
+    
+    @abstractmethod
+    def text_model(self, model_name: str) -> Union[str, BaseLlm]:
+        """
+        Get the model the storyboard agent is built with.
+        
+        Args:
+            model_name: The text model to use
+        
+        Returns:
+            A model name or an ADK model instance
+        """
+
+
+class GeminiBackend(ModelBackend):
+    """Calls the Gemini API through one shared client."""
+    
+    name = 'gemini'
+    
+    def __init__(self, client_factory: Callable[[], Client] = Client):
+        """
+        Initialize the backend.
+        
+        Args:
+            client_factory: Returns the Gemini client to use. Called on first
+                use, so the backend can be built before credentials exist.
+        """
+        self._client_factory = client_factory
+        self._client: Optional[Client] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def client(self) -> Client:
+        """The Gemini client, created on first use."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._client_factory()
+        return self._client
+    
+    def generate_image(self, model_name: str, contents: Any, config: Any) -> bytes:
+        """Generate an image with the Gemini API."""
+        response = self.client.models.generate_content(
+            model=model_name,
+            contents=contents,
+            config=config
+        )
+        return extract_image(response)
+    
+    async def agenerate_image(self, model_name: str, contents: Any, config: Any) -> bytes:
+        """Generate an image with the Gemini API's async client."""
+        response = await self.client.aio.models.generate_content(
+            model=model_name,
+            contents=contents,
+            config=config
+        )
+        return extract_image(response)
+    
+    def text_model(self, model_name: str) -> Union[str, BaseLlm]:
+        """Let ADK resolve the model name to its Gemini model."""
+        return model_name
+
+
+def create_model_backend(
+    name: Optional[str] = None,
+    client_factory: Callable[[], Client] = Client
+) -> ModelBackend:
+    """
+    Create the configured model backend.
+    
+    Args:
+        name: 'gemini', 'fake', 'record' or 'replay'. Defaults to configured backend.
+        client_factory: Returns the Gemini client for backends that call the API
+    
+    Returns:
+        The model backend
+    
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if name is None:
+        name = settings.MODEL_BACKEND
+    
+    # Imported here, as both modules build on the classes above
+    from app.agents.fake_backend import FakeBackend
+    from app.agents.recording_backend import RecordingBackend, ReplayBackend
+    
+    if name == GeminiBackend.name:
+        return GeminiBackend(client_factory)
+    if name == FakeBackend.name:
+        return FakeBackend()
+    if name == RecordingBackend.name:
+        return RecordingBackend(GeminiBackend(client_factory), settings.MODEL_RECORDINGS_DIR)
+    if name == ReplayBackend.name:
+        return ReplayBackend(settings.MODEL_RECORDINGS_DIR)
+    raise ValueError(f"Unknown model backend: {name}")
+
+
+def request_key(*parts: Any) -> str:
+    """
+    Hash a model request into a stable key.
+    
+    Binary data (reference images) is hashed on its own, so keys stay cheap
+    to build for requests carrying large images.
+    
+    Args:
+        parts: JSON-compatible request parts, which may contain bytes
+    
+    Returns:
+        Hex SHA-256 key
+    """
+    payload = json.dumps(_hashable(list(parts)), sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _hashable(value: Any) -> Any:
+    """Replace the bytes inside a request structure with their hashes."""
+    if isinstance(value, (bytes, bytearray)):
+        return {'sha256': hashlib.sha256(value).hexdigest()}
+    if isinstance(value, dict):
+        return {str(key): _hashable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_hashable(item) for item in value]
+    return value
+
+
+def extract_image(response) -> bytes:
+    """
+    Extract image bytes from Gemini API response.
+    
+    Args:
+        response: The API response object
+    
+    Returns:
+        Image bytes
+    
+    Raises:
+        ValueError: If the response contains no image
+    """
+    # Gemini returns generated images in the response text as base64
+    # or in inline_data parts
+    if hasattr(response, 'candidates') and response.candidates:
+        candidate = response.candidates[0]
+        if hasattr(candidate, 'content') and candidate.content.parts:
+            for part in candidate.content.parts:
+                # Check for inline_data (binary image data)
+                if hasattr(part, 'inline_data') and part.inline_data:
+                    # Data might already be bytes or base64 string
+                    data = part.inline_data.data
+                    if isinstance(data, bytes):
+                        return data
+                    elif isinstance(data, str):
+                        return base64.b64decode(data)
+                
+                # Check for text content that might contain base64
+                if hasattr(part, 'text') and part.text:
+                    # Try to decode if it looks like base64
+                    try:
+                        # Remove any potential data URL prefix
+                        text = part.text.strip()
+                        if text.startswith('data:image'):
+                            text = text.split(',', 1)[1]
+                        return base64.b64decode(text)
+                    except (ValueError, TypeError, base64.binascii.Error):
+                        pass
+    
+    raise ValueError(f"No image found in response. Response structure: {response}")
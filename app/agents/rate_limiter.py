@@ -0,0 +1,331 @@
+"""
+Rate Limiter Module
+
+Token-bucket rate limiting for Gemini calls with fair per-user scheduling.
+"""
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from contextlib import closing
+from typing import Deque, Dict, Optional
+from app.config import settings
+
+
+class RateLimitExceededError(ValueError):
+    """Raised when a caller waits too long for a rate limit token."""
+
+
+class TokenBucket:
+    """In-process token bucket."""
+    
+    def __init__(self, rate_per_second: float, capacity: float):
+        """
+        Initialize the token bucket.
+        
+        Args:
+            rate_per_second: Tokens added per second. Zero or less disables limiting.
+            capacity: Maximum number of tokens (burst size)
+        """
+        self.rate_per_second = rate_per_second
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def try_acquire(self) -> float:
+        """
+        Take one token if available.
+        
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available
+        """
+        if self.rate_per_second <= 0:
+            return 0.0
+        
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated_at) * self.rate_per_second
+            )
+            self._updated_at = now
+            
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate_per_second
+
+
+class SQLiteTokenBucket:
+    """
+    Token bucket whose state lives in a SQLite database.
+    
+    Every worker process pointing at the same database file draws from the
+    same bucket, so the limit holds across the whole deployment on one host.
+    """
+    
+    def __init__(self, db_path: str, name: str, rate_per_second: float, capacity: float):
+        """
+        Initialize the shared token bucket.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            name: Bucket name, unique per limited resource
+            rate_per_second: Tokens added per second. Zero or less disables limiting.
+            capacity: Maximum number of tokens (burst size)
+        """
+        self.db_path = db_path
+        self.name = name
+        self.rate_per_second = rate_per_second
+        self.capacity = max(capacity, 1.0)
+        self._initialized = False
+        self._init_lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection, creating the schema on first use."""
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    db_dir = os.path.dirname(self.db_path)
+                    if db_dir:
+                        os.makedirs(db_dir, exist_ok=True)
+                    with closing(sqlite3.connect(self.db_path, timeout=30)) as conn, conn:
+                        conn.execute(
+                            'CREATE TABLE IF NOT EXISTS token_buckets ('
+                            'name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+                        )
+                    self._initialized = True
+        
+        # Autocommit mode so the explicit BEGIN IMMEDIATE below controls locking
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+    
+    def try_acquire(self) -> float:
+        """
+        Take one token if available.
+        
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available
+        """
+        if self.rate_per_second <= 0:
+            return 0.0
+        
+        with closing(self._connect()) as conn:
+            # Waiters poll while the bucket is empty, so a plain read decides
+            # whether to try, and only taking a token locks the database
+            tokens = self._tokens(conn, time.time())
+            if tokens < 1:
+                return (1 - tokens) / self.rate_per_second
+            
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                now = time.time()
+                tokens = self._tokens(conn, now)
+                if tokens < 1:
+                    conn.execute('COMMIT')
+                    return (1 - tokens) / self.rate_per_second
+                
+                conn.execute(
+                    'INSERT OR REPLACE INTO token_buckets (name, tokens, updated_at) VALUES (?, ?, ?)',
+                    (self.name, tokens - 1, now)
+                )
+                conn.execute('COMMIT')
+                return 0.0
+            except sqlite3.Error:
+                conn.execute('ROLLBACK')
+                raise
+    
+    def _tokens(self, conn: sqlite3.Connection, now: float) -> float:
+        """Get the tokens in the bucket at a time, refilled since the last take."""
+        row = conn.execute(
+            'SELECT tokens, updated_at FROM token_buckets WHERE name = ?',
+            (self.name,)
+        ).fetchone()
+        if row is None:
+            return self.capacity
+        elapsed = max(0.0, now - row[1])
+        return min(self.capacity, row[0] + elapsed * self.rate_per_second)
+
+
+class FairRateLimiter:
+    """
+    Rate limiter that serves waiting users round-robin.
+    
+    Each user has a FIFO queue of waiting calls. Only the call at the head of
+    the next user's queue may take a token, and after it does that user moves
+    to the back of the rotation, so a user with many queued calls cannot
+    starve users with few. Blocking and async callers share the same queues.
+    
+    The bucket is asked outside the condition, as a shared bucket may wait
+    on its database: holding the condition meanwhile would stall every
+    other waiter, and async ones would stall their event loop with it.
+    """
+    
+    # How often async waiters behind the head of the queue re-check it, as
+    # they can't wait on the condition
+    ASYNC_POLL_SECONDS = 0.05
+    
+    def __init__(self, bucket, max_wait_seconds: float):
+        """
+        Initialize the fair rate limiter.
+        
+        Args:
+            bucket: TokenBucket or SQLiteTokenBucket supplying the tokens
+            max_wait_seconds: Longest a call may wait before giving up
+        """
+        self.bucket = bucket
+        self.max_wait_seconds = max_wait_seconds
+        self._cond = threading.Condition()
+        self._queues: Dict[str, Deque[object]] = OrderedDict()
+    
+    def acquire(self, user_id: Optional[str] = None) -> None:
+        """
+        Block until the user may make one call.
+        
+        Args:
+            user_id: The user making the call. Defaults to configured default.
+        
+        Raises:
+            RateLimitExceededError: If no token was granted within max_wait_seconds
+        """
+        user_id, ticket, deadline = self._enqueue(user_id)
+        
+        try:
+            while True:
+                with self._cond:
+                    is_next = self._next_ticket() is ticket
+                wait = self.bucket.try_acquire() if is_next else None
+                
+                with self._cond:
+                    if wait == 0:
+                        self._grant(user_id, ticket)
+                        return
+                    remaining = self._remaining(user_id, ticket, deadline)
+                    if not is_next and self._next_ticket() is ticket:
+                        continue  # Became the head since the check, so the notify was missed
+                    self._cond.wait(timeout=min(wait, remaining) if wait else remaining)
+        except BaseException:
+            # A failed waiter, e.g. one whose bucket couldn't reach its
+            # database, must not hold up the users queued behind it
+            self._abandon(user_id, ticket)
+            raise
+    
+    async def acquire_async(self, user_id: Optional[str] = None) -> None:
+        """
+        Wait, without blocking the event loop, until the user may make one call.
+        
+        Args:
+            user_id: The user making the call. Defaults to configured default.
+        
+        Raises:
+            RateLimitExceededError: If no token was granted within max_wait_seconds
+        """
+        user_id, ticket, deadline = self._enqueue(user_id)
+        
+        try:
+            while True:
+                with self._cond:
+                    is_next = self._next_ticket() is ticket
+                wait = await asyncio.to_thread(self.bucket.try_acquire) if is_next else None
+                
+                with self._cond:
+                    if wait == 0:
+                        self._grant(user_id, ticket)
+                        return
+                    remaining = self._remaining(user_id, ticket, deadline)
+                
+                # The head sleeps until the bucket has a token; the others
+                # only re-check whether they have moved up
+                await asyncio.sleep(min(wait if is_next else self.ASYNC_POLL_SECONDS, remaining))
+        except BaseException:
+            # A cancelled or failed waiter must not hold up the users queued behind it
+            self._abandon(user_id, ticket)
+            raise
+    
+    def waiting(self) -> Dict[str, int]:
+        """Get the number of waiting calls per user."""
+        with self._cond:
+            return {user_id: len(queue) for user_id, queue in self._queues.items()}
+    
+    def _enqueue(self, user_id: Optional[str]):
+        """Queue a new ticket for the user and compute its deadline."""
+        if user_id is None:
+            user_id = settings.DEFAULT_USER_ID
+        
+        ticket = object()
+        deadline = time.monotonic() + self.max_wait_seconds
+        
+        with self._cond:
+            self._queues.setdefault(user_id, deque()).append(ticket)
+        return user_id, ticket, deadline
+    
+    def _grant(self, user_id: str, ticket: object) -> None:
+        """Dequeue a ticket that took a token. Caller holds the condition."""
+        self._remove(user_id, ticket, rotate=True)
+        self._cond.notify_all()
+    
+    def _abandon(self, user_id: str, ticket: object) -> None:
+        """Dequeue a ticket whose caller gave up, unless it already left the queue."""
+        with self._cond:
+            if ticket in self._queues.get(user_id, ()):
+                self._remove(user_id, ticket, rotate=False)
+                self._cond.notify_all()
+    
+    def _remaining(self, user_id: str, ticket: object, deadline: float) -> float:
+        """
+        Get the time a queued ticket may still wait. Caller holds the condition.
+        
+        Returns:
+            Seconds until the deadline
+        
+        Raises:
+            RateLimitExceededError: If the deadline has passed
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self._remove(user_id, ticket, rotate=False)
+            self._cond.notify_all()
+            raise RateLimitExceededError(
+                f"Rate limit wait exceeded {self.max_wait_seconds:g}s for user {user_id}"
+            )
+        return remaining
+    
+    def _next_ticket(self) -> Optional[object]:
+        """Get the ticket at the head of the next user's queue."""
+        for queue in self._queues.values():
+            return queue[0]
+        return None
+    
+    def _remove(self, user_id: str, ticket: object, rotate: bool) -> None:
+        """Remove a ticket and optionally move its user to the back of the rotation."""
+        queue = self._queues[user_id]
+        queue.remove(ticket)
+        if not queue:
+            del self._queues[user_id]
+        elif rotate:
+            self._queues.move_to_end(user_id)
+
+
+def _create_limiter(name: str, requests_per_minute: float, burst: float) -> FairRateLimiter:
+    """Create a fair limiter using the configured bucket backend."""
+    rate_per_second = requests_per_minute / 60.0
+    if settings.RATE_LIMIT_BACKEND == 'sqlite':
+        bucket = SQLiteTokenBucket(settings.RATE_LIMIT_DB_PATH, name, rate_per_second, burst)
+    else:
+        bucket = TokenBucket(rate_per_second, burst)
+    return FairRateLimiter(bucket, max_wait_seconds=settings.RATE_LIMIT_MAX_WAIT_SECONDS)
+
+
+# Process-wide limiters shared by every agent and runner
+text_rate_limiter = _create_limiter(
+    'gemini_text',
+    settings.TEXT_REQUESTS_PER_MINUTE,
+    settings.TEXT_REQUESTS_BURST
+)
+image_rate_limiter = _create_limiter(
+    'gemini_image',
+    settings.IMAGE_REQUESTS_PER_MINUTE,
+    settings.IMAGE_REQUESTS_BURST
+)
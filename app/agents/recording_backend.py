@@ -0,0 +1,348 @@
+"""
+Recording Model Backend Module
+
+Records the responses of real model calls to disk and replays them, so a
+pipeline run can be repeated offline with the exact responses it got.
+"""
+import os
+import json
+import time
+import asyncio
+import tempfile
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple, Union
+from pydantic import PrivateAttr
+from google.adk.models.base_llm import BaseLlm, LlmCapabilities
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+from app.agents.model_backend import ModelBackend, request_key
+from app.config import settings
+
+
+class RecordingNotFoundError(ValueError):
+    """Raised when a replayed request was never recorded."""
+
+
+class RecordingStore:
+    """
+    Recorded model responses, keyed by a hash of their request.
+    
+    Images are stored as images/<key>.bin, each with a JSON sidecar holding
+    the call's latency; storyboard responses as text/<key>.json holding every
+    streamed chunk with its offset from the start of the call. Files are
+    written atomically, so concurrent recorders never leave partial ones.
+    """
+    
+    def __init__(self, directory: str):
+        """
+        Initialize the store.
+        
+        Args:
+            directory: Directory of the recordings, created on first write
+        """
+        self.directory = directory
+    
+    def save_image(self, key: str, image: bytes, latency_seconds: float) -> None:
+        """
+        Record an image response.
+        
+        Args:
+            key: Request key
+            image: Image bytes
+            latency_seconds: Duration of the call
+        """
+        self._write(self._path('images', key, '.bin'), image)
+        self._write(
+            self._path('images', key, '.json'),
+            json.dumps({'latency_seconds': latency_seconds}).encode('utf-8')
+        )
+    
+    def load_image(self, key: str) -> Tuple[bytes, float]:
+        """
+        Look up a recorded image response.
+        
+        Args:
+            key: Request key
+        
+        Returns:
+            Tuple of the image bytes and the recorded latency in seconds
+        
+        Raises:
+            RecordingNotFoundError: If the request was never recorded
+        """
+        try:
+            with open(self._path('images', key, '.json'), 'rb') as f:
+                latency_seconds = json.load(f)['latency_seconds']
+            with open(self._path('images', key, '.bin'), 'rb') as f:
+                return f.read(), latency_seconds
+        except FileNotFoundError:
+            raise RecordingNotFoundError(f"No recorded image response for request {key}")
+    
+    def save_text(self, key: str, chunks: List[Dict[str, Any]]) -> None:
+        """
+        Record a storyboard response.
+        
+        Args:
+            key: Request key
+            chunks: Responses in order, each with 'text', 'partial' and
+                'offset_seconds' (time since the start of the call)
+        """
+        self._write(self._path('text', key, '.json'), json.dumps({'chunks': chunks}).encode('utf-8'))
+    
+    def load_text(self, key: str) -> List[Dict[str, Any]]:
+        """
+        Look up a recorded storyboard response.
+        
+        Args:
+            key: Request key
+        
+        Returns:
+            The recorded chunks, as passed to save_text
+        
+        Raises:
+            RecordingNotFoundError: If the request was never recorded
+        """
+        try:
+            with open(self._path('text', key, '.json'), 'rb') as f:
+                return json.load(f)['chunks']
+        except FileNotFoundError:
+            raise RecordingNotFoundError(f"No recorded storyboard response for request {key}")
+    
+    def _path(self, kind: str, key: str, suffix: str) -> str:
+        """Get the path of a recording file."""
+        return os.path.join(self.directory, kind, f"{key}{suffix}")
+    
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        """Write a file so readers only ever see a complete one."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, staging_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(staging_path, path)
+
+
+class RecordingBackend(ModelBackend):
+    """Passes calls on to another backend and records every response."""
+    
+    name = 'record'
+    
+    def __init__(self, inner: ModelBackend, directory: str):
+        """
+        Initialize the recording backend.
+        
+        Args:
+            inner: Backend whose responses are recorded
+            directory: Directory of the recordings
+        """
+        self.inner = inner
+        self.store = RecordingStore(directory)
+    
+    def cache_model_name(self, model_name: str) -> str:
+        """Results are the inner backend's, so they are cached as its results."""
+        return self.inner.cache_model_name(model_name)
+    
+    def generate_image(self, model_name: str, contents: Any, config: Any) -> bytes:
+        """Generate an image with the inner backend and record it."""
+        started = time.monotonic()
+        image = self.inner.generate_image(model_name, contents, config)
+        self.store.save_image(request_key(model_name, contents), image, time.monotonic() - started)
+        return image
+    
+    async def agenerate_image(self, model_name: str, contents: Any, config: Any) -> bytes:
+        """Async variant of generate_image."""
+        started = time.monotonic()
+        image = await self.inner.agenerate_image(model_name, contents, config)
+        await asyncio.to_thread(
+            self.store.save_image,
+            request_key(model_name, contents),
+            image,
+            time.monotonic() - started
+        )
+        return image
+    
+    def text_model(self, model_name: str) -> Union[str, BaseLlm]:
+        """Wrap the inner backend's storyboard model in a recorder."""
+        inner_model = self.inner.text_model(model_name)
+        if isinstance(inner_model, str):
+            inner_model = LLMRegistry.new_llm(inner_model)
+        return RecordingLlm(model_name, inner_model, self.store)
+
+
+class ReplayBackend(ModelBackend):
+    """
+    Serves recorded responses without calling any model.
+    
+    A request that was never recorded fails with RecordingNotFoundError,
+    which is not retried. Responses arrive immediately, or after their
+    recorded latency when MODEL_REPLAY_RECORDED_LATENCY is set.
+    """
+    
+    name = 'replay'
+    
+    def __init__(self, directory: str, recorded_latency: Optional[bool] = None):
+        """
+        Initialize the replay backend.
+        
+        Args:
+            directory: Directory of the recordings
+            recorded_latency: Whether to wait out recorded latencies. Defaults to configured setting.
+        """
+        self.store = RecordingStore(directory)
+        if recorded_latency is None:
+            recorded_latency = settings.MODEL_REPLAY_RECORDED_LATENCY
+        self.recorded_latency = recorded_latency
+    
+    def generate_image(self, model_name: str, contents: Any, config: Any) -> bytes:
+        """Serve a recorded image."""
+        image, latency_seconds = self.store.load_image(request_key(model_name, contents))
+        if self.recorded_latency:
+            time.sleep(latency_seconds)
+        return image
+    
+    async def agenerate_image(self, model_name: str, contents: Any, config: Any) -> bytes:
+        """Async variant of generate_image."""
+        image, latency_seconds = await asyncio.to_thread(
+            self.store.load_image,
+            request_key(model_name, contents)
+        )
+        if self.recorded_latency:
+            await asyncio.sleep(latency_seconds)
+        return image
+    
+    def text_model(self, model_name: str) -> Union[str, BaseLlm]:
+        """Build a storyboard model serving recorded responses."""
+        return ReplayLlm(model_name, self.store, self.recorded_latency)
+
+
+class RecordingLlm(BaseLlm):
+    """ADK model that passes requests on to another model and records its responses."""
+    
+    _inner: BaseLlm = PrivateAttr()
+    _store: RecordingStore = PrivateAttr()
+    
+    def __init__(self, model: str, inner: BaseLlm, store: RecordingStore):
+        """
+        Initialize the recording model.
+        
+        Args:
+            model: Model name the recordings are keyed by
+            inner: Model whose responses are recorded
+            store: Store to record to
+        """
+        super().__init__(model=model)
+        self._inner = inner
+        self._store = store
+    
+    @property
+    def capabilities(self) -> LlmCapabilities:
+        """The inner model's capabilities."""
+        return self._inner.capabilities
+    
+    async def generate_content_async(
+        self,
+        llm_request: LlmRequest,
+        stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """
+        Pass a request on and record the responses once the final one arrives.
+        
+        Args:
+            llm_request: The request ADK built from the agent and session
+            stream: Whether to stream partial responses
+        
+        Yields:
+            The inner model's responses
+        """
+        key = _text_request_key(self.model, llm_request)
+        started = time.monotonic()
+        chunks = []
+        async for response in self._inner.generate_content_async(llm_request, stream=stream):
+            chunks.append({
+                'text': _response_text(response),
+                'partial': bool(response.partial),
+                'offset_seconds': time.monotonic() - started
+            })
+            # Saved before the final response is handed on, as ADK closes the
+            # call once it has it; failed calls never get here
+            if not response.partial:
+                await asyncio.to_thread(self._store.save_text, key, chunks)
+            yield response
+
+
+class ReplayLlm(BaseLlm):
+    """ADK model that serves recorded storyboard responses."""
+    
+    _store: RecordingStore = PrivateAttr()
+    _recorded_latency: bool = PrivateAttr()
+    
+    def __init__(self, model: str, store: RecordingStore, recorded_latency: bool):
+        """
+        Initialize the replay model.
+        
+        Args:
+            model: Model name the recordings are keyed by
+            store: Store to replay from
+            recorded_latency: Whether to wait out recorded latencies
+        """
+        super().__init__(model=model)
+        self._store = store
+        self._recorded_latency = recorded_latency
+    
+    @property
+    def capabilities(self) -> LlmCapabilities:
+        """Replayed responses come without tool calls."""
+        return LlmCapabilities(output_schema_and_tools=False)
+    
+    async def generate_content_async(
+        self,
+        llm_request: LlmRequest,
+        stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """
+        Serve the recorded response to a request.
+        
+        A response recorded with streaming is served without its partial
+        chunks when replayed without streaming, and the other way round.
+        
+        Args:
+            llm_request: The request ADK built from the agent and session
+            stream: Whether to stream partial responses
+        
+        Yields:
+            The recorded responses
+        
+        Raises:
+            RecordingNotFoundError: If the request was never recorded
+        """
+        key = _text_request_key(self.model, llm_request)
+        chunks = await asyncio.to_thread(self._store.load_text, key)
+        
+        started = time.monotonic()
+        for chunk in chunks:
+            if chunk['partial'] and not stream:
+                continue
+            if self._recorded_latency:
+                await asyncio.sleep(max(0.0, chunk['offset_seconds'] - (time.monotonic() - started)))
+            yield LlmResponse(
+                content=types.Content(role='model', parts=[types.Part(text=chunk['text'])]),
+                partial=chunk['partial'],
+                turn_complete=not chunk['partial']
+            )
+
+
+def _text_request_key(model_name: str, llm_request: LlmRequest) -> str:
+    """Key a storyboard request by its model, instruction and messages."""
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    if isinstance(instruction, types.Content):
+        instruction = instruction.model_dump(mode='json', exclude_none=True)
+    contents = [content.model_dump(mode='json', exclude_none=True) for content in llm_request.contents]
+    return request_key(model_name, instruction, contents)
+
+
+def _response_text(response: LlmResponse) -> str:
+    """Text of a model response."""
+    if response.content is None or not response.content.parts:
+        return ''
+    return ''.join(part.text for part in response.content.parts if part.text and not part.thought)
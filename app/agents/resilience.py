@@ -0,0 +1,494 @@
+"""
+Resilience Module
+
+Deadlines, retries with jittered backoff, hedged requests and circuit
+breaking for Gemini calls.
+"""
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, Optional, TypeVar
+import httpx
+from google.genai import errors as genai_errors
+from google.genai import types
+from app.metrics import metrics
+from app.config import settings
+
+T = TypeVar('T')
+
+# Upstream status codes worth retrying: timeouts, throttling and server errors
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class ModelTimeoutError(ValueError):
+    """Raised when a model call exceeds its deadline."""
+
+
+class ModelUnavailableError(ValueError):
+    """Raised when a model call keeps failing with retryable errors."""
+
+
+class CircuitOpenError(ValueError):
+    """Raised instead of calling an upstream that is known to be unhealthy."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Classify a model call failure.
+    
+    Args:
+        error: The exception raised by the call
+    
+    Returns:
+        True for transient failures (deadlines, network errors, throttling
+        and server errors), False for errors a retry won't fix
+    """
+    if isinstance(error, genai_errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (ModelTimeoutError, httpx.TransportError, ConnectionError, TimeoutError))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    
+    After failure_threshold retryable failures in a row the circuit opens
+    and calls fail fast with CircuitOpenError. Once reset_seconds have
+    passed, one trial call is let through (half-open): its success closes
+    the circuit, its failure opens it again. A trial that never reports
+    back (e.g. it was cancelled) is replaced after another reset_seconds.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        """
+        Initialize a closed circuit breaker.
+        
+        Args:
+            name: Name used in metrics and error messages
+            failure_threshold: Consecutive failures that open the circuit (<= 0 disables it)
+            reset_seconds: How long the circuit stays open before a trial call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        metrics.set_gauge(f'circuit.{self.name}.open', 0)
+    
+    @property
+    def state(self) -> str:
+        """The current circuit state."""
+        with self._lock:
+            return self._state
+    
+    def before_call(self) -> None:
+        """
+        Check that a call may go upstream.
+        
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a trial call in flight
+        """
+        if self.failure_threshold <= 0:
+            return
+        
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            
+            # Let one trial call through per reset period
+            now = time.monotonic()
+            if now - self._opened_at >= self.reset_seconds:
+                self._opened_at = now
+                if self._state == self.OPEN:
+                    self._set_state(self.HALF_OPEN)
+                return
+        
+        metrics.increment(f'circuit.{self.name}.rejected')
+        raise CircuitOpenError(f"{self.name} is unavailable; failing fast until it recovers")
+    
+    def record_success(self) -> None:
+        """Record a successful call, closing the circuit."""
+        with self._lock:
+            self._failures = 0
+            if self._state != self.CLOSED:
+                self._set_state(self.CLOSED)
+    
+    def record_failure(self) -> None:
+        """Record a retryable failure, opening the circuit at the threshold."""
+        if self.failure_threshold <= 0:
+            return
+        
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                if self._state != self.OPEN:
+                    metrics.increment(f'circuit.{self.name}.opened')
+                    self._set_state(self.OPEN)
+    
+    def _set_state(self, state: str) -> None:
+        """Change state and publish it. Caller holds the lock."""
+        self._state = state
+        metrics.set_gauge(f'circuit.{self.name}.open', 0 if state == self.CLOSED else 1)
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies."""
+    
+    def __init__(self, window: int = 200):
+        """
+        Initialize an empty tracker.
+        
+        Args:
+            window: Number of most recent latencies kept
+        """
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = deque(maxlen=window)
+    
+    def record(self, seconds: float) -> None:
+        """Record the latency of one successful call."""
+        with self._lock:
+            self._samples.append(seconds)
+    
+    def percentile(self, percent: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Get a latency percentile over the window.
+        
+        Args:
+            percent: Percentile between 0 and 100
+            min_samples: Fewest samples needed for a meaningful answer
+        
+        Returns:
+            The latency in seconds, or None if there are too few samples
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples or len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percent / 100.0))
+        return samples[index]
+
+
+class ResiliencePolicy:
+    """
+    Deadline, retry, hedging and circuit breaking policy for one upstream model.
+    
+    Every attempt gets its own deadline. Retryable failures are retried
+    with full-jitter exponential backoff, so callers that failed together
+    don't retry in lockstep. Optionally, an async call still running after
+    the hedge percentile of recent latencies gets a duplicate request and
+    the first result wins, which trims the latency tail at the cost of a
+    few extra calls. All attempts go through the circuit breaker.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        timeout_seconds: float,
+        max_attempts: int,
+        backoff_base_seconds: float,
+        backoff_max_seconds: float,
+        breaker: CircuitBreaker,
+        hedge_percentile: float = 0,
+        hedge_min_samples: int = 20
+    ):
+        """
+        Initialize the policy.
+        
+        Args:
+            name: Name used in metrics and error messages
+            timeout_seconds: Deadline for a single attempt
+            max_attempts: Attempts per call, including the first
+            backoff_base_seconds: Backoff cap before the second attempt; doubles per attempt
+            backoff_max_seconds: Largest backoff cap
+            breaker: Circuit breaker guarding the upstream
+            hedge_percentile: Latency percentile after which a duplicate request
+                is sent (<= 0 disables hedging)
+            hedge_min_samples: Latencies needed before hedging starts
+        """
+        self.name = name
+        self.timeout_seconds = timeout_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.breaker = breaker
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = LatencyTracker()
+    
+    def request_config(self) -> types.GenerateContentConfig:
+        """Request config that makes the SDK enforce the per-attempt deadline too."""
+        return types.GenerateContentConfig(
+            http_options=types.HttpOptions(timeout=int(self.timeout_seconds * 1000))
+        )
+    
+    def backoff_seconds(self, attempt: int) -> float:
+        """
+        Get a full-jitter backoff delay.
+        
+        Args:
+            attempt: The attempt that just failed (1-based)
+        
+        Returns:
+            Seconds to wait before the next attempt
+        """
+        cap = min(self.backoff_max_seconds, self.backoff_base_seconds * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+    
+    def call(
+        self,
+        call: Callable[[], T],
+        before_attempt: Optional[Callable[[], None]] = None
+    ) -> T:
+        """
+        Make a blocking call under the policy.
+        
+        The deadline is enforced by the SDK through request_config(); blocking
+        calls are never hedged.
+        
+        Args:
+            call: Makes one attempt
+            before_attempt: Runs before each attempt, outside its deadline
+                (e.g. waiting for a rate limit token)
+        
+        Returns:
+            The call's result
+        
+        Raises:
+            CircuitOpenError: If the upstream is known to be unhealthy
+            ModelUnavailableError: If every attempt failed with a retryable error
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            if before_attempt is not None:
+                before_attempt()
+            
+            started = time.monotonic()
+            try:
+                result = call()
+            except Exception as e:
+                delay = self._handle_failure(e, attempt)
+                time.sleep(delay)
+                continue
+            
+            self._record_success(time.monotonic() - started)
+            return result
+    
+    async def acall(
+        self,
+        call: Callable[[], Awaitable[T]],
+        before_attempt: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> T:
+        """
+        Make an async call under the policy.
+        
+        Args:
+            call: Starts one attempt
+            before_attempt: Awaited before each attempt and each hedged
+                duplicate, outside its deadline (e.g. waiting for a rate limit token)
+        
+        Returns:
+            The call's result
+        
+        Raises:
+            CircuitOpenError: If the upstream is known to be unhealthy
+            ModelUnavailableError: If every attempt failed with a retryable error
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            if before_attempt is not None:
+                await before_attempt()
+            
+            try:
+                return await self._ahedged(call, before_attempt)
+            except Exception as e:
+                delay = self._handle_failure(e, attempt)
+                await asyncio.sleep(delay)
+    
+    async def aiterate(self, open_stream: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """
+        Consume a streamed call under the policy.
+        
+        A stream is only retried until it has produced its first item, as
+        the consumer can't take back what it has already seen. The deadline
+        covers the whole stream and is checked as items arrive; a stalled
+        stream is ended by the SDK's request timeout.
+        
+        Args:
+            open_stream: Starts one attempt and returns its async iterator
+        
+        Yields:
+            The stream's items
+        
+        Raises:
+            CircuitOpenError: If the upstream is known to be unhealthy
+            ModelTimeoutError: If the stream runs past its deadline
+            ModelUnavailableError: If every attempt failed with a retryable error
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            
+            stream = open_stream()
+            started = time.monotonic()
+            received = False
+            try:
+                async for item in stream:
+                    if time.monotonic() - started > self.timeout_seconds:
+                        metrics.increment(f'model.{self.name}.timeouts')
+                        raise ModelTimeoutError(
+                            f"{self.name} call exceeded its {self.timeout_seconds:g}s deadline"
+                        )
+                    received = True
+                    yield item
+            except Exception as e:
+                if received:
+                    # Too late to retry; still count the failure
+                    metrics.increment(f'model.{self.name}.failures')
+                    if is_retryable(e):
+                        self.breaker.record_failure()
+                    raise
+                delay = self._handle_failure(e, attempt)
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                aclose = getattr(stream, 'aclose', None)
+                if aclose is not None:
+                    await aclose()
+            
+            self._record_success(time.monotonic() - started)
+            return
+    
+    async def _ahedged(
+        self,
+        call: Callable[[], Awaitable[T]],
+        before_attempt: Optional[Callable[[], Awaitable[None]]]
+    ) -> T:
+        """Run one attempt, adding a duplicate request if it runs unusually long."""
+        hedge_delay = None
+        if self.hedge_percentile > 0:
+            hedge_delay = self.latencies.percentile(self.hedge_percentile, self.hedge_min_samples)
+        
+        primary = asyncio.ensure_future(self._atimed(call))
+        if hedge_delay is None:
+            return await primary
+        
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if done:
+                return primary.result()
+            
+            metrics.increment(f'model.{self.name}.hedges')
+            hedge = asyncio.ensure_future(self._atimed(call, before_attempt))
+            tasks.add(hedge)
+            
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            metrics.increment(f'model.{self.name}.hedge_wins')
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # The losing request is no longer needed
+            for task in tasks:
+                task.cancel()
+    
+    async def _atimed(
+        self,
+        call: Callable[[], Awaitable[T]],
+        before_attempt: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> T:
+        """Run one attempt under its deadline and record its latency."""
+        if before_attempt is not None:
+            await before_attempt()
+        
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(call(), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            metrics.increment(f'model.{self.name}.timeouts')
+            raise ModelTimeoutError(
+                f"{self.name} call exceeded its {self.timeout_seconds:g}s deadline"
+            )
+        
+        self._record_success(time.monotonic() - started)
+        return result
+    
+    def _record_success(self, seconds: float) -> None:
+        """Record a successful attempt."""
+        self.breaker.record_success()
+        self.latencies.record(seconds)
+        metrics.increment(f'model.{self.name}.calls')
+        metrics.observe(f'model.{self.name}.latency_seconds', seconds)
+    
+    def _handle_failure(self, error: Exception, attempt: int) -> float:
+        """
+        Record a failed attempt and decide whether to retry.
+        
+        Returns:
+            Seconds to wait before retrying
+        
+        Raises:
+            The original error if it isn't retryable, or ModelUnavailableError
+            once the attempts are used up
+        """
+        metrics.increment(f'model.{self.name}.failures')
+        if not is_retryable(error):
+            # The upstream answered, so it is healthy even if the request was bad
+            self.breaker.record_success()
+            raise error
+        
+        self.breaker.record_failure()
+        if attempt >= self.max_attempts:
+            raise ModelUnavailableError(
+                f"{self.name} call failed after {attempt} attempts: {error}"
+            ) from error
+        
+        metrics.increment(f'model.{self.name}.retries')
+        return self.backoff_seconds(attempt)
+
+
+def _create_policy(name: str, timeout_seconds: float, hedge_percentile: float = 0) -> ResiliencePolicy:
+    """Create a policy with its own circuit breaker from the configured settings."""
+    return ResiliencePolicy(
+        name,
+        timeout_seconds=timeout_seconds,
+        max_attempts=settings.MODEL_MAX_ATTEMPTS,
+        backoff_base_seconds=settings.MODEL_BACKOFF_BASE_SECONDS,
+        backoff_max_seconds=settings.MODEL_BACKOFF_MAX_SECONDS,
+        breaker=CircuitBreaker(
+            name,
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            reset_seconds=settings.CIRCUIT_RESET_SECONDS
+        ),
+        hedge_percentile=hedge_percentile,
+        hedge_min_samples=settings.HEDGE_MIN_SAMPLES
+    )
+
+
+# Process-wide policies shared by every agent and runner
+text_resilience = _create_policy('gemini_text', settings.TEXT_MODEL_TIMEOUT_SECONDS)
+image_resilience = _create_policy(
+    'gemini_image',
+    settings.IMAGE_MODEL_TIMEOUT_SECONDS,
+    hedge_percentile=settings.IMAGE_HEDGE_PERCENTILE
+)
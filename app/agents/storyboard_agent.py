@@ -3,30 +3,38 @@ Storyboard Agent Module
 
 Defines the Google ADK agent for storyboard generation.
 """
+from typing import Optional
 from google.adk.agents.llm_agent import LlmAgent
 from app.models.storyboard import StoryboardOutput
 from app.agents.prompts import STORYBOARD_INSTRUCTION
+from app.agents.resilience import text_resilience
+from app.agents.model_backend import ModelBackend, create_model_backend
 from app.config import settings
 
 
-def create_storyboard_agent(model_name: str = None) -> LlmAgent:
+def create_storyboard_agent(model_name: str = None, backend: Optional[ModelBackend] = None) -> LlmAgent:
     """
     Create and configure the storyboard segmentation agent.
     
     Args:
         model_name: The Gemini model to use. Defaults to configured model.
+        backend: Model backend to call. Defaults to the configured backend.
     
     Returns:
         LlmAgent configured for storyboard generation
     """
     if model_name is None:
         model_name = settings.GEMINI_TEXT_MODEL
+    if backend is None:
+        backend = create_model_backend()
     
     agent = LlmAgent(
-        model=model_name,
+        model=backend.text_model(model_name),
         name=settings.STORYBOARD_AGENT_NAME,
         description=settings.STORYBOARD_AGENT_DESCRIPTION,
         instruction=STORYBOARD_INSTRUCTION,
         output_schema=StoryboardOutput,
+        # Bound each model request so a stalled call fails and can be retried
+        generate_content_config=text_resilience.request_config(),
     )
     return agent
@@ -41,6 +41,117 @@ class Settings:
     
     # Output Configuration
     OUTPUT_DIR: str = "output"
+    WORKSPACE_MAX_AGE_SECONDS: float = float(os.getenv('WORKSPACE_MAX_AGE_SECONDS', '86400'))
+    
+    # PDF Export Configuration ('screen', 'print' or 'archive'; DPI or quality <= 0 disables that step)
+    PDF_DEFAULT_PROFILE: str = os.getenv('PDF_DEFAULT_PROFILE', 'screen')
+    PDF_SCREEN_DPI: int = int(os.getenv('PDF_SCREEN_DPI', '110'))
+    PDF_SCREEN_JPEG_QUALITY: int = int(os.getenv('PDF_SCREEN_JPEG_QUALITY', '75'))
+    PDF_PRINT_DPI: int = int(os.getenv('PDF_PRINT_DPI', '300'))
+    PDF_PRINT_JPEG_QUALITY: int = int(os.getenv('PDF_PRINT_JPEG_QUALITY', '92'))
+    # Render a session's PDF once its frame edits settle for this long (<= 0 renders on download only)
+    PDF_REBUILD_DEBOUNCE_SECONDS: float = float(os.getenv('PDF_REBUILD_DEBOUNCE_SECONDS', '2'))
+    
+    # Frame Derivative Configuration (workers <= 0 renders in the calling thread)
+    DERIVATIVE_WORKERS: int = int(os.getenv('DERIVATIVE_WORKERS', '2'))
+    THUMBNAIL_WIDTH: int = int(os.getenv('THUMBNAIL_WIDTH', '480'))
+    WEB_IMAGE_WIDTH: int = int(os.getenv('WEB_IMAGE_WIDTH', '1280'))
+    WEBP_QUALITY: int = int(os.getenv('WEBP_QUALITY', '80'))
+    
+    # Job Queue Configuration
+    JOB_WORKERS: int = int(os.getenv('JOB_WORKERS', '4'))
+    # 'in_process' runs jobs in the web process; 'external' leaves them to worker.py
+    JOB_EXECUTION: str = os.getenv('JOB_EXECUTION', 'in_process')
+    JOB_EXECUTION_MODES: tuple = ('in_process', 'external')
+    JOB_CLAIM_POLL_SECONDS: float = float(os.getenv('JOB_CLAIM_POLL_SECONDS', '1'))
+    JOB_DB_PATH: str = os.getenv('JOB_DB_PATH', os.path.join(OUTPUT_DIR, '.jobs.sqlite3'))
+    JOB_EVENTS_POLL_SECONDS: float = float(os.getenv('JOB_EVENTS_POLL_SECONDS', '0.5'))
+    JOB_EVENTS_KEEPALIVE_SECONDS: float = float(os.getenv('JOB_EVENTS_KEEPALIVE_SECONDS', '15'))
+    # Longest a request waits for its job before answering 503 (never started) or 504
+    JOB_WAIT_TIMEOUT_SECONDS: float = float(os.getenv('JOB_WAIT_TIMEOUT_SECONDS', '600'))
+    # Finished jobs and their events are deleted this long after they finish (<= 0 keeps them)
+    JOB_RETENTION_SECONDS: float = float(os.getenv('JOB_RETENTION_SECONDS', str(7 * 24 * 3600)))
+    
+    # Metrics Configuration (each process publishes its metrics for /metrics to aggregate)
+    METRICS_DB_PATH: str = os.getenv('METRICS_DB_PATH', os.path.join(OUTPUT_DIR, '.metrics.sqlite3'))
+    METRICS_PUBLISH_SECONDS: float = float(os.getenv('METRICS_PUBLISH_SECONDS', '10'))
+    # Metrics of processes that stopped publishing this long ago are dropped
+    METRICS_STALE_SECONDS: float = float(os.getenv('METRICS_STALE_SECONDS', '300'))
+    
+    # Command-Line Configuration (storyboards cli.py generates at the same time)
+    CLI_WORKERS: int = int(os.getenv('CLI_WORKERS', '2'))
+    
+    # Bulk Submission Configuration
+    BULK_MAX_ITEMS: int = int(os.getenv('BULK_MAX_ITEMS', '200'))
+    # Storyboards of one bulk submission generated at the same time
+    BULK_MAX_CONCURRENCY: int = int(os.getenv('BULK_MAX_CONCURRENCY', '2'))
+    
+    # Session Catalog Configuration
+    SESSION_DB_PATH: str = os.getenv('SESSION_DB_PATH', os.path.join(OUTPUT_DIR, '.sessions.sqlite3'))
+    
+    # Output Retention Configuration (TTL, quota or interval <= 0 disables that part)
+    OUTPUT_TTL_SECONDS: float = float(os.getenv('OUTPUT_TTL_SECONDS', str(7 * 24 * 3600)))
+    OUTPUT_QUOTA_BYTES: int = int(os.getenv('OUTPUT_QUOTA_BYTES', '0'))
+    OUTPUT_SWEEP_INTERVAL_SECONDS: float = float(os.getenv('OUTPUT_SWEEP_INTERVAL_SECONDS', '600'))
+    # Sessions used more recently than this are never removed
+    OUTPUT_MIN_IDLE_SECONDS: float = float(os.getenv('OUTPUT_MIN_IDLE_SECONDS', '900'))
+    # Report what would be removed without removing anything
+    OUTPUT_SWEEP_DRY_RUN: bool = os.getenv('OUTPUT_SWEEP_DRY_RUN', 'False').lower() == 'true'
+    
+    # Segmentation Configuration
+    STREAM_SEGMENTATION: bool = os.getenv('STREAM_SEGMENTATION', 'True').lower() == 'true'
+    
+    # Segmentation Cache Configuration (TTL <= 0 disables the cache)
+    SEGMENTATION_CACHE_DIR: str = os.getenv(
+        'SEGMENTATION_CACHE_DIR', os.path.join(OUTPUT_DIR, '.cache', 'segmentation')
+    )
+    SEGMENTATION_CACHE_TTL_SECONDS: float = float(os.getenv('SEGMENTATION_CACHE_TTL_SECONDS', '3600'))
+    SEGMENTATION_CACHE_MEMORY_ENTRIES: int = int(os.getenv('SEGMENTATION_CACHE_MEMORY_ENTRIES', '256'))
+    # Most results kept on disk, oldest removed first (<= 0 only removes expired ones)
+    SEGMENTATION_CACHE_DISK_ENTRIES: int = int(os.getenv('SEGMENTATION_CACHE_DISK_ENTRIES', '10000'))
+    
+    # Image Generation Configuration
+    ANCHOR_PARALLEL_MAX_WORKERS: int = int(os.getenv('ANCHOR_PARALLEL_MAX_WORKERS', '4'))
+    
+    # Image Cache Configuration (max bytes <= 0 disables the cache)
+    IMAGE_CACHE_DIR: str = os.getenv('IMAGE_CACHE_DIR', os.path.join(OUTPUT_DIR, '.cache', 'images'))
+    IMAGE_CACHE_MAX_BYTES: int = int(os.getenv('IMAGE_CACHE_MAX_BYTES', str(1024 * 1024 * 1024)))
+    
+    # Rate Limit Configuration (requests per minute <= 0 disables a limiter)
+    RATE_LIMIT_BACKEND: str = os.getenv('RATE_LIMIT_BACKEND', 'sqlite')
+    RATE_LIMIT_DB_PATH: str = os.getenv('RATE_LIMIT_DB_PATH', os.path.join(OUTPUT_DIR, '.ratelimit.sqlite3'))
+    RATE_LIMIT_MAX_WAIT_SECONDS: float = float(os.getenv('RATE_LIMIT_MAX_WAIT_SECONDS', '300'))
+    TEXT_REQUESTS_PER_MINUTE: float = float(os.getenv('TEXT_REQUESTS_PER_MINUTE', '60'))
+    TEXT_REQUESTS_BURST: float = float(os.getenv('TEXT_REQUESTS_BURST', '5'))
+    IMAGE_REQUESTS_PER_MINUTE: float = float(os.getenv('IMAGE_REQUESTS_PER_MINUTE', '20'))
+    IMAGE_REQUESTS_BURST: float = float(os.getenv('IMAGE_REQUESTS_BURST', '3'))
+    
+    # Model Call Resilience Configuration
+    TEXT_MODEL_TIMEOUT_SECONDS: float = float(os.getenv('TEXT_MODEL_TIMEOUT_SECONDS', '120'))
+    IMAGE_MODEL_TIMEOUT_SECONDS: float = float(os.getenv('IMAGE_MODEL_TIMEOUT_SECONDS', '120'))
+    MODEL_MAX_ATTEMPTS: int = int(os.getenv('MODEL_MAX_ATTEMPTS', '3'))
+    MODEL_BACKOFF_BASE_SECONDS: float = float(os.getenv('MODEL_BACKOFF_BASE_SECONDS', '1'))
+    MODEL_BACKOFF_MAX_SECONDS: float = float(os.getenv('MODEL_BACKOFF_MAX_SECONDS', '20'))
+    # Hedge image calls slower than this latency percentile, e.g. 95 (<= 0 disables hedging)
+    IMAGE_HEDGE_PERCENTILE: float = float(os.getenv('IMAGE_HEDGE_PERCENTILE', '0'))
+    HEDGE_MIN_SAMPLES: int = int(os.getenv('HEDGE_MIN_SAMPLES', '20'))
+    # Consecutive failures that open a circuit (<= 0 disables the circuit breakers)
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+    CIRCUIT_RESET_SECONDS: float = float(os.getenv('CIRCUIT_RESET_SECONDS', '30'))
+    
+    # Model Backend Configuration ('gemini' calls the API, 'fake' answers locally,
+    # 'record' calls the API and saves every response, 'replay' serves saved responses)
+    MODEL_BACKEND: str = os.getenv('MODEL_BACKEND', 'gemini')
+    MODEL_RECORDINGS_DIR: str = os.getenv('MODEL_RECORDINGS_DIR', os.path.join(OUTPUT_DIR, '.recordings'))
+    MODEL_REPLAY_RECORDED_LATENCY: bool = os.getenv('MODEL_REPLAY_RECORDED_LATENCY', 'False').lower() == 'true'
+    # Fake backend latencies in seconds: 'fixed:S', 'uniform:LO,HI', 'normal:MEAN,STDDEV' or 'lognormal:MEDIAN,SIGMA'
+    FAKE_TEXT_LATENCY: str = os.getenv('FAKE_TEXT_LATENCY', 'lognormal:2,0.4')
+    FAKE_IMAGE_LATENCY: str = os.getenv('FAKE_IMAGE_LATENCY', 'lognormal:6,0.4')
+    # Fraction of fake calls failing with FAKE_ERROR_CODE
+    FAKE_ERROR_RATE: float = float(os.getenv('FAKE_ERROR_RATE', '0'))
+    FAKE_ERROR_CODE: int = int(os.getenv('FAKE_ERROR_CODE', '503'))
+    FAKE_IMAGE_SIZE: str = os.getenv('FAKE_IMAGE_SIZE', '1344x768')
+    FAKE_MODEL_SEED: int = int(os.getenv('FAKE_MODEL_SEED', '0'))
 
 
 settings = Settings()
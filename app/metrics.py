@@ -0,0 +1,125 @@
+"""
+Metrics Module
+
+In-process counters, gauges and timing summaries exposed by the metrics endpoint.
+"""
+import threading
+from typing import Any, Dict, Iterable
+
+
+class MetricsRegistry:
+    """Thread-safe registry of named counters, gauges and summaries."""
+    
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict[str, float]] = {}
+    
+    def increment(self, name: str, value: float = 1) -> None:
+        """
+        Add to a counter.
+        
+        Args:
+            name: Counter name (dot-separated, e.g. 'image_cache.hits')
+            value: Amount to add
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+    
+    def set_gauge(self, name: str, value: float) -> None:
+        """
+        Set a gauge to its current value.
+        
+        Args:
+            name: Gauge name
+            value: Current value
+        """
+        with self._lock:
+            self._gauges[name] = value
+    
+    def observe(self, name: str, value: float) -> None:
+        """
+        Record one observation (e.g. a latency in seconds) in a summary.
+        
+        Args:
+            name: Summary name
+            value: Observed value
+        """
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                self._summaries[name] = {
+                    'count': 1,
+                    'sum': value,
+                    'min': value,
+                    'max': value
+                }
+            else:
+                summary['count'] += 1
+                summary['sum'] += value
+                summary['min'] = min(summary['min'], value)
+                summary['max'] = max(summary['max'], value)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get a copy of all current metric values.
+        
+        Returns:
+            Dictionary with 'counters', 'gauges' and 'summaries'
+        """
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'summaries': {
+                    name: dict(summary, mean=summary['sum'] / summary['count'])
+                    for name, summary in self._summaries.items()
+                }
+            }
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine the snapshots of several processes into one.
+    
+    Counters are summed and summaries merged. Gauges report current state,
+    which processes sharing it each observe, so a gauge takes its value
+    from the last snapshot that has it.
+    
+    Args:
+        snapshots: Snapshots as returned by MetricsRegistry.snapshot, oldest first
+    
+    Returns:
+        Dictionary with 'counters', 'gauges' and 'summaries'
+    """
+    counters: Dict[str, float] = {}
+    gauges: Dict[str, float] = {}
+    summaries: Dict[str, Dict[str, float]] = {}
+    for snapshot in snapshots:
+        for name, value in snapshot['counters'].items():
+            counters[name] = counters.get(name, 0) + value
+        gauges.update(snapshot['gauges'])
+        for name, summary in snapshot['summaries'].items():
+            merged = summaries.get(name)
+            if merged is None:
+                summaries[name] = {key: summary[key] for key in ('count', 'sum', 'min', 'max')}
+            else:
+                merged['count'] += summary['count']
+                merged['sum'] += summary['sum']
+                merged['min'] = min(merged['min'], summary['min'])
+                merged['max'] = max(merged['max'], summary['max'])
+    
+    return {
+        'counters': counters,
+        'gauges': gauges,
+        'summaries': {
+            name: dict(summary, mean=summary['sum'] / summary['count'])
+            for name, summary in summaries.items()
+        }
+    }
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
@@ -1,20 +1,31 @@
 """Models package."""
 from app.models.storyboard import (
     StoryboardRequest,
+    StoryboardResumeRequest,
     StoryboardResponse,
     StoryboardGenerationResponse,
     FrameData,
     StoryboardOutput,
     FrameEditRequest,
-    FrameEditResponse
+    FrameEditResponse,
+    FrameEdit,
+    BatchFrameEditRequest,
+    BatchFrameEditResponse
 )
+from app.models.job import JobSubmitResponse, JobStatusResponse
 
 __all__ = [
     'StoryboardRequest',
+    'StoryboardResumeRequest',
     'StoryboardResponse',
     'StoryboardGenerationResponse',
     'FrameData',
     'StoryboardOutput',
     'FrameEditRequest',
-    'FrameEditResponse'
+    'FrameEditResponse',
+    'FrameEdit',
+    'BatchFrameEditRequest',
+    'BatchFrameEditResponse',
+    'JobSubmitResponse',
+    'JobStatusResponse'
 ]
@@ -0,0 +1,62 @@
+"""
+Job Models Module
+
+Pydantic models for background job API responses.
+"""
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
+
+
+class JobSubmitResponse(BaseModel):
+    """Response model returned when a job is queued."""
+    job_id: str = Field(
+        ...,
+        description="Unique identifier of the queued job"
+    )
+    status: str = Field(
+        ...,
+        description="Current job status"
+    )
+    status_url: str = Field(
+        ...,
+        description="URL to poll for the job status"
+    )
+    events_url: str = Field(
+        ...,
+        description="URL streaming the job progress events over SSE"
+    )
+    results_url: Optional[str] = Field(
+        None,
+        description="URL streaming the per-item results of a bulk job as JSONL"
+    )
+
+
+class JobStatusResponse(BaseModel):
+    """Response model for a job status query."""
+    job_id: str
+    kind: str
+    status: str
+    created_at: float
+    updated_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_requested: bool = Field(
+        False,
+        description="Whether the job was asked to stop"
+    )
+    result: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Job result once the job has finished"
+    )
+    error: Optional[str] = Field(
+        None,
+        description="Error message if the job failed"
+    )
+    event_count: int = Field(
+        0,
+        description="Number of progress events recorded so far"
+    )
+    last_event: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Most recent progress event"
+    )
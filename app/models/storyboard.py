@@ -3,8 +3,16 @@ Storyboard Models Module
 
 Pydantic models for storyboard API requests and responses.
 """
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
+from pydantic_core import PydanticCustomError
+from typing import Dict, List, Literal, Optional
+
+
+# How frame images are chained during generation
+GenerationMode = Literal['sequential', 'anchor_parallel']
+
+# How frame images are resampled and compressed in the storyboard PDF
+PDFProfile = Literal['screen', 'print', 'archive']
 
 
 class StoryboardRequest(BaseModel):
@@ -14,6 +22,46 @@ class StoryboardRequest(BaseModel):
         min_length=1, 
         description="Description for storyboard generation"
     )
+    user_id: Optional[str] = Field(
+        None,
+        description="User the storyboard is generated for, used for fair rate limiting"
+    )
+    generation_mode: GenerationMode = Field(
+        'sequential',
+        description=(
+            "'sequential' references each frame's predecessor; 'anchor_parallel' "
+            "generates frame 1 first and all other frames concurrently from it"
+        )
+    )
+    bypass_cache: bool = Field(
+        False,
+        description="Generate fresh images instead of reusing cached ones for identical prompts"
+    )
+    pdf_profile: Optional[PDFProfile] = Field(
+        None,
+        description=(
+            "PDF export profile: 'screen' (small JPEGs), 'print' (300 DPI) or "
+            "'archive' (original images). Defaults to the configured profile."
+        )
+    )
+
+
+class StoryboardResumeRequest(BaseModel):
+    """Request model for resuming an interrupted storyboard generation."""
+    session_id: str = Field(
+        ...,
+        min_length=1,
+        pattern=r'^[A-Za-z0-9-]+$',
+        description="The session ID of the interrupted storyboard"
+    )
+    user_id: Optional[str] = Field(
+        None,
+        description="User the storyboard is generated for, used for fair rate limiting"
+    )
+    bypass_cache: bool = Field(
+        False,
+        description="Generate fresh images instead of reusing cached ones for identical prompts"
+    )
 
 
 class StoryboardResponse(BaseModel):
@@ -41,6 +89,14 @@ class StoryboardGenerationResponse(BaseModel):
         None,
         description="Total number of frames generated"
     )
+    session_id: Optional[str] = Field(
+        None,
+        description="Session ID of the storyboard, also set if generation failed after it started"
+    )
+    timings: Optional[Dict[str, float]] = Field(
+        None,
+        description="Seconds spent in each pipeline stage that ran"
+    )
 
 
 class FrameData(BaseModel):
@@ -76,6 +132,7 @@ class FrameEditRequest(BaseModel):
     session_id: str = Field(
         ...,
         min_length=1,
+        pattern=r'^[A-Za-z0-9-]+$',
         description="The session ID of the storyboard"
     )
     frame_number: int = Field(
@@ -93,6 +150,18 @@ class FrameEditRequest(BaseModel):
         min_length=1,
         description="The original storyboard description for context"
     )
+    user_id: Optional[str] = Field(
+        None,
+        description="User requesting the edit, used for fair rate limiting"
+    )
+    pdf_profile: Optional[PDFProfile] = Field(
+        None,
+        description="Switch the storyboard PDF to this export profile. Defaults to keeping the current one."
+    )
+    cascade: bool = Field(
+        False,
+        description="Regenerate the frames after the edited one from it, so they match it again"
+    )
 
 
 class FrameEditResponse(BaseModel):
@@ -117,3 +186,83 @@ class FrameEditResponse(BaseModel):
         None,
         description="Whether the PDF was regenerated"
     )
+    cascade_job_id: Optional[str] = Field(
+        None,
+        description="Job regenerating the following frames, if a cascade was requested"
+    )
+
+
+class FrameEdit(BaseModel):
+    """Edit instructions for one frame of a batch edit."""
+    frame_number: int = Field(
+        ...,
+        ge=1,
+        description="The frame number to edit (1-based)"
+    )
+    edit_instructions: str = Field(
+        ...,
+        min_length=1,
+        description="Instructions for how to edit the frame"
+    )
+
+
+class BatchFrameEditRequest(BaseModel):
+    """Request model for editing several frames of a storyboard at once."""
+    session_id: str = Field(
+        ...,
+        min_length=1,
+        pattern=r'^[A-Za-z0-9-]+$',
+        description="The session ID of the storyboard"
+    )
+    edits: List[FrameEdit] = Field(
+        ...,
+        min_length=1,
+        max_length=10,
+        description="Edits to apply, at most one per frame"
+    )
+    storyboard_context: str = Field(
+        ...,
+        min_length=1,
+        description="The original storyboard description for context"
+    )
+    user_id: Optional[str] = Field(
+        None,
+        description="User requesting the edits, used for fair rate limiting"
+    )
+    pdf_profile: Optional[PDFProfile] = Field(
+        None,
+        description="Switch the storyboard PDF to this export profile. Defaults to keeping the current one."
+    )
+    
+    @field_validator('edits')
+    @classmethod
+    def one_edit_per_frame(cls, edits: List[FrameEdit]) -> List[FrameEdit]:
+        """Reject batches that edit the same frame twice."""
+        frame_numbers = [edit.frame_number for edit in edits]
+        if len(set(frame_numbers)) != len(frame_numbers):
+            raise PydanticCustomError('duplicate_frame', "Each frame can only be edited once per batch")
+        return edits
+
+
+class BatchFrameEditResponse(BaseModel):
+    """Response model for a batch frame edit."""
+    success: bool = Field(
+        ...,
+        description="Whether every frame edit was applied"
+    )
+    message: str = Field(
+        ...,
+        description="Status message"
+    )
+    frame_numbers: List[int] = Field(
+        default_factory=list,
+        description="The frame numbers that were edited"
+    )
+    image_paths: List[str] = Field(
+        default_factory=list,
+        description="Paths to the edited frame images"
+    )
+    storyboard_path: Optional[str] = Field(
+        None,
+        description="Path to the storyboard PDF, rendered once with every edit"
+    )
@@ -2,5 +2,8 @@
 from app.routes.health import health_bp
 from app.routes.storyboard import storyboard_bp
 from app.routes.storyboard_stream import storyboard_stream_bp
+from app.routes.jobs import jobs_bp
+from app.routes.output import output_bp
+from app.routes.sessions import sessions_bp
 
-__all__ = ['health_bp', 'storyboard_bp', 'storyboard_stream_bp']
+__all__ = ['health_bp', 'storyboard_bp', 'storyboard_stream_bp', 'jobs_bp', 'output_bp', 'sessions_bp']
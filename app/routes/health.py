@@ -3,9 +3,11 @@ Health Check Route
 
 Provides application health status endpoint.
 """
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify
 from datetime import datetime
 from app.config import settings
+from app.agents.image_cache import image_cache
+from app.metrics import metrics
 
 health_bp = Blueprint('health', __name__)
 
@@ -23,3 +25,25 @@ def health_check():
         'timestamp': datetime.utcnow().isoformat(),
         'service': settings.SERVICE_NAME
     }), 200
+
+
+@health_bp.route('/metrics')
+def metrics_snapshot():
+    """
+    Metrics endpoint.
+    
+    Counters and summaries are added up over every process publishing to
+    the metrics store (the web workers and the job worker), each as of its
+    last publication; this process's are current.
+    
+    Returns:
+        JSON response with the aggregated counters, gauges and summaries,
+        and the processes they came from
+    """
+    cache_stats = image_cache.stats()
+    metrics.set_gauge('image_cache.entries', cache_stats['entries'])
+    metrics.set_gauge('image_cache.bytes', cache_stats['bytes'])
+    
+    metrics_publisher = current_app.extensions['metrics_publisher']
+    metrics_publisher.publish()
+    return jsonify(metrics_publisher.store.aggregate()), 200
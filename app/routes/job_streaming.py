@@ -0,0 +1,201 @@
+"""
+Job Streaming Helpers
+
+Utilities for following background jobs from request handlers.
+
+Handlers only poll the job store and sleep between polls, so under a
+cooperative server (gunicorn with gevent workers) a waiting request or an
+open progress stream costs a greenlet instead of a thread.
+"""
+import json
+import time
+from typing import Any, Dict, Generator, Iterator, Optional, Tuple
+from flask import Response, jsonify, stream_with_context, url_for
+from app.services import JobStatus, JobStore
+from app.config import settings
+
+
+class JobWaitTimeoutError(Exception):
+    """Raised when a job hasn't finished within the time a request waits for it."""
+    
+    def __init__(self, job: Dict[str, Any], timeout_seconds: float):
+        """
+        Initialize the error.
+        
+        Args:
+            job: The job dictionary as last seen
+            timeout_seconds: How long the request waited
+        """
+        super().__init__(f"Job {job['job_id']} is still {job['status']} after {timeout_seconds:g}s")
+        self.job = job
+
+
+def job_event_stream(
+    store: JobStore,
+    job_id: str,
+    after_seq: int = 0
+) -> Generator[str, None, None]:
+    """
+    Follow a job's progress events as Server-Sent Events.
+    
+    Args:
+        store: The job store
+        job_id: The job to follow
+        after_seq: Skip events up to and including this sequence number
+    
+    Yields:
+        SSE messages with the event sequence number as the message ID, and
+        keep-alive comments while the job is idle. Ends once the job has
+        finished and all of its events have been sent.
+    """
+    last_seq = after_seq
+    last_sent = time.monotonic()
+    
+    while True:
+        for record in store.list_events(job_id, after_seq=last_seq):
+            last_seq = record['seq']
+            last_sent = time.monotonic()
+            yield f"id: {last_seq}\ndata: {json.dumps(record['event'])}\n\n"
+        
+        job = store.get_job(job_id)
+        if job['status'] in JobStatus.TERMINAL and job['event_count'] <= last_seq:
+            break
+        
+        # Comment lines keep idle connections open through proxies
+        if time.monotonic() - last_sent >= settings.JOB_EVENTS_KEEPALIVE_SECONDS:
+            last_sent = time.monotonic()
+            yield ": keep-alive\n\n"
+        
+        time.sleep(settings.JOB_EVENTS_POLL_SECONDS)
+
+
+def job_results_stream(store: JobStore, job_id: str) -> Generator[str, None, None]:
+    """
+    Follow a bulk job's per-item results as JSON Lines.
+    
+    Args:
+        store: The job store
+        job_id: The bulk job to follow
+    
+    Yields:
+        One JSON line per finished item, in the order they finished, and
+        empty lines as keep-alives while no item finishes. Ends once the
+        job has finished and every result has been sent.
+    """
+    last_seq = 0
+    last_sent = time.monotonic()
+    
+    while True:
+        for record in store.list_events(job_id, after_seq=last_seq):
+            last_seq = record['seq']
+            if record['event']['type'] == 'item_complete':
+                last_sent = time.monotonic()
+                result = {key: value for key, value in record['event'].items() if key != 'type'}
+                yield json.dumps(result) + "\n"
+        
+        job = store.get_job(job_id)
+        if job['status'] in JobStatus.TERMINAL and job['event_count'] <= last_seq:
+            break
+        
+        if time.monotonic() - last_sent >= settings.JOB_EVENTS_KEEPALIVE_SECONDS:
+            last_sent = time.monotonic()
+            yield "\n"
+        
+        time.sleep(settings.JOB_EVENTS_POLL_SECONDS)
+
+
+def event_stream_response(stream: Iterator[str]) -> Response:
+    """
+    Wrap SSE messages in a streaming response.
+    
+    Args:
+        stream: Iterator of formatted SSE messages
+    
+    Returns:
+        Response streaming the messages
+    """
+    return Response(
+        stream_with_context(stream),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
+def jsonl_stream_response(stream: Iterator[str], headers: Dict[str, str] = None) -> Response:
+    """
+    Wrap JSON Lines in a streaming response.
+    
+    Args:
+        stream: Iterator of JSON lines
+        headers: Extra response headers
+    
+    Returns:
+        Response streaming the lines
+    """
+    return Response(
+        stream_with_context(stream),
+        mimetype='application/x-ndjson',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+            **(headers or {})
+        }
+    )
+
+
+def wait_for_job(store: JobStore, job_id: str, timeout_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Wait until a job has finished.
+    
+    Args:
+        store: The job store
+        job_id: The job to wait for
+        timeout_seconds: Longest time to wait. Defaults to configured timeout.
+    
+    Returns:
+        The job dictionary in its terminal state
+    
+    Raises:
+        JobWaitTimeoutError: If the job hasn't finished in time. It keeps
+            running (or queued) and can still be followed.
+    """
+    if timeout_seconds is None:
+        timeout_seconds = settings.JOB_WAIT_TIMEOUT_SECONDS
+    deadline = time.monotonic() + timeout_seconds
+    
+    while True:
+        job = store.get_job(job_id)
+        if job['status'] in JobStatus.TERMINAL:
+            return job
+        if time.monotonic() >= deadline:
+            raise JobWaitTimeoutError(job, timeout_seconds)
+        time.sleep(settings.JOB_EVENTS_POLL_SECONDS)
+
+
+def job_wait_timeout_response(error: JobWaitTimeoutError) -> Tuple[Response, int]:
+    """
+    Build the response to a request that gave up waiting for its job.
+    
+    A job nobody started suggests no job worker is running (503); a job
+    still running just took too long (504). Either way the job is left in
+    place and its status URL is returned.
+    
+    Args:
+        error: The timeout
+    
+    Returns:
+        Tuple of the JSON response and its status code
+    """
+    job = error.job
+    status_code = 503 if job['status'] == JobStatus.QUEUED else 504
+    return jsonify({
+        'success': False,
+        'error': str(error),
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'status_url': url_for('jobs.get_job', job_id=job['job_id'])
+    }), status_code
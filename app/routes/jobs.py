@@ -0,0 +1,299 @@
+"""
+Job Routes
+
+API endpoints for submitting background jobs and querying their progress.
+"""
+from flask import Blueprint, jsonify, request, url_for
+from pydantic import ValidationError
+
+from app.models import (
+    StoryboardRequest,
+    StoryboardResumeRequest,
+    FrameEditRequest,
+    BatchFrameEditRequest,
+    JobSubmitResponse,
+    JobStatusResponse
+)
+from app.services import GenerationCheckpoint, JobStatus
+from app.routes.job_streaming import (
+    event_stream_response,
+    job_event_stream,
+    job_results_stream,
+    jsonl_stream_response
+)
+from app.routes.request_context import get_job_queue, read_bulk_storyboard_requests, resolve_user_id
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+
+def _submitted(job_id: str, results_url: str = None):
+    """Build the 202 response for a newly queued job."""
+    response = JobSubmitResponse(
+        job_id=job_id,
+        status=JobStatus.QUEUED,
+        status_url=url_for('jobs.get_job', job_id=job_id),
+        events_url=url_for('jobs.stream_job_events', job_id=job_id),
+        results_url=results_url
+    )
+    return jsonify(response.model_dump()), 202
+
+
+@jobs_bp.route('/storyboard', methods=['POST'])
+def submit_storyboard():
+    """
+    Queue a complete storyboard generation.
+    
+    Request Body:
+        user_description (str): The text description of the video sequence
+        generation_mode (str, optional): 'sequential' (default) or 'anchor_parallel'
+        bypass_cache (bool, optional): Generate fresh images instead of reusing cached ones
+        pdf_profile (str, optional): PDF export profile: 'screen', 'print' or 'archive'
+    
+    Returns:
+        202 JSON response with the job ID and status URLs
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'Request body is required'}), 400
+        
+        storyboard_request = StoryboardRequest(**data)
+        storyboard_request.user_id = resolve_user_id(storyboard_request.user_id)
+        job_id = get_job_queue().submit_storyboard(storyboard_request)
+        return _submitted(job_id)
+    
+    except ValidationError as e:
+        return jsonify({
+            'error': 'Validation error',
+            'details': e.errors()
+        }), 400
+
+
+@jobs_bp.route('/storyboard/resume', methods=['POST'])
+def submit_storyboard_resume():
+    """
+    Queue the continuation of an interrupted storyboard generation.
+    
+    Frames that were already generated are kept; generation continues from
+    the first missing frame. The session ID is reported in the progress
+    events and in the result of a failed storyboard job.
+    
+    Request Body:
+        session_id (str): The session ID of the interrupted storyboard
+        bypass_cache (bool, optional): Generate fresh images instead of reusing cached ones
+    
+    Returns:
+        202 JSON response with the job ID and status URLs
+    
+    Raises:
+        404: If the session has no checkpoint
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'Request body is required'}), 400
+        
+        resume_request = StoryboardResumeRequest(**data)
+        resume_request.user_id = resolve_user_id(resume_request.user_id)
+        if not GenerationCheckpoint(resume_request.session_id).exists():
+            return jsonify({'error': f'No checkpoint found for session {resume_request.session_id}'}), 404
+        
+        job_id = get_job_queue().submit_storyboard_resume(resume_request)
+        return _submitted(job_id)
+    
+    except ValidationError as e:
+        return jsonify({
+            'error': 'Validation error',
+            'details': e.errors()
+        }), 400
+
+
+@jobs_bp.route('/edit-frame', methods=['POST'])
+def submit_frame_edit():
+    """
+    Queue a single frame edit.
+    
+    Request Body:
+        session_id (str): The session ID of the storyboard
+        frame_number (int): The frame number to edit (1-based)
+        edit_instructions (str): Instructions for how to edit the frame
+        storyboard_context (str): The original storyboard description for context
+        pdf_profile (str, optional): Switch the storyboard PDF to this export profile
+    
+    Returns:
+        202 JSON response with the job ID and status URLs
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'Request body is required'}), 400
+        
+        edit_request = FrameEditRequest(**data)
+        edit_request.user_id = resolve_user_id(edit_request.user_id)
+        job_id = get_job_queue().submit_frame_edit(edit_request)
+        return _submitted(job_id)
+    
+    except ValidationError as e:
+        return jsonify({
+            'error': 'Validation error',
+            'details': e.errors()
+        }), 400
+
+
+@jobs_bp.route('/edit-frames', methods=['POST'])
+def submit_batch_edit():
+    """
+    Queue edits of several frames of one storyboard.
+    
+    The edits run concurrently, the edited frames replace the originals
+    together (or not at all if any edit fails), and the PDF is rendered
+    once at the end.
+    
+    Request Body:
+        session_id (str): The session ID of the storyboard
+        edits (list): Objects with frame_number and edit_instructions, one per frame
+        storyboard_context (str): The original storyboard description for context
+        pdf_profile (str, optional): Switch the storyboard PDF to this export profile
+    
+    Returns:
+        202 JSON response with the job ID and status URLs
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'Request body is required'}), 400
+        
+        batch_request = BatchFrameEditRequest(**data)
+        batch_request.user_id = resolve_user_id(batch_request.user_id)
+        job_id = get_job_queue().submit_batch_edit(batch_request)
+        return _submitted(job_id)
+    
+    except ValidationError as e:
+        return jsonify({
+            'error': 'Validation error',
+            'details': e.errors()
+        }), 400
+
+
+@jobs_bp.route('/bulk', methods=['POST'])
+def submit_bulk():
+    """
+    Queue generating several storyboards from a JSON Lines upload.
+    
+    The storyboards are generated BULK_MAX_CONCURRENCY at a time, and each
+    one's result is recorded as soon as it finishes. Cancelling the job
+    skips the storyboards that haven't started.
+    
+    Request Body:
+        JSON Lines, as the raw body or a multipart 'file' field, with one
+        storyboard request (user_description, generation_mode, bypass_cache,
+        pdf_profile) per line
+    
+    Returns:
+        202 JSON response with the job ID, status URLs and the URL of the
+        JSON Lines results feed
+    """
+    storyboard_requests, errors = read_bulk_storyboard_requests()
+    if errors:
+        return jsonify({
+            'error': 'Invalid bulk upload',
+            'details': errors
+        }), 400
+    
+    job_id = get_job_queue().submit_bulk(storyboard_requests)
+    return _submitted(job_id, results_url=url_for('jobs.stream_job_results', job_id=job_id))
+
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Get the status of a job.
+    
+    Returns:
+        JSON response with job status, last progress event and result
+    
+    Raises:
+        404: If the job doesn't exist
+    """
+    job = get_job_queue().store.get_job(job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    
+    response = JobStatusResponse(**job)
+    return jsonify(response.model_dump())
+
+
+@jobs_bp.route('/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """
+    Stream a job's progress events with Server-Sent Events.
+    
+    Events already recorded are replayed first, so clients can reconnect at
+    any time; the `Last-Event-ID` header or `after` query parameter skips
+    events the client has already seen. The stream ends once the job has
+    finished and all of its events have been sent.
+    
+    Returns:
+        Server-Sent Events stream of job progress events
+    """
+    store = get_job_queue().store
+    if store.get_job(job_id) is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    
+    after_seq = request.headers.get('Last-Event-ID') or request.args.get('after', '0')
+    try:
+        after_seq = int(after_seq)
+    except ValueError:
+        after_seq = 0
+    
+    return event_stream_response(job_event_stream(store, job_id, after_seq))
+
+
+@jobs_bp.route('/<job_id>/results', methods=['GET'])
+def stream_job_results(job_id):
+    """
+    Stream a bulk job's per-item results as JSON Lines.
+    
+    Each line describes one storyboard as it finishes: its 'index' in the
+    upload, 'status' ('succeeded', 'failed' or 'cancelled'), 'session_id',
+    'storyboard_path', 'error', and timings ('queued_seconds' before it
+    started, 'duration_seconds' to generate). Results already recorded are
+    sent first. Empty lines are keep-alives. The stream ends once the job
+    has finished.
+    
+    Returns:
+        JSON Lines stream of item results
+    """
+    store = get_job_queue().store
+    if store.get_job(job_id) is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    
+    return jsonl_stream_response(job_results_stream(store, job_id))
+
+
+@jobs_bp.route('/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Cancel a job.
+    
+    A queued job is cancelled at once. A running job is asked to stop:
+    bulk jobs skip their storyboards that haven't started, cascades stop
+    before their next frame; other jobs run to completion.
+    
+    Returns:
+        202 JSON response with the job status
+    
+    Raises:
+        404: If the job doesn't exist
+        409: If the job has already finished
+    """
+    job_queue = get_job_queue()
+    job = job_queue.store.get_job(job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    if job['status'] in JobStatus.TERMINAL:
+        return jsonify({'error': f"Job {job_id} has already finished ({job['status']})"}), 409
+    
+    job_queue.cancel(job_id)
+    response = JobStatusResponse(**job_queue.store.get_job(job_id))
+    return jsonify(response.model_dump()), 202
@@ -0,0 +1,191 @@
+"""
+Output Routes
+
+Serving of generated frames, frame derivatives and storyboard PDFs.
+"""
+import os
+import re
+from typing import Any, Dict, Optional
+from flask import Blueprint, abort, jsonify, make_response, request, send_from_directory, url_for
+from werkzeug.utils import safe_join
+
+from app.services import GenerationCheckpoint, JobStatus
+from app.services.derivatives import frame_derivatives
+from app.services.file_versions import file_versions
+from app.services.session_catalog import session_catalog
+from app.routes.job_streaming import JobWaitTimeoutError, job_wait_timeout_response, wait_for_job
+from app.routes.request_context import SESSION_ID_PATTERN, get_job_queue, get_registry
+from app.config import settings
+
+output_bp = Blueprint('output', __name__)
+
+# Session PDF paths below /output that are rendered on demand
+STORYBOARD_PDF_PATTERN = re.compile(r'^([A-Za-z0-9-]+)/storyboard\.pdf$')
+
+# Frame derivative paths below /output, rendered again if missing or stale
+DERIVATIVE_PATTERN = re.compile(r'^([A-Za-z0-9-]+)/derived/(frame_\d{3})_(thumb|web)\.webp$')
+
+# Cache policy of URLs whose ?v= matches the content they serve
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+@output_bp.route('/output/<path:filename>')
+def serve_output(filename):
+    """
+    Serve a generated file.
+    
+    Every file is served with its content version as a strong ETag, so
+    clients revalidate with If-None-Match and get a 304 while it is
+    unchanged, and byte ranges are honoured. A URL whose ?v= matches the
+    current version can never change content and is marked immutable;
+    any other URL must be revalidated before reuse.
+    
+    Query Parameters:
+        v (str, optional): Content version the URL was built for
+    
+    Returns:
+        The file, a 206 partial response or a 304
+    
+    Raises:
+        404: If the file doesn't exist or is internal (dotted path segments)
+        500: If rendering the storyboard PDF fails
+        503/504: If the storyboard PDF wasn't rendered in time
+    """
+    if any(part.startswith('.') for part in filename.split('/')):
+        abort(404)
+    
+    output_dir = os.path.abspath(settings.OUTPUT_DIR)
+    version = _prepare_output(output_dir, filename)
+    if version is None:
+        abort(404)
+    
+    # Downloads keep a session from being swept as least recently used
+    session_id = filename.split('/', 1)[0]
+    if SESSION_ID_PATTERN.match(session_id):
+        session_catalog.record_access(session_id)
+    
+    response = send_from_directory(output_dir, filename, etag=version, conditional=True)
+    
+    if request.args.get('v') == version:
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def session_assets(session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Build the versioned URLs of a session's frames, derivatives and PDF.
+    
+    Args:
+        session_id: The storyboard session ID
+    
+    Returns:
+        Dictionary with 'frames' (frame number, image, thumbnail and web
+        URLs) and 'pdf_url' (None until the storyboard is complete), or
+        None if the session has no storyboard
+    """
+    storyboard = GenerationCheckpoint(session_id).load_storyboard()
+    if storyboard is None:
+        return None
+    
+    frames = []
+    for frame in storyboard.frames:
+        frame_file = f"frame_{frame.frame_number:03d}.png"
+        frame_path = os.path.join(settings.OUTPUT_DIR, session_id, frame_file)
+        try:
+            image_version = file_versions.version(frame_path)
+        except FileNotFoundError:
+            continue
+        
+        frame_assets = {
+            'frame_number': frame.frame_number,
+            'image_url': _versioned_url(f"{session_id}/{frame_file}", image_version)
+        }
+        for kind in frame_derivatives.KINDS:
+            derivative_file = os.path.relpath(
+                frame_derivatives.derivative_path(frame_path, kind),
+                settings.OUTPUT_DIR
+            ).replace(os.sep, '/')
+            frame_assets[f"{kind}_url"] = _versioned_url(
+                derivative_file,
+                _derivative_version(file_versions.digest(frame_path), kind)
+            )
+        frames.append(frame_assets)
+    
+    try:
+        pdf_version = get_registry().pdf_generator.storyboard_pdf_version(session_id)
+        pdf_url = _versioned_url(f"{session_id}/storyboard.pdf", pdf_version[:file_versions.VERSION_LENGTH])
+    except FileNotFoundError:
+        pdf_url = None
+    
+    return {
+        'session_id': session_id,
+        'frames': frames,
+        'pdf_url': pdf_url
+    }
+
+
+def _prepare_output(output_dir: str, filename: str) -> Optional[str]:
+    """
+    Bring a derived output file up to date and get its content version.
+    
+    Args:
+        output_dir: Absolute output directory
+        filename: Path of the file below the output directory
+    
+    Returns:
+        The content version, or None if the file doesn't exist
+    """
+    # Thumbnails and web-sized frames are rendered again if missing or stale
+    derivative_match = DERIVATIVE_PATTERN.match(filename)
+    if derivative_match:
+        session_id, frame_name, kind = derivative_match.groups()
+        frame_path = os.path.join(output_dir, session_id, f"{frame_name}.png")
+        try:
+            # Versioned by the content it was rendered from, which is what it serves
+            return _derivative_version(frame_derivatives.ensure(frame_path, kind), kind)
+        except FileNotFoundError:
+            return None
+    
+    # Storyboard PDFs are rendered on first download and whenever frames change
+    pdf_match = STORYBOARD_PDF_PATTERN.match(filename)
+    if pdf_match:
+        session_id = pdf_match.group(1)
+        pdf_generator = get_registry().pdf_generator
+        try:
+            pdf_version = pdf_generator.storyboard_pdf_version(session_id)
+        except FileNotFoundError:
+            return None
+        
+        if not pdf_generator.is_storyboard_pdf_current(session_id, version=pdf_version):
+            job_queue = get_job_queue()
+            try:
+                job = wait_for_job(job_queue.store, job_queue.submit_pdf_render(session_id))
+            except JobWaitTimeoutError as e:
+                abort(make_response(job_wait_timeout_response(e)))
+            if job['status'] != JobStatus.SUCCEEDED:
+                error_response = jsonify({'error': job['error']})
+                error_response.status_code = 500
+                abort(error_response)
+        return pdf_version[:file_versions.VERSION_LENGTH]
+    
+    path = safe_join(output_dir, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    return file_versions.version(path)
+
+
+def _derivative_version(frame_digest: bytes, kind: str) -> str:
+    """Version a derivative by the frame content and the settings it is rendered with."""
+    return file_versions.version_of_digest(
+        frame_digest,
+        kind,
+        frame_derivatives.KINDS[kind],
+        settings.WEBP_QUALITY
+    )
+
+
+def _versioned_url(filename: str, version: str) -> str:
+    """Build the immutable URL of an output file at a content version."""
+    return url_for('output.serve_output', filename=filename, v=version)
@@ -0,0 +1,110 @@
+"""
+Request Context Helpers
+
+Utilities for deriving per-request context shared by several blueprints.
+"""
+import re
+import json
+from typing import Any, Dict, List, Tuple
+from flask import current_app, request
+from pydantic import ValidationError
+from app.config import settings
+from app.models import StoryboardRequest
+from app.services import JobQueue, ServiceRegistry
+from app.services.output_sweeper import OutputSweeper
+
+# Header set by the reverse proxy to the authenticated user name
+USER_ID_HEADER = 'X-Forwarded-User'
+
+# Session IDs are generated UUIDs; anything else never names a session directory
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9-]+$')
+
+
+def resolve_user_id(requested_user_id: str = None) -> str:
+    """
+    Determine which user a request is made for.
+    
+    The authenticated user forwarded by the proxy wins over any value in the
+    request body, so callers cannot jump the fair scheduling queue by
+    claiming another identity.
+    
+    Args:
+        requested_user_id: User ID given in the request body, if any
+    
+    Returns:
+        The user ID to schedule the work under
+    """
+    return (
+        request.headers.get(USER_ID_HEADER)
+        or requested_user_id
+        or settings.DEFAULT_USER_ID
+    )
+
+
+def read_bulk_storyboard_requests() -> Tuple[List[StoryboardRequest], List[Dict[str, Any]]]:
+    """
+    Parse a JSON Lines upload of storyboard requests.
+    
+    The upload is either the raw request body or a multipart file field
+    named 'file', with one StoryboardRequest object per line. Blank lines
+    are skipped. Every request's user is resolved like a single submission.
+    
+    Returns:
+        The valid requests in upload order, and one error per invalid line
+        (with its 1-based 'line' number and 'error' message). Callers
+        should reject the upload if there are any errors.
+    """
+    upload = request.files.get('file')
+    text = upload.read().decode('utf-8', errors='replace') if upload else request.get_data(as_text=True)
+    
+    storyboard_requests = []
+    errors = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            storyboard_request = StoryboardRequest(**json.loads(line))
+        except (json.JSONDecodeError, TypeError) as e:
+            errors.append({'line': line_number, 'error': f'Invalid JSON object: {e}'})
+            continue
+        except ValidationError as e:
+            errors.append({'line': line_number, 'error': 'Validation error', 'details': e.errors()})
+            continue
+        storyboard_request.user_id = resolve_user_id(storyboard_request.user_id)
+        storyboard_requests.append(storyboard_request)
+    
+    if not storyboard_requests and not errors:
+        errors.append({'line': 0, 'error': 'The upload contains no storyboard requests'})
+    elif len(storyboard_requests) + len(errors) > settings.BULK_MAX_ITEMS:
+        errors.append({'line': 0, 'error': f'At most {settings.BULK_MAX_ITEMS} storyboards per upload'})
+    return storyboard_requests, errors
+
+
+def get_registry() -> ServiceRegistry:
+    """
+    Get the application's shared service registry.
+    
+    Returns:
+        The ServiceRegistry created by the application factory
+    """
+    return current_app.extensions['registry']
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Get the application's background job queue.
+    
+    Returns:
+        The JobQueue created by the application factory
+    """
+    return current_app.extensions['job_queue']
+
+
+def get_output_sweeper() -> OutputSweeper:
+    """
+    Get the application's output sweeper.
+    
+    Returns:
+        The OutputSweeper created by the application factory
+    """
+    return current_app.extensions['output_sweeper']
@@ -0,0 +1,72 @@
+"""
+Session Routes
+
+API endpoints for browsing the storyboard session catalog.
+"""
+from flask import Blueprint, jsonify, request
+
+from app.services.session_catalog import session_catalog
+from app.routes.request_context import SESSION_ID_PATTERN, get_output_sweeper
+
+sessions_bp = Blueprint('sessions', __name__, url_prefix='/sessions')
+
+
+@sessions_bp.route('', methods=['GET'])
+def list_sessions():
+    """
+    List storyboard sessions, newest first.
+    
+    Query Parameters:
+        limit (int, optional): Sessions per page, 1-100 (default 20)
+        cursor (str, optional): The next_cursor of the previous page
+    
+    Returns:
+        JSON with 'sessions' and 'next_cursor' (null on the last page)
+    """
+    limit = request.args.get('limit', 20, type=int)
+    try:
+        sessions, next_cursor = session_catalog.list_sessions(
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'sessions': sessions,
+        'next_cursor': next_cursor
+    })
+
+
+@sessions_bp.route('/sweep-report', methods=['GET'])
+def sweep_report():
+    """
+    Report what a sweep of the output directory would remove, without removing it.
+    
+    Returns:
+        JSON sweep report with 'removed' (session_id, bytes, reason,
+        last_used_at), 'bytes_reclaimed', 'in_flight', 'session_bytes' and
+        'jobs_pruned'
+    """
+    return jsonify(get_output_sweeper().sweep(dry_run=True))
+
+
+@sessions_bp.route('/<session_id>', methods=['GET'])
+def get_session(session_id):
+    """
+    Get a storyboard session with its frames.
+    
+    Returns:
+        JSON session with 'frames' (frame_number, description, sha256, updated_at)
+    
+    Raises:
+        404: If the session isn't in the catalog
+    """
+    if not SESSION_ID_PATTERN.match(session_id):
+        return jsonify({'error': 'Invalid session ID'}), 400
+    
+    session = session_catalog.get_session(session_id)
+    if session is None:
+        return jsonify({'error': f'Session {session_id} not found'}), 404
+    
+    return jsonify(session)
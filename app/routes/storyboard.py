@@ -6,8 +6,11 @@ API endpoints for storyboard generation.
 from flask import Blueprint, jsonify, request
 from pydantic import ValidationError
 
-from app.models import StoryboardRequest
-from app.services import StoryboardService
+from app.models import StoryboardRequest, StoryboardGenerationResponse
+from app.services import JobStatus
+from app.routes.job_streaming import JobWaitTimeoutError, job_wait_timeout_response, wait_for_job
+from app.routes.output import session_assets
+from app.routes.request_context import SESSION_ID_PATTERN, get_job_queue, resolve_user_id
 
 storyboard_bp = Blueprint('storyboard', __name__, url_prefix='/storyboard')
 
@@ -19,6 +22,9 @@ def generate_storyboard():
     
     Request Body:
         user_description (str): The text description of the video sequence
+        generation_mode (str, optional): 'sequential' (default) or 'anchor_parallel'
+        bypass_cache (bool, optional): Generate fresh images instead of reusing cached ones
+        pdf_profile (str, optional): PDF export profile: 'screen', 'print' or 'archive'
     
     Returns:
         JSON response with generation status and PDF path
@@ -26,6 +32,8 @@ def generate_storyboard():
     Raises:
         400: If request validation fails
         500: If storyboard generation fails
+        503: If no job worker started the job in time
+        504: If the job didn't finish in time
     """
     try:
         # Parse and validate request body
@@ -35,12 +43,22 @@ def generate_storyboard():
         
         # Validate using Pydantic model
         storyboard_request = StoryboardRequest(**data)
+        storyboard_request.user_id = resolve_user_id(storyboard_request.user_id)
         
-        # Generate complete storyboard using service
-        service = StoryboardService()
-        response = service.generate_complete_storyboard(
-            storyboard_request.user_description
-        )
+        # Generate complete storyboard on the job queue and wait for it
+        job_queue = get_job_queue()
+        job_id = job_queue.submit_storyboard(storyboard_request)
+        job = wait_for_job(job_queue.store, job_id)
+        
+        if job['status'] == JobStatus.SUCCEEDED:
+            response = StoryboardGenerationResponse(**job['result'])
+        else:
+            response = StoryboardGenerationResponse(
+                success=False,
+                message=job['error'],
+                storyboard_path=None,
+                total_frames=None
+            )
         
         # Return response based on success
         status_code = 200 if response.success else 500
@@ -52,8 +70,39 @@ def generate_storyboard():
             'details': e.errors()
         }), 400
     
+    except JobWaitTimeoutError as e:
+        return job_wait_timeout_response(e)
+    
     except (ValueError, TypeError, KeyError) as e:
         return jsonify({'error': f'Invalid request: {str(e)}'}), 400
     
     except (IOError, OSError) as e:
         return jsonify({'error': f'Service error: {str(e)}'}), 500
+
+
+@storyboard_bp.route('/<session_id>/assets', methods=['GET'])
+def get_storyboard_assets(session_id):
+    """
+    Get the versioned URLs of a storyboard's frames, thumbnails and PDF.
+    
+    The URLs change whenever the content they point to does (e.g. after a
+    frame edit), so clients can cache them forever and fetch this listing
+    again to pick up changes.
+    
+    Returns:
+        JSON with 'frames' (frame_number, image_url, thumb_url, web_url)
+        and 'pdf_url' (null until every frame exists)
+    
+    Raises:
+        404: If the session has no storyboard
+    """
+    if not SESSION_ID_PATTERN.match(session_id):
+        return jsonify({'error': 'Invalid session ID'}), 400
+    
+    assets = session_assets(session_id)
+    if assets is None:
+        return jsonify({'error': f'No storyboard found for session {session_id}'}), 404
+    
+    response = jsonify(assets)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -3,12 +3,23 @@ Storyboard Streaming Routes
 
 API endpoints for storyboard generation with real-time progress streaming.
 """
+import os
 import json
-from flask import Blueprint, Response, request, stream_with_context, jsonify
+from flask import Blueprint, Response, request, jsonify
 from pydantic import ValidationError
 
-from app.models import StoryboardRequest, FrameEditRequest, FrameEditResponse
-from app.services import StreamingStoryboardService, ImageGenerationService, PDFGenerator
+from app.models import StoryboardRequest, FrameEditRequest, BatchFrameEditRequest
+from app.services import ImageGenerationService, JobStatus
+from app.routes.job_streaming import (
+    JobWaitTimeoutError,
+    event_stream_response,
+    job_event_stream,
+    job_results_stream,
+    jsonl_stream_response,
+    job_wait_timeout_response,
+    wait_for_job
+)
+from app.routes.request_context import get_job_queue, read_bulk_storyboard_requests, resolve_user_id
 
 storyboard_stream_bp = Blueprint('storyboard_stream', __name__, url_prefix='/storyboard')
 
@@ -20,6 +31,9 @@ def generate_storyboard_stream():
     
     Request Body:
         user_description (str): The text description of the video sequence
+        generation_mode (str, optional): 'sequential' (default) or 'anchor_parallel'
+        bypass_cache (bool, optional): Generate fresh images instead of reusing cached ones
+        pdf_profile (str, optional): PDF export profile: 'screen', 'print' or 'archive'
     
     Returns:
         Server-Sent Events stream with progress updates and final result
@@ -35,24 +49,12 @@ def generate_storyboard_stream():
         
         # Validate using Pydantic model
         storyboard_request = StoryboardRequest(**data)
+        storyboard_request.user_id = resolve_user_id(storyboard_request.user_id)
         
-        def generate():
-            service = StreamingStoryboardService()
-            
-            for event in service.generate_complete_storyboard_stream(
-                storyboard_request.user_description
-            ):
-                yield f"data: {json.dumps(event)}\n\n"
-        
-        return Response(
-            stream_with_context(generate()),
-            mimetype='text/event-stream',
-            headers={
-                'Cache-Control': 'no-cache',
-                'Connection': 'keep-alive',
-                'X-Accel-Buffering': 'no'
-            }
-        )
+        # Run the pipeline on the job queue; this request only follows its events
+        job_queue = get_job_queue()
+        job_id = job_queue.submit_storyboard(storyboard_request)
+        return event_stream_response(job_event_stream(job_queue.store, job_id))
         
     except ValidationError as e:
         error_response = json.dumps({
@@ -76,6 +78,80 @@ def generate_storyboard_stream():
         )
 
 
+@storyboard_stream_bp.route('/bulk-stream', methods=['POST'])
+def bulk_stream():
+    """
+    Generate several storyboards from a JSON Lines upload, streaming results as they finish.
+    
+    Runs the same job as POST /jobs/bulk and streams its results feed in
+    the response. The job ID is returned in the X-Job-ID header, so the
+    rest of the batch can be cancelled with POST /jobs/<job_id>/cancel.
+    
+    Request Body:
+        JSON Lines, as the raw body or a multipart 'file' field, with one
+        storyboard request per line
+    
+    Returns:
+        JSON Lines stream with one result per storyboard
+    """
+    storyboard_requests, errors = read_bulk_storyboard_requests()
+    if errors:
+        return jsonify({
+            'error': 'Invalid bulk upload',
+            'details': errors
+        }), 400
+    
+    job_queue = get_job_queue()
+    job_id = job_queue.submit_bulk(storyboard_requests)
+    return jsonl_stream_response(job_results_stream(job_queue.store, job_id), headers={'X-Job-ID': job_id})
+
+
+@storyboard_stream_bp.route('/edit-frames-stream', methods=['POST'])
+def edit_frames_stream():
+    """
+    Edit several frames of a storyboard with Server-Sent Events for per-frame progress.
+    
+    The edits run concurrently, the edited frames replace the originals
+    together (or not at all if any edit fails), and the PDF is rendered
+    once at the end.
+    
+    Request Body:
+        session_id (str): The session ID of the storyboard
+        edits (list): Objects with frame_number and edit_instructions, one per frame
+        storyboard_context (str): The original storyboard description for context
+        pdf_profile (str, optional): Switch the storyboard PDF to this export profile
+    
+    Returns:
+        Server-Sent Events stream with 'step_start' and 'frame_edited' events
+        per frame, 'frames_committed', and a final 'complete' or 'error'
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return Response(
+                f"data: {json.dumps({'type': 'error', 'message': 'Request body is required'})}\n\n",
+                mimetype='text/event-stream'
+            )
+        
+        batch_request = BatchFrameEditRequest(**data)
+        batch_request.user_id = resolve_user_id(batch_request.user_id)
+        
+        job_queue = get_job_queue()
+        job_id = job_queue.submit_batch_edit(batch_request)
+        return event_stream_response(job_event_stream(job_queue.store, job_id))
+    
+    except ValidationError as e:
+        error_response = json.dumps({
+            'type': 'error',
+            'message': 'Validation error',
+            'details': str(e.errors())
+        })
+        return Response(
+            f"data: {error_response}\n\n",
+            mimetype='text/event-stream'
+        )
+
+
 @storyboard_stream_bp.route('/edit-frame', methods=['POST'])
 def edit_frame():
     """
@@ -86,6 +162,7 @@ def edit_frame():
         frame_number (int): The frame number to edit (1-based)
         edit_instructions (str): Instructions for how to edit the frame
         storyboard_context (str): The original storyboard description for context
+        pdf_profile (str, optional): Switch the storyboard PDF to this export profile
     
     Returns:
         JSON response with success status and updated frame path
@@ -101,40 +178,33 @@ def edit_frame():
         
         # Validate using Pydantic model
         edit_request = FrameEditRequest(**data)
+        edit_request.user_id = resolve_user_id(edit_request.user_id)
         
-        # Initialize services
-        image_service = ImageGenerationService()
-        pdf_generator = PDFGenerator()
-        
-        # Delete existing PDF since we're modifying the storyboard
-        image_service.delete_pdf(edit_request.session_id)
-        
-        # Edit the frame
-        edited_frame_path = image_service.edit_frame(
-            session_id=edit_request.session_id,
-            frame_number=edit_request.frame_number,
-            edit_instructions=edit_request.edit_instructions,
-            storyboard_context=edit_request.storyboard_context
+        frame_path = ImageGenerationService.get_frame_path(
+            edit_request.session_id,
+            edit_request.frame_number
         )
+        if not os.path.isfile(frame_path):
+            return jsonify({
+                'success': False,
+                'message': (
+                    f"Frame {edit_request.frame_number} not found in session "
+                    f"{edit_request.session_id}"
+                )
+            }), 404
         
-        # Regenerate PDF with updated frames
-        frame_paths = image_service.get_session_frame_paths(edit_request.session_id)
-        frame_descriptions = image_service.load_frame_descriptions(edit_request.session_id)
-        pdf_path = pdf_generator.create_storyboard_pdf(
-            image_paths=frame_paths,
-            session_id=edit_request.session_id,
-            frame_descriptions=frame_descriptions if frame_descriptions else None
-        )
+        # Edit the frame and regenerate the PDF on the job queue
+        job_queue = get_job_queue()
+        job_id = job_queue.submit_frame_edit(edit_request)
+        job = wait_for_job(job_queue.store, job_id)
         
-        response = FrameEditResponse(
-            success=True,
-            message=f'Frame {edit_request.frame_number} edited successfully',
-            frame_number=edit_request.frame_number,
-            image_path=edited_frame_path,
-            pdf_regenerated=True
-        )
+        if job['status'] != JobStatus.SUCCEEDED:
+            return jsonify({
+                'success': False,
+                'message': job['error']
+            }), 500
         
-        return jsonify(response.model_dump())
+        return jsonify(job['result'])
         
     except ValidationError as e:
         return jsonify({
@@ -143,11 +213,8 @@ def edit_frame():
             'details': str(e.errors())
         }), 400
     
-    except FileNotFoundError as e:
-        return jsonify({
-            'success': False,
-            'message': str(e)
-        }), 404
+    except JobWaitTimeoutError as e:
+        return job_wait_timeout_response(e)
     
     except (ValueError, IOError, OSError) as e:
         return jsonify({
@@ -3,5 +3,21 @@ from app.services.storyboard_service import StoryboardService
 from app.services.streaming_storyboard_service import StreamingStoryboardService
 from app.services.image_generation_service import ImageGenerationService
 from app.services.pdf_generator import PDFGenerator
+from app.services.frame_edit_service import FrameEditService
+from app.services.checkpoint import GenerationCheckpoint
+from app.services.job_store import JobStore, JobStatus
+from app.services.job_queue import JobQueue
+from app.services.registry import ServiceRegistry
 
-__all__ = ['StoryboardService', 'StreamingStoryboardService', 'ImageGenerationService', 'PDFGenerator']
+__all__ = [
+    'StoryboardService',
+    'StreamingStoryboardService',
+    'ImageGenerationService',
+    'PDFGenerator',
+    'FrameEditService',
+    'GenerationCheckpoint',
+    'JobStore',
+    'JobStatus',
+    'JobQueue',
+    'ServiceRegistry'
+]
@@ -0,0 +1,164 @@
+"""
+Batch Frame Edit Service Module
+
+Edits several frames of a storyboard concurrently and replaces them together.
+"""
+import os
+import time
+import asyncio
+from contextlib import AsyncExitStack
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional, Tuple
+from app.agents.image_generation_agent import ImageGenerationAgent
+from app.services.checkpoint import GenerationCheckpoint
+from app.services.derivatives import frame_derivatives
+from app.services.event_loop import background_loop
+from app.services.frame_lock import aframe_lock
+from app.metrics import metrics
+
+
+class BatchFrameEditService:
+    """Service for editing several frames of a session at once."""
+    
+    def __init__(self, agent: Optional[ImageGenerationAgent] = None):
+        """
+        Initialize the batch frame edit service.
+        
+        Args:
+            agent: Image generation agent to use. Defaults to a new agent.
+        """
+        self.agent = agent or ImageGenerationAgent()
+    
+    def edit_frames_stream(
+        self,
+        session_id: str,
+        edits: List[Tuple[int, str]],
+        storyboard_context: str,
+        user_id: Optional[str] = None
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Edit several frames of a session concurrently and replace them together.
+        
+        Args:
+            session_id: The session ID containing the frames
+            edits: (frame_number, edit_instructions) pairs, one per frame
+            storyboard_context: The overall storyboard description for context
+            user_id: The user requesting the edits, used for fair rate limiting
+        
+        Yields:
+            Dict events: 'step_start' per frame, 'frame_edited' as each edit
+            finishes, and 'frames_committed' once every frame is replaced
+        
+        Raises:
+            FileNotFoundError: If a frame doesn't exist
+            ValueError: If any edit fails, in which case no frame is replaced
+        """
+        return background_loop.iterate(
+            self.aedit_frames_stream(session_id, edits, storyboard_context, user_id=user_id)
+        )
+    
+    async def aedit_frames_stream(
+        self,
+        session_id: str,
+        edits: List[Tuple[int, str]],
+        storyboard_context: str,
+        user_id: Optional[str] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Async variant of edit_frames_stream.
+        
+        Args:
+            session_id: The session ID containing the frames
+            edits: (frame_number, edit_instructions) pairs, one per frame
+            storyboard_context: The overall storyboard description for context
+            user_id: The user requesting the edits, used for fair rate limiting
+        
+        Yields:
+            Dict events with per-frame progress
+        """
+        checkpoint = GenerationCheckpoint(session_id)
+        instructions = dict(edits)
+        frame_numbers = sorted(instructions)
+        for frame_number in frame_numbers:
+            if not os.path.isfile(checkpoint.frame_path(frame_number)):
+                raise FileNotFoundError(f"Frame {frame_number} not found in session {session_id}")
+        
+        async with AsyncExitStack() as frame_locks:
+            # Locks are taken in frame order, so overlapping batches can't deadlock
+            lock_requested = time.monotonic()
+            for frame_number in frame_numbers:
+                await frame_locks.enter_async_context(aframe_lock(session_id, frame_number))
+            metrics.observe('frame_edit.lock_wait_seconds', time.monotonic() - lock_requested)
+            
+            for frame_number in frame_numbers:
+                yield {
+                    'type': 'step_start',
+                    'step_name': 'editing',
+                    'frame_number': frame_number,
+                    'message': f'Editing frame {frame_number}...'
+                }
+            
+            pending = [
+                asyncio.ensure_future(self._aedit_locked_frame(
+                    checkpoint,
+                    frame_number,
+                    instructions[frame_number],
+                    storyboard_context,
+                    user_id
+                ))
+                for frame_number in frame_numbers
+            ]
+            edited_images = {}
+            try:
+                for next_edit in asyncio.as_completed(pending):
+                    frame_number, image_bytes = await next_edit
+                    edited_images[frame_number] = image_bytes
+                    yield {
+                        'type': 'frame_edited',
+                        'frame_number': frame_number,
+                        'completed': len(edited_images),
+                        'total': len(frame_numbers),
+                        'message': f'Frame {frame_number} edited ({len(edited_images)}/{len(frame_numbers)})'
+                    }
+            finally:
+                # One failed edit fails the batch; the others are abandoned,
+                # and wound down before the frame locks are released
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+            
+            frame_paths = await asyncio.to_thread(checkpoint.save_frames, edited_images)
+            await asyncio.gather(*(
+                frame_derivatives.agenerate_quietly(frame_paths[frame_number])
+                for frame_number in frame_numbers
+            ))
+        
+        yield {
+            'type': 'frames_committed',
+            'frame_numbers': frame_numbers,
+            'image_paths': [frame_paths[frame_number] for frame_number in frame_numbers],
+            'message': f'{len(frame_numbers)} frames updated'
+        }
+    
+    async def _aedit_locked_frame(
+        self,
+        checkpoint: GenerationCheckpoint,
+        frame_number: int,
+        edit_instructions: str,
+        storyboard_context: str,
+        user_id: Optional[str]
+    ) -> Tuple[int, bytes]:
+        """Edit one frame whose lock the caller holds, without saving the result."""
+        try:
+            current_image = await asyncio.to_thread(checkpoint.load_frame, frame_number)
+            if current_image is None:
+                raise FileNotFoundError(f"Frame {frame_number} was removed")
+            
+            edited_image_bytes = await self.agent.aedit_frame(
+                current_image=current_image,
+                edit_instructions=edit_instructions,
+                storyboard_context=storyboard_context,
+                user_id=user_id
+            )
+            return frame_number, edited_image_bytes
+        except (IOError, OSError, ValueError) as e:
+            raise ValueError(f"Failed to edit frame {frame_number}: {str(e)}")
@@ -0,0 +1,365 @@
+"""
+Generation Checkpoint Module
+
+Per-session checkpoints that let an interrupted storyboard generation resume.
+"""
+import os
+import re
+import json
+import hashlib
+from typing import Any, Dict, Optional
+from pydantic import ValidationError
+from app.models.storyboard import StoryboardOutput
+from app.services.session_catalog import session_catalog
+from app.services.workspace import JobWorkspace
+from app.config import settings
+
+# Frame image names in a session directory
+FRAME_FILE_PATTERN = re.compile(r'^frame_(\d{3})\.png$')
+
+
+class GenerationCheckpoint:
+    """
+    Progress of one storyboard generation, persisted in its session directory.
+    
+    The original request is recorded in checkpoint.json when generation
+    starts, the validated segmentation in metadata.json (the file frame edits
+    read their descriptions from) once it is known, and every frame image as
+    soon as it has been generated. A resumed run reloads all three and only
+    generates the frames that are still missing.
+    
+    Every save is also recorded in the session catalog, which answers
+    lookups of the segmentation and export profile without reading the
+    session files.
+    """
+    
+    REQUEST_FILE = 'checkpoint.json'
+    METADATA_FILE = 'metadata.json'
+    
+    def __init__(self, session_id: str):
+        """
+        Initialize the checkpoint for a session.
+        
+        Args:
+            session_id: The storyboard session ID
+        """
+        self.session_id = session_id
+        self.session_dir = os.path.join(settings.OUTPUT_DIR, session_id)
+    
+    def exists(self) -> bool:
+        """Whether a generation has been started for this session."""
+        return os.path.isfile(os.path.join(self.session_dir, self.REQUEST_FILE))
+    
+    def start(
+        self,
+        user_description: str,
+        generation_mode: str,
+        pdf_profile: Optional[str] = None
+    ) -> None:
+        """
+        Record the request a generation was started with.
+        
+        Args:
+            user_description: The text description of the video sequence
+            generation_mode: 'sequential' or 'anchor_parallel' image generation
+            pdf_profile: PDF export profile. Defaults to the configured profile.
+        """
+        pdf_profile = pdf_profile or settings.PDF_DEFAULT_PROFILE
+        self._write_json(self.REQUEST_FILE, {
+            'user_description': user_description,
+            'generation_mode': generation_mode,
+            'pdf_profile': pdf_profile
+        })
+        session_catalog.record_session(self.session_id, user_description, generation_mode, pdf_profile)
+    
+    def load_request(self) -> Dict[str, Any]:
+        """
+        Load the request a generation was started with.
+        
+        Returns:
+            Dictionary with 'user_description' and 'generation_mode'
+        
+        Raises:
+            FileNotFoundError: If no generation was started for this session
+            ValueError: If the checkpoint is unreadable
+        """
+        if not self.exists():
+            raise FileNotFoundError(f"No checkpoint found for session {self.session_id}")
+        
+        try:
+            with open(os.path.join(self.session_dir, self.REQUEST_FILE), 'r', encoding='utf-8') as f:
+                request = json.load(f)
+            return {
+                'user_description': request['user_description'],
+                'generation_mode': request['generation_mode']
+            }
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            raise ValueError(f"Invalid checkpoint for session {self.session_id}: {e}")
+    
+    def load_pdf_profile(self) -> str:
+        """
+        Get the PDF export profile of the session.
+        
+        Returns:
+            The recorded profile, or the configured default if none was recorded
+        """
+        session = self._catalogued()
+        return (session and session['pdf_profile']) or settings.PDF_DEFAULT_PROFILE
+    
+    def set_pdf_profile(self, pdf_profile: str) -> None:
+        """
+        Change the PDF export profile of the session.
+        
+        Args:
+            pdf_profile: The new export profile
+        
+        Raises:
+            FileNotFoundError: If no generation was started for this session
+            ValueError: If the checkpoint is unreadable
+        """
+        request = self.load_request()
+        request['pdf_profile'] = pdf_profile
+        self._write_json(self.REQUEST_FILE, request)
+        session_catalog.set_pdf_profile(self.session_id, pdf_profile)
+    
+    def save_storyboard(self, storyboard: StoryboardOutput) -> None:
+        """
+        Checkpoint the validated segmentation.
+        
+        Args:
+            storyboard: The storyboard frames to generate
+        """
+        self._write_json(self.METADATA_FILE, {
+            'total_frames': storyboard.total_frames,
+            'frames': [
+                {
+                    'frame_number': frame.frame_number,
+                    'description': frame.description
+                }
+                for frame in storyboard.frames
+            ]
+        })
+        session_catalog.record_storyboard(
+            self.session_id,
+            storyboard.total_frames,
+            [(frame.frame_number, frame.description) for frame in storyboard.frames]
+        )
+    
+    def load_storyboard(self) -> Optional[StoryboardOutput]:
+        """
+        Load the checkpointed segmentation.
+        
+        Returns:
+            The checkpointed StoryboardOutput, or None if segmentation never finished
+        """
+        session = self._catalogued()
+        if session is None or session['total_frames'] is None:
+            return None
+        
+        try:
+            return StoryboardOutput(
+                total_frames=session['total_frames'],
+                frames=[
+                    {'frame_number': frame['frame_number'], 'description': frame['description']}
+                    for frame in session['frames']
+                    if frame['description'] is not None
+                ]
+            )
+        except ValidationError:
+            return None
+    
+    def _read_storyboard_file(self) -> Optional[StoryboardOutput]:
+        """Parse the segmentation from metadata.json, or None if it is missing or invalid."""
+        metadata_path = os.path.join(self.session_dir, self.METADATA_FILE)
+        if not os.path.isfile(metadata_path):
+            return None
+        
+        try:
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            frames = sorted(metadata['frames'], key=lambda x: x['frame_number'])
+            return StoryboardOutput(
+                total_frames=metadata.get('total_frames', len(frames)),
+                frames=frames
+            )
+        except (json.JSONDecodeError, KeyError, TypeError, ValidationError, IOError):
+            return None
+    
+    def frame_path(self, frame_number: int) -> str:
+        """Get the path of a frame image in the session directory."""
+        return os.path.join(self.session_dir, f"frame_{frame_number:03d}.png")
+    
+    def save_frame(self, frame_number: int, image_bytes: bytes) -> str:
+        """
+        Checkpoint a generated frame image.
+        
+        Args:
+            frame_number: The frame number (1-based)
+            image_bytes: The generated image
+        
+        Returns:
+            Path to the saved frame image
+        """
+        os.makedirs(self.session_dir, exist_ok=True)
+        with JobWorkspace(self.session_id) as workspace:
+            frame_path = workspace.write_atomic(self.frame_path(frame_number), image_bytes)
+        session_catalog.record_frame(self.session_id, frame_number, hashlib.sha256(image_bytes).hexdigest())
+        return frame_path
+    
+    def save_frames(self, images: Dict[int, bytes]) -> Dict[int, str]:
+        """
+        Replace several frame images together.
+        
+        Every image is staged before any frame is replaced, so a failure
+        while writing leaves all frames as they were.
+        
+        Args:
+            images: Dictionary of frame number to new image bytes
+        
+        Returns:
+            Dictionary of frame number to saved frame path
+        """
+        os.makedirs(self.session_dir, exist_ok=True)
+        frame_paths = {}
+        with JobWorkspace(self.session_id) as workspace:
+            staged = []
+            for frame_number, image_bytes in images.items():
+                frame_paths[frame_number] = self.frame_path(frame_number)
+                staging_path = workspace.file_path(os.path.basename(frame_paths[frame_number]))
+                with open(staging_path, 'wb') as f:
+                    f.write(image_bytes)
+                staged.append((staging_path, frame_paths[frame_number]))
+            
+            for staging_path, frame_path in staged:
+                os.replace(staging_path, frame_path)
+        
+        session_catalog.record_frames(self.session_id, [
+            (frame_number, hashlib.sha256(image_bytes).hexdigest())
+            for frame_number, image_bytes in images.items()
+        ])
+        return frame_paths
+    
+    def frame_paths(self) -> Dict[int, str]:
+        """
+        Get the paths of the frames saved so far.
+        
+        Returns:
+            Dictionary of frame number to image path, in frame order
+        """
+        session = self._catalogued()
+        if session is None:
+            return {}
+        return {
+            frame['frame_number']: self.frame_path(frame['frame_number'])
+            for frame in session['frames']
+            if frame['sha256'] is not None
+        }
+    
+    def load_frame(self, frame_number: int) -> Optional[bytes]:
+        """
+        Load a checkpointed frame image.
+        
+        Args:
+            frame_number: The frame number (1-based)
+        
+        Returns:
+            The image bytes, or None if the frame hasn't been generated yet
+        """
+        try:
+            with open(self.frame_path(frame_number), 'rb') as f:
+                return f.read() or None
+        except FileNotFoundError:
+            return None
+    
+    def index(self) -> bool:
+        """
+        Record a session directory written before the catalog existed.
+        
+        Returns:
+            True if the directory held a session, False otherwise
+        """
+        try:
+            created_at = os.stat(self.session_dir).st_mtime
+            names = os.listdir(self.session_dir)
+        except (FileNotFoundError, NotADirectoryError):
+            return False
+        
+        frame_numbers = sorted(
+            int(match.group(1)) for match in map(FRAME_FILE_PATTERN.match, names) if match
+        )
+        if self.REQUEST_FILE not in names and self.METADATA_FILE not in names and not frame_numbers:
+            return False
+        
+        try:
+            request = self.load_request()
+            session_catalog.record_session(
+                self.session_id,
+                request['user_description'],
+                request['generation_mode'],
+                self._read_pdf_profile(),
+                created_at=created_at
+            )
+        except (FileNotFoundError, ValueError):
+            pass
+        
+        for frame_number in frame_numbers:
+            frame_path = self.frame_path(frame_number)
+            with open(frame_path, 'rb') as f:
+                frame_digest = hashlib.sha256(f.read()).hexdigest()
+            session_catalog.record_frame(
+                self.session_id,
+                frame_number,
+                frame_digest,
+                updated_at=os.stat(frame_path).st_mtime
+            )
+        
+        storyboard = self._read_storyboard_file()
+        if storyboard is not None:
+            session_catalog.record_storyboard(
+                self.session_id,
+                storyboard.total_frames,
+                [(frame.frame_number, frame.description) for frame in storyboard.frames]
+            )
+        return True
+    
+    @classmethod
+    def index_existing_sessions(cls) -> int:
+        """
+        Record every session directory in an empty catalog.
+        
+        Catalogs are filled as sessions are saved, so this only has work to
+        do once, when the catalog is introduced to an existing output directory.
+        
+        Returns:
+            Number of sessions recorded
+        """
+        if not session_catalog.is_empty() or not os.path.isdir(settings.OUTPUT_DIR):
+            return 0
+        
+        return sum(
+            cls(name).index()
+            for name in os.listdir(settings.OUTPUT_DIR)
+            if not name.startswith('.')
+        )
+    
+    def _catalogued(self) -> Optional[Dict[str, Any]]:
+        """Get the session's catalog entry, recording the session on first lookup if it predates the catalog."""
+        session = session_catalog.get_session(self.session_id)
+        if session is None and self.index():
+            session = session_catalog.get_session(self.session_id)
+        return session
+    
+    def _read_pdf_profile(self) -> str:
+        """Read the export profile from checkpoint.json, falling back to the configured default."""
+        try:
+            with open(os.path.join(self.session_dir, self.REQUEST_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f).get('pdf_profile') or settings.PDF_DEFAULT_PROFILE
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            return settings.PDF_DEFAULT_PROFILE
+    
+    def _write_json(self, name: str, data: Dict[str, Any]) -> None:
+        """Atomically write a JSON file into the session directory."""
+        os.makedirs(self.session_dir, exist_ok=True)
+        content = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        with JobWorkspace(self.session_id) as workspace:
+            workspace.write_atomic(os.path.join(self.session_dir, name), content)
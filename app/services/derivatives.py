@@ -0,0 +1,243 @@
+"""
+Frame Derivatives Module
+
+Thumbnails and web-sized copies of frame images, rendered in a process pool.
+"""
+import io
+import os
+import asyncio
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from PIL import Image
+from app.services.file_versions import file_versions
+from app.config import settings
+from app.metrics import metrics
+
+
+class FrameDerivatives:
+    """
+    Renders and locates the derivatives of frame images.
+    
+    Every frame gets a small thumbnail for the storyboard cards and a
+    web-sized copy for previews, both as WebP, next to the frame in the
+    session's derived directory. They are rendered when a frame is saved
+    or edited; a derivative that is missing or was rendered from other
+    content than its frame's current content is rendered again on request.
+    Each derivative records the SHA-256 of the frame bytes it was decoded
+    from in its EXIF image description, so one rendered from a frame that
+    was replaced meanwhile is never taken for current, however new it is.
+    
+    Decoding and resizing PNGs is CPU-bound, so generation hands the work
+    to a process pool instead of holding the GIL on the threads that run
+    model calls and requests.
+    """
+    
+    # Subdirectory of the session directory holding derivatives
+    DERIVED_DIR = 'derived'
+    
+    # Derivative kinds and the width each is scaled down to
+    KINDS: Dict[str, int] = {
+        'thumb': settings.THUMBNAIL_WIDTH,
+        'web': settings.WEB_IMAGE_WIDTH
+    }
+    
+    # EXIF ImageDescription tag, holding 'sha256:<hex>' of the source frame
+    SOURCE_TAG = 0x010E
+    
+    def __init__(self, max_workers: int):
+        """
+        Initialize the derivatives renderer. The pool starts on first use.
+        
+        Args:
+            max_workers: Number of rendering processes. Zero or less renders
+                in the calling thread instead.
+        """
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pid: Optional[int] = None
+    
+    @property
+    def pool(self) -> Optional[ProcessPoolExecutor]:
+        """The process pool, started on first use (and again after a fork)."""
+        if self.max_workers <= 0:
+            return None
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                    self._pid = os.getpid()
+        return self._pool
+    
+    @classmethod
+    def derivative_path(cls, frame_path: str, kind: str) -> str:
+        """
+        Get the path of a frame's derivative, whether or not it exists.
+        
+        Args:
+            frame_path: Path of the frame image (e.g. .../frame_001.png)
+            kind: 'thumb' or 'web'
+        
+        Returns:
+            Path of the derivative (e.g. .../derived/frame_001_thumb.webp)
+        
+        Raises:
+            ValueError: If the kind is unknown
+        """
+        if kind not in cls.KINDS:
+            raise ValueError(f"Unknown derivative kind: {kind}")
+        session_dir, frame_file = os.path.split(frame_path)
+        name = os.path.splitext(frame_file)[0]
+        return os.path.join(session_dir, cls.DERIVED_DIR, f"{name}_{kind}.webp")
+    
+    async def agenerate(self, frame_path: str) -> List[str]:
+        """
+        Render every derivative of a frame without blocking the event loop.
+        
+        Args:
+            frame_path: Path of the frame image
+        
+        Returns:
+            Paths of the rendered derivatives
+        
+        Raises:
+            OSError: If the frame can't be read or a derivative can't be written
+        """
+        targets = self._targets(frame_path)
+        pool = self.pool
+        if pool is None:
+            _, paths = await asyncio.to_thread(_render_derivatives, frame_path, targets, settings.WEBP_QUALITY)
+        else:
+            _, paths = await asyncio.wrap_future(
+                pool.submit(_render_derivatives, frame_path, targets, settings.WEBP_QUALITY)
+            )
+        metrics.increment('derivatives.rendered', len(paths))
+        return paths
+    
+    async def agenerate_quietly(self, frame_path: str) -> None:
+        """
+        Render a frame's derivatives, counting rather than raising failures.
+        
+        Derivatives can always be rendered again on request, so a failure
+        must not fail the generation or edit that saved the frame.
+        
+        Args:
+            frame_path: Path of the frame image
+        """
+        try:
+            await self.agenerate(frame_path)
+        except (OSError, ValueError):
+            metrics.increment('derivatives.failures')
+    
+    def ensure(self, frame_path: str, kind: str) -> bytes:
+        """
+        Bring a frame's derivative up to date, rendering it if it is missing or stale.
+        
+        Args:
+            frame_path: Path of the frame image
+            kind: 'thumb' or 'web'
+        
+        Returns:
+            SHA-256 digest of the frame content the derivative was rendered from
+        
+        Raises:
+            FileNotFoundError: If the frame doesn't exist
+            ValueError: If the kind is unknown
+        """
+        path = self.derivative_path(frame_path, kind)
+        frame_digest = file_versions.digest(frame_path)
+        if self.source_digest(path) == frame_digest:
+            return frame_digest
+        
+        # Rendered in the calling thread: one small image isn't worth a
+        # round trip to the pool, and web workers shouldn't start processes
+        metrics.increment('derivatives.rendered_on_request')
+        rendered_digest, _ = _render_derivatives(frame_path, [(path, self.KINDS[kind])], settings.WEBP_QUALITY)
+        return rendered_digest
+    
+    @classmethod
+    def source_digest(cls, path: str) -> Optional[bytes]:
+        """
+        Get the digest of the frame content a derivative was rendered from.
+        
+        Args:
+            path: Path of the derivative
+        
+        Returns:
+            The raw SHA-256 digest, or None if the derivative is missing or
+            doesn't record its source
+        """
+        try:
+            with Image.open(path) as img:
+                source = img.getexif().get(cls.SOURCE_TAG)
+        except (OSError, ValueError):
+            return None
+        
+        if not isinstance(source, str) or not source.startswith('sha256:'):
+            return None
+        try:
+            return bytes.fromhex(source[len('sha256:'):])
+        except ValueError:
+            return None
+    
+    def _targets(self, frame_path: str) -> List[Tuple[str, int]]:
+        """Get the path and width of every derivative of a frame."""
+        return [(self.derivative_path(frame_path, kind), width) for kind, width in self.KINDS.items()]
+
+
+def _render_derivatives(
+    frame_path: str,
+    targets: List[Tuple[str, int]],
+    quality: int
+) -> Tuple[bytes, List[str]]:
+    """
+    Decode a frame once and write each derivative. Runs in a pool process.
+    
+    Args:
+        frame_path: Path of the frame image
+        targets: Path and maximum width of each derivative
+        quality: WebP quality (1-100)
+    
+    Returns:
+        Tuple of the SHA-256 digest of the frame content that was decoded
+        and the paths of the written derivatives
+    """
+    # The digest is of the very bytes decoded, whatever replaces the frame meanwhile
+    with open(frame_path, 'rb') as f:
+        frame_bytes = f.read()
+    frame_digest = hashlib.sha256(frame_bytes).digest()
+    exif = Image.Exif()
+    exif[FrameDerivatives.SOURCE_TAG] = f"sha256:{frame_digest.hex()}"
+    
+    with Image.open(io.BytesIO(frame_bytes)) as img:
+        img.load()
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGB')
+        
+        paths = []
+        for path, width in targets:
+            derivative = img
+            if width < img.width:
+                height = max(1, round(img.height * width / img.width))
+                derivative = img.resize((width, height), Image.LANCZOS)
+            
+            # Written next to the target and renamed, so readers never see a partial file
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, staging_path = tempfile.mkstemp(suffix='.webp', dir=os.path.dirname(path))
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    derivative.save(f, format='WEBP', quality=quality, method=4, exif=exif)
+                os.replace(staging_path, path)
+            except BaseException:
+                os.unlink(staging_path)
+                raise
+            paths.append(path)
+    
+    return frame_digest, paths
+
+
+# Process-wide renderer shared by all services
+frame_derivatives = FrameDerivatives(max_workers=settings.DERIVATIVE_WORKERS)
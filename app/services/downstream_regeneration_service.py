@@ -0,0 +1,175 @@
+"""
+Downstream Regeneration Service Module
+
+Re-runs the sequential chain after an edited frame, so the frames that
+follow it match it again.
+"""
+import asyncio
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Generator, Optional
+from app.agents.image_generation_agent import ImageGenerationAgent
+from app.services.checkpoint import GenerationCheckpoint
+from app.services.derivatives import frame_derivatives
+from app.services.event_loop import background_loop
+from app.services.frame_lock import aframe_lock
+from app.metrics import metrics
+
+
+class DownstreamRegenerationService:
+    """Service for regenerating the frames after an edited frame."""
+    
+    # How often a regeneration checks whether it was superseded
+    STOP_POLL_SECONDS = 0.25
+    
+    def __init__(self, agent: Optional[ImageGenerationAgent] = None):
+        """
+        Initialize the downstream regeneration service.
+        
+        Args:
+            agent: Image generation agent to use. Defaults to a new agent.
+        """
+        self.agent = agent or ImageGenerationAgent()
+    
+    def regenerate_downstream_stream(
+        self,
+        session_id: str,
+        from_frame: int,
+        user_id: Optional[str] = None,
+        should_stop: Optional[Callable[[], bool]] = None
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Regenerate the frames after a frame in sequence, starting from its current image.
+        
+        Every following frame was generated from the one before it, so after
+        an edit they no longer match. This re-runs the sequential chain from
+        the edited frame using the descriptions saved with the storyboard,
+        replacing each frame as soon as it is generated.
+        
+        Args:
+            session_id: The session ID containing the frames
+            from_frame: The frame the chain starts from (kept as it is)
+            user_id: The user the frames are regenerated for, used for fair rate limiting
+            should_stop: Called between and during model calls; once it
+                returns True the chain stops, the model call in flight is
+                abandoned and its result is never saved
+        
+        Yields:
+            Dict events: 'step_start' and 'frame_regenerated' per frame, and
+            'cascade_stopped' if the chain was stopped early
+        
+        Raises:
+            FileNotFoundError: If the storyboard or the starting frame doesn't exist
+            ValueError: If regenerating a frame fails
+        """
+        return background_loop.iterate(
+            self.aregenerate_downstream_stream(session_id, from_frame, user_id=user_id, should_stop=should_stop)
+        )
+    
+    async def aregenerate_downstream_stream(
+        self,
+        session_id: str,
+        from_frame: int,
+        user_id: Optional[str] = None,
+        should_stop: Optional[Callable[[], bool]] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Async variant of regenerate_downstream_stream.
+        
+        Args:
+            session_id: The session ID containing the frames
+            from_frame: The frame the chain starts from (kept as it is)
+            user_id: The user the frames are regenerated for, used for fair rate limiting
+            should_stop: Called between and during model calls; the chain
+                stops once it returns True
+        
+        Yields:
+            Dict events with per-frame progress
+        """
+        checkpoint = GenerationCheckpoint(session_id)
+        storyboard = await asyncio.to_thread(checkpoint.load_storyboard)
+        if storyboard is None:
+            raise FileNotFoundError(f"No storyboard found for session {session_id}")
+        previous_image = await asyncio.to_thread(checkpoint.load_frame, from_frame)
+        if previous_image is None:
+            raise FileNotFoundError(f"Frame {from_frame} not found in session {session_id}")
+        
+        downstream = [frame for frame in storyboard.frames if frame.frame_number > from_frame]
+        regenerated = []
+        
+        def stopped_event() -> Dict[str, Any]:
+            metrics.increment('cascade.frames_skipped', len(downstream) - len(regenerated))
+            return {
+                'type': 'cascade_stopped',
+                'frame_numbers': list(regenerated),
+                'message': f'Stopped after regenerating {len(regenerated)} of {len(downstream)} frames'
+            }
+        
+        for frame in downstream:
+            if await self._astop_requested(should_stop):
+                yield stopped_event()
+                return
+            
+            yield {
+                'type': 'step_start',
+                'step_name': 'regenerating',
+                'frame_number': frame.frame_number,
+                'message': f'Regenerating frame {frame.frame_number}...'
+            }
+            
+            try:
+                image_bytes = await self._arun_until_stopped(
+                    self.agent.agenerate_next_image(
+                        description=frame.description,
+                        previous_image=previous_image,
+                        user_id=user_id
+                    ),
+                    should_stop
+                )
+                if image_bytes is None:
+                    yield stopped_event()
+                    return
+                
+                async with aframe_lock(session_id, frame.frame_number):
+                    # An edit may have been requested while the image was generated
+                    if await self._astop_requested(should_stop):
+                        yield stopped_event()
+                        return
+                    frame_path = await asyncio.to_thread(checkpoint.save_frame, frame.frame_number, image_bytes)
+                    await frame_derivatives.agenerate_quietly(frame_path)
+            except (IOError, OSError, ValueError) as e:
+                raise ValueError(f"Failed to regenerate frame {frame.frame_number}: {str(e)}")
+            
+            previous_image = image_bytes
+            regenerated.append(frame.frame_number)
+            metrics.increment('cascade.frames_regenerated')
+            yield {
+                'type': 'frame_regenerated',
+                'frame_number': frame.frame_number,
+                'image_path': frame_path,
+                'completed': len(regenerated),
+                'total': len(downstream),
+                'message': f'Frame {frame.frame_number} regenerated ({len(regenerated)}/{len(downstream)})'
+            }
+    
+    @staticmethod
+    async def _astop_requested(should_stop: Optional[Callable[[], bool]]) -> bool:
+        """Ask a stop callback off the event loop, since it may query a database."""
+        if should_stop is None:
+            return False
+        return await asyncio.to_thread(should_stop)
+    
+    async def _arun_until_stopped(
+        self,
+        call: Awaitable[bytes],
+        should_stop: Optional[Callable[[], bool]]
+    ) -> Optional[bytes]:
+        """Await a model call, abandoning it if a stop is requested meanwhile."""
+        task = asyncio.ensure_future(call)
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=self.STOP_POLL_SECONDS)
+                if done:
+                    return task.result()
+                if await self._astop_requested(should_stop):
+                    return None
+        finally:
+            task.cancel()
@@ -0,0 +1,129 @@
+"""
+Event Loop Module
+
+Persistent background asyncio event loop shared by async pipelines.
+"""
+import os
+import asyncio
+import threading
+from typing import AsyncIterable, AsyncIterator, Awaitable, Generator, Iterable, Optional, TypeVar, Union
+
+T = TypeVar('T')
+
+
+class BackgroundEventLoop:
+    """
+    An asyncio event loop running forever in a daemon thread.
+    
+    Sync code hands coroutines to this loop instead of calling asyncio.run,
+    which would create and tear down a loop (and its connections) every
+    time. All async model calls in the process share the loop, so many
+    calls for many storyboards can be in flight without a thread each.
+    """
+    
+    def __init__(self, name: str = 'event-loop'):
+        """
+        Initialize the loop holder. The loop itself starts on first use.
+        
+        Args:
+            name: Name of the thread running the loop
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+    
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running event loop, started on first use (and again after a fork)."""
+        if self._loop is None or self._pid != os.getpid():
+            with self._lock:
+                if self._loop is None or self._pid != os.getpid():
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(
+                        target=loop.run_forever,
+                        name=self.name,
+                        daemon=True
+                    )
+                    self._thread.start()
+                    self._pid = os.getpid()
+                    self._loop = loop
+        return self._loop
+    
+    def run(self, awaitable: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """
+        Run an awaitable on the loop and block until it finishes.
+        
+        Args:
+            awaitable: Coroutine or other awaitable to run
+            timeout: Optional maximum number of seconds to wait
+        
+        Returns:
+            The awaitable's result
+        
+        Raises:
+            RuntimeError: If called from the loop's own thread, which would deadlock
+        """
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("BackgroundEventLoop.run() called from inside the loop")
+        
+        future = asyncio.run_coroutine_threadsafe(_await(awaitable), loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # Don't leave work running for a caller that has given up
+            future.cancel()
+            raise
+    
+    def iterate(self, iterator: AsyncIterator[T]) -> Generator[T, None, None]:
+        """
+        Consume an async iterator from sync code, one item at a time.
+        
+        Args:
+            iterator: Async iterator (e.g. an async generator) to consume on the loop
+        
+        Yields:
+            The iterator's items; closing the generator closes the iterator
+        """
+        try:
+            while True:
+                try:
+                    yield self.run(iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            aclose = getattr(iterator, 'aclose', None)
+            if aclose is not None:
+                self.run(aclose())
+
+
+async def as_async_iterator(items: Union[Iterable[T], AsyncIterable[T]]) -> AsyncIterator[T]:
+    """
+    Iterate a sync or async iterable asynchronously.
+    
+    Sync iterables are consumed on the event loop, so they must not block
+    (a list or an already decoded generator, not a queue being filled).
+    
+    Args:
+        items: Iterable or async iterable
+    
+    Yields:
+        The items in order
+    """
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def _await(awaitable: Awaitable[T]) -> T:
+    """Wrap any awaitable in a coroutine, as run_coroutine_threadsafe requires."""
+    return await awaitable
+
+
+# Process-wide loop shared by all async pipelines
+background_loop = BackgroundEventLoop()
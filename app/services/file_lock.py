@@ -0,0 +1,66 @@
+"""
+File Lock Module
+
+Exclusive locks shared by threads, coroutines and processes on one host.
+"""
+import os
+import time
+import fcntl
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, TextIO
+
+
+@contextmanager
+def file_lock(path: str, poll_seconds: float) -> Iterator[None]:
+    """
+    Hold an exclusive lock on a lock file.
+    
+    The lock is an flock, so it excludes other threads and processes alike
+    and is released if its holder dies. It is polled rather than waited
+    on, which keeps cooperative servers responsive.
+    
+    Args:
+        path: Path of the lock file, created if needed
+        poll_seconds: Time between attempts to take the lock
+    """
+    with _open_lock_file(path) as lock_file:
+        while not _try_lock(lock_file):
+            time.sleep(poll_seconds)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@asynccontextmanager
+async def afile_lock(path: str, poll_seconds: float) -> AsyncIterator[None]:
+    """
+    Async variant of file_lock that waits without blocking the event loop.
+    
+    Args:
+        path: Path of the lock file, created if needed
+        poll_seconds: Time between attempts to take the lock
+    """
+    with _open_lock_file(path) as lock_file:
+        while not _try_lock(lock_file):
+            await asyncio.sleep(poll_seconds)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _open_lock_file(path: str) -> TextIO:
+    """Open a lock file, creating it and its directory if needed."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return open(path, 'a')
+
+
+def _try_lock(lock_file: TextIO) -> bool:
+    """Take the lock if it is free."""
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
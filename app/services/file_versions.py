@@ -0,0 +1,101 @@
+"""
+File Versions Module
+
+Content digests of output files, used for cache keys and versioned URLs.
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+
+class FileVersions:
+    """
+    Content digests of files, remembered while each file is unchanged.
+    
+    Output files are always replaced atomically, so a file whose inode,
+    size and modification time are unchanged still has the same content,
+    and only a changed file is read and hashed again.
+    """
+    
+    # Number of file digests remembered
+    MAX_ENTRIES = 4096
+    
+    # Length of the hex version strings used in URLs and ETags
+    VERSION_LENGTH = 16
+    
+    def __init__(self):
+        """Initialize an empty digest cache."""
+        self._digests: Dict[str, Tuple[Tuple[int, int, int], bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def digest(self, path: str) -> bytes:
+        """
+        Get the SHA-256 digest of a file's content.
+        
+        Args:
+            path: Path of the file
+        
+        Returns:
+            The raw digest
+        
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+        """
+        stat = os.stat(path)
+        stat_key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        
+        with self._lock:
+            cached = self._digests.get(path)
+            if cached is not None and cached[0] == stat_key:
+                self._digests.move_to_end(path)
+                return cached[1]
+        
+        with open(path, 'rb') as f:
+            file_digest = hashlib.sha256(f.read()).digest()
+        
+        with self._lock:
+            self._digests[path] = (stat_key, file_digest)
+            self._digests.move_to_end(path)
+            while len(self._digests) > self.MAX_ENTRIES:
+                self._digests.popitem(last=False)
+        return file_digest
+    
+    def version(self, path: str, *variant: object) -> str:
+        """
+        Get a short version string that changes whenever a file's content does.
+        
+        Args:
+            path: Path of the file
+            variant: Extra values the version depends on, e.g. the settings
+                a derivative of the file is rendered with
+        
+        Returns:
+            Hex version string
+        
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+        """
+        return self.version_of_digest(self.digest(path), *variant)
+    
+    @classmethod
+    def version_of_digest(cls, file_digest: bytes, *variant: object) -> str:
+        """
+        Get the version string of content with a known digest.
+        
+        Args:
+            file_digest: Raw SHA-256 digest of the content
+            variant: Extra values the version depends on, as for version
+        
+        Returns:
+            Hex version string, equal to version's for a file with this content
+        """
+        digest = hashlib.sha256(file_digest)
+        for value in variant:
+            digest.update(f":{value}".encode('utf-8'))
+        return digest.hexdigest()[:cls.VERSION_LENGTH]
+
+
+# Process-wide digest cache shared by all services
+file_versions = FileVersions()
@@ -0,0 +1,130 @@
+"""
+Frame Edit Service Module
+
+Business logic for editing the frames of an existing storyboard.
+"""
+from typing import Any, Callable, Dict, Generator, Optional
+from app.models.storyboard import BatchFrameEditRequest, FrameEditRequest, FrameEditResponse
+from app.services.batch_frame_edit_service import BatchFrameEditService
+from app.services.checkpoint import GenerationCheckpoint
+from app.services.downstream_regeneration_service import DownstreamRegenerationService
+from app.services.image_generation_service import ImageGenerationService
+
+
+class FrameEditService:
+    """Service for editing storyboard frames."""
+    
+    def __init__(self, image_service: Optional[ImageGenerationService] = None):
+        """
+        Initialize the frame edit service.
+        
+        Args:
+            image_service: Image generation service to use. Defaults to a new service.
+        """
+        self.image_service = image_service or ImageGenerationService()
+        self.batch_edit_service = BatchFrameEditService(self.image_service.agent)
+        self.downstream_service = DownstreamRegenerationService(self.image_service.agent)
+    
+    def edit_frame(self, edit_request: FrameEditRequest) -> FrameEditResponse:
+        """
+        Edit a frame of a session's storyboard.
+        
+        The PDF is not rebuilt here. Replacing the frame changes the PDF's
+        input hash, so it is re-rendered once the session's edits settle
+        (or on the next download), reusing every cached page except the
+        edited ones. Switching the export profile re-renders every page.
+        
+        Concurrent edits of the same frame are applied one after another;
+        edits of different frames run in parallel.
+        
+        Args:
+            edit_request: The validated frame edit request
+        
+        Returns:
+            FrameEditResponse describing the edited frame
+        
+        Raises:
+            FileNotFoundError: If the frame doesn't exist
+            ValueError: If editing fails
+        """
+        # Edit the frame
+        edited_frame_path = self.image_service.edit_frame(
+            session_id=edit_request.session_id,
+            frame_number=edit_request.frame_number,
+            edit_instructions=edit_request.edit_instructions,
+            storyboard_context=edit_request.storyboard_context,
+            user_id=edit_request.user_id
+        )
+        
+        if edit_request.pdf_profile:
+            GenerationCheckpoint(edit_request.session_id).set_pdf_profile(edit_request.pdf_profile)
+        
+        return FrameEditResponse(
+            success=True,
+            message=f'Frame {edit_request.frame_number} edited successfully',
+            frame_number=edit_request.frame_number,
+            image_path=edited_frame_path,
+            pdf_regenerated=False
+        )
+    
+    def edit_frames_stream(
+        self,
+        batch_request: BatchFrameEditRequest
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Edit several frames of a session's storyboard at once.
+        
+        The edits run concurrently and the edited frames replace the
+        originals together: if any edit fails, no frame changes.
+        
+        Args:
+            batch_request: The validated batch edit request
+        
+        Yields:
+            Dict events with per-frame progress, ending with 'frames_committed'
+        
+        Raises:
+            FileNotFoundError: If a frame doesn't exist
+            ValueError: If an edit fails
+        """
+        yield from self.batch_edit_service.edit_frames_stream(
+            session_id=batch_request.session_id,
+            edits=[(edit.frame_number, edit.edit_instructions) for edit in batch_request.edits],
+            storyboard_context=batch_request.storyboard_context,
+            user_id=batch_request.user_id
+        )
+        
+        if batch_request.pdf_profile:
+            GenerationCheckpoint(batch_request.session_id).set_pdf_profile(batch_request.pdf_profile)
+    
+    def regenerate_downstream_stream(
+        self,
+        session_id: str,
+        from_frame: int,
+        user_id: Optional[str] = None,
+        should_stop: Optional[Callable[[], bool]] = None
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Regenerate the frames after an edited frame from their saved descriptions.
+        
+        Args:
+            session_id: The session ID of the storyboard
+            from_frame: The edited frame the chain starts from
+            user_id: The user the frames are regenerated for, used for fair rate limiting
+            should_stop: Called between and during model calls; the chain
+                stops once it returns True
+        
+        Yields:
+            Dict events with per-frame progress, ending with 'cascade_stopped'
+            if the chain was stopped early
+        
+        Raises:
+            FileNotFoundError: If the storyboard or the edited frame doesn't exist
+            ValueError: If regenerating a frame fails
+        """
+        return self.downstream_service.regenerate_downstream_stream(
+            session_id,
+            from_frame,
+            user_id=user_id,
+            should_stop=should_stop
+        )
@@ -0,0 +1,51 @@
+"""
+Frame Lock Module
+
+Per-frame locks that serialize every change to one frame of a session.
+"""
+import os
+from contextlib import AbstractAsyncContextManager
+from app.services.file_lock import afile_lock
+from app.config import settings
+
+# Lock files live in a session subdirectory that is never served
+FRAME_LOCK_DIR = '.locks'
+FRAME_LOCK_POLL_SECONDS = 0.05
+
+
+def frame_lock_path(session_id: str, frame_number: int) -> str:
+    """
+    Get the path of the lock file guarding changes to a frame.
+    
+    Args:
+        session_id: The session ID containing the frame
+        frame_number: The frame number (1-based)
+    
+    Returns:
+        Path to the lock file
+    """
+    return os.path.join(
+        settings.OUTPUT_DIR,
+        session_id,
+        FRAME_LOCK_DIR,
+        f"frame_{frame_number:03d}.lock"
+    )
+
+
+def aframe_lock(session_id: str, frame_number: int) -> AbstractAsyncContextManager:
+    """
+    Hold a frame's lock without blocking the event loop.
+    
+    Edits of one frame apply one after another, each to the result of the
+    last, and a regenerated frame is never saved over an edit in progress;
+    changes to different frames run in parallel. The lock is shared with
+    other processes.
+    
+    Args:
+        session_id: The session ID containing the frame
+        frame_number: The frame number (1-based)
+    
+    Returns:
+        Async context manager holding the lock
+    """
+    return afile_lock(frame_lock_path(session_id, frame_number), FRAME_LOCK_POLL_SECONDS)
@@ -2,39 +2,58 @@
 Image Generation Service Module
 
 Business logic for sequential image generation from storyboard frames.
+Model calls run as coroutines on the shared background event loop; the
+sync methods are thin wrappers around their async variants.
 """
 import os
-import json
-from typing import List, Tuple, Generator, Dict, Any
+import time
+import asyncio
+from contextlib import aclosing
+from typing import AsyncGenerator, AsyncIterable, Iterable, List, Tuple, Generator, Dict, Any, Optional, Union
 from app.agents.image_generation_agent import ImageGenerationAgent
-from app.models.storyboard import FrameData
+from app.models.storyboard import FrameData, StoryboardOutput
+from app.services.checkpoint import GenerationCheckpoint
+from app.services.derivatives import frame_derivatives
+from app.services.event_loop import as_async_iterator, background_loop
+from app.services.frame_lock import aframe_lock
+from app.metrics import metrics
 from app.config import settings
 
 
 class ImageGenerationService:
     """Service for handling sequential image generation operations."""
     
-    def __init__(self):
-        """Initialize the image generation service."""
-        self.agent = ImageGenerationAgent()
+    # Generation modes
+    SEQUENTIAL = 'sequential'
+    ANCHOR_PARALLEL = 'anchor_parallel'
+    
+    def __init__(self, agent: Optional[ImageGenerationAgent] = None):
+        """
+        Initialize the image generation service.
+        
+        Args:
+            agent: Image generation agent to use. Defaults to a new agent.
+        """
+        self.agent = agent or ImageGenerationAgent()
         self._ensure_output_directory()
-        self._ensure_temp_directory()
     
     def _ensure_output_directory(self):
         """Create output directory if it doesn't exist."""
         os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
     
-    def _ensure_temp_directory(self):
-        """Create temporary directory for intermediate images."""
-        self.temp_dir = os.path.join(settings.OUTPUT_DIR, '.temp')
-        os.makedirs(self.temp_dir, exist_ok=True)
-    
-    def generate_sequential_images(self, frames: List[FrameData]) -> List[Tuple[int, bytes]]:
+    def generate_sequential_images(
+        self,
+        frames: List[FrameData],
+        user_id: Optional[str] = None,
+        use_cache: bool = True
+    ) -> List[Tuple[int, bytes]]:
         """
         Generate images sequentially, using each previous image as reference.
         
         Args:
             frames: List of FrameData with descriptions
+            user_id: The user the images are generated for, used for fair rate limiting
+            use_cache: Whether cached images may be reused instead of generating fresh ones
         
         Returns:
             List of tuples containing (frame_number, image_bytes)
@@ -42,52 +61,180 @@ class ImageGenerationService:
         Raises:
             ValueError: If image generation fails
         """
-        generated_images = []
-        previous_image_path = None
+        return self.generate_images(frames, self.SEQUENTIAL, user_id=user_id, use_cache=use_cache)
+    
+    def generate_sequential_images_stream(
+        self, 
+        frames: Iterable[FrameData],
+        user_id: Optional[str] = None,
+        use_cache: bool = True
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Generate images sequentially with progress events.
+        
+        Args:
+            frames: FrameData with descriptions, consumed lazily in order
+            user_id: The user the images are generated for, used for fair rate limiting
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+        
+        Yields:
+            Dict events with frame progress information
+        
+        Raises:
+            ValueError: If image generation fails
+        """
+        return background_loop.iterate(
+            self.agenerate_sequential_images_stream(frames, user_id=user_id, use_cache=use_cache)
+        )
+    
+    async def agenerate_sequential_images_stream(
+        self, 
+        frames: Union[Iterable[FrameData], AsyncIterable[FrameData]],
+        user_id: Optional[str] = None,
+        use_cache: bool = True,
+        checkpoint: Optional[GenerationCheckpoint] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Async variant of generate_sequential_images_stream.
+        
+        With a checkpoint, frames already saved in it are restored instead of
+        generated, and the last restored frame becomes the reference image
+        for the next one; every new frame is saved as soon as it exists.
         
-        for frame in frames:
+        Args:
+            frames: FrameData with descriptions, consumed lazily in order
+            user_id: The user the images are generated for, used for fair rate limiting
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+            checkpoint: Optional checkpoint to restore frames from and save frames to
+        
+        Yields:
+            Dict events with frame progress information
+        
+        Raises:
+            ValueError: If image generation fails
+        """
+        previous_image = None
+        
+        async for frame in as_async_iterator(frames):
+            restored_image = await self._aload_checkpointed_frame(checkpoint, frame.frame_number)
+            if restored_image is not None:
+                previous_image = restored_image
+                yield {
+                    'type': 'frame_complete',
+                    'frame_number': frame.frame_number,
+                    'image_bytes': restored_image,
+                    'restored': True
+                }
+                continue
+            
+            # Emit frame start event
+            yield {
+                'type': 'frame_start',
+                'frame_number': frame.frame_number
+            }
+            
             try:
-                if previous_image_path is None:
+                if previous_image is None:
                     # First frame: generate from description only
-                    image_bytes = self.agent.generate_first_image(frame.description)
+                    image_bytes = await self.agent.agenerate_first_image(
+                        frame.description, user_id=user_id, use_cache=use_cache
+                    )
                 else:
                     # Subsequent frames: use previous image as reference
-                    image_bytes = self.agent.generate_next_image(
+                    image_bytes = await self.agent.agenerate_next_image(
                         description=frame.description,
-                        previous_image_path=previous_image_path
+                        previous_image=previous_image,
+                        user_id=user_id,
+                        use_cache=use_cache
                     )
                 
-                generated_images.append((frame.frame_number, image_bytes))
+                # Hand the current image to the next iteration in memory
+                previous_image = image_bytes
                 
-                # Save current image to temp file for next iteration reference
-                previous_image_path = os.path.join(
-                    self.temp_dir,
-                    f"temp_frame_{frame.frame_number}.png"
-                )
-                with open(previous_image_path, 'wb') as f:
-                    f.write(image_bytes)
+                await self._asave_checkpointed_frame(checkpoint, frame.frame_number, image_bytes)
                 
-            except (IOError, OSError, FileNotFoundError, ValueError) as e:
-                # Clean up temp files on error
-                self._cleanup_temp_files()
+            except (IOError, OSError, ValueError) as e:
                 raise ValueError(
                     f"Failed to generate image for frame {frame.frame_number}: {str(e)}"
                 )
+            
+            # Emit frame complete event
+            yield {
+                'type': 'frame_complete',
+                'frame_number': frame.frame_number,
+                'image_bytes': image_bytes
+            }
+    
+    def generate_anchor_parallel_images(
+        self,
+        frames: List[FrameData],
+        user_id: Optional[str] = None,
+        use_cache: bool = True
+    ) -> List[Tuple[int, bytes]]:
+        """
+        Generate the first frame, then all remaining frames concurrently from it.
+        
+        Args:
+            frames: List of FrameData with descriptions
+            user_id: The user the images are generated for, used for fair rate limiting
+            use_cache: Whether cached images may be reused instead of generating fresh ones
         
-        # Clean up temp files after successful generation
-        self._cleanup_temp_files()
+        Returns:
+            List of tuples containing (frame_number, image_bytes) in frame order
         
-        return generated_images
+        Raises:
+            ValueError: If image generation fails
+        """
+        return self.generate_images(frames, self.ANCHOR_PARALLEL, user_id=user_id, use_cache=use_cache)
     
-    def generate_sequential_images_stream(
-        self, 
-        frames: List[FrameData]
+    def generate_anchor_parallel_images_stream(
+        self,
+        frames: Iterable[FrameData],
+        user_id: Optional[str] = None,
+        use_cache: bool = True
     ) -> Generator[Dict[str, Any], None, None]:
         """
-        Generate images sequentially with progress events.
+        Generate images in anchor-parallel mode with progress events.
         
         Args:
-            frames: List of FrameData with descriptions
+            frames: FrameData with descriptions, consumed lazily in order
+            user_id: The user the images are generated for, used for fair rate limiting
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+        
+        Yields:
+            Dict events with frame progress information
+        
+        Raises:
+            ValueError: If image generation fails
+        """
+        return background_loop.iterate(
+            self.agenerate_anchor_parallel_images_stream(frames, user_id=user_id, use_cache=use_cache)
+        )
+    
+    async def agenerate_anchor_parallel_images_stream(
+        self,
+        frames: Union[Iterable[FrameData], AsyncIterable[FrameData]],
+        user_id: Optional[str] = None,
+        use_cache: bool = True,
+        checkpoint: Optional[GenerationCheckpoint] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Generate images in anchor-parallel mode with progress events.
+        
+        The first frame is generated from its description alone and becomes
+        the anchor. Every other frame uses the anchor as its reference image,
+        so they don't depend on each other and are generated concurrently as
+        tasks on the event loop, at most ANCHOR_PARALLEL_MAX_WORKERS at a time.
+        Wall-clock time is about two image calls instead of one per frame.
+        Frames complete in any order. With a checkpoint, frames already saved
+        in it (including the anchor) are restored instead of generated, and
+        every new frame is saved as soon as it exists.
+        
+        Args:
+            frames: FrameData with descriptions, consumed lazily in order
+            user_id: The user the images are generated for, used for fair rate limiting
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+            checkpoint: Optional checkpoint to restore frames from and save frames to
         
         Yields:
             Dict events with frame progress information
@@ -95,58 +242,234 @@ class ImageGenerationService:
         Raises:
             ValueError: If image generation fails
         """
-        previous_image_path = None
+        frames = as_async_iterator(frames)
+        try:
+            anchor_frame = await frames.__anext__()
+        except StopAsyncIteration:
+            return
         
-        for frame in frames:
-            # Emit frame start event
+        anchor_bytes = await self._aload_checkpointed_frame(checkpoint, anchor_frame.frame_number)
+        if anchor_bytes is not None:
+            yield {
+                'type': 'frame_complete',
+                'frame_number': anchor_frame.frame_number,
+                'image_bytes': anchor_bytes,
+                'restored': True
+            }
+        else:
             yield {
                 'type': 'frame_start',
-                'frame_number': frame.frame_number
+                'frame_number': anchor_frame.frame_number
             }
             
             try:
-                if previous_image_path is None:
-                    image_bytes = self.agent.generate_first_image(frame.description)
-                else:
-                    image_bytes = self.agent.generate_next_image(
+                anchor_bytes = await self.agent.agenerate_first_image(
+                    anchor_frame.description, user_id=user_id, use_cache=use_cache
+                )
+                await self._asave_checkpointed_frame(checkpoint, anchor_frame.frame_number, anchor_bytes)
+            except (IOError, OSError, ValueError) as e:
+                raise ValueError(
+                    f"Failed to generate image for frame {anchor_frame.frame_number}: {str(e)}"
+                )
+            
+            yield {
+                'type': 'frame_complete',
+                'frame_number': anchor_frame.frame_number,
+                'image_bytes': anchor_bytes
+            }
+        
+        semaphore = asyncio.Semaphore(settings.ANCHOR_PARALLEL_MAX_WORKERS)
+        
+        async def render(frame: FrameData) -> Tuple[FrameData, bytes]:
+            async with semaphore:
+                try:
+                    image_bytes = await self.agent.agenerate_next_image(
                         description=frame.description,
-                        previous_image_path=previous_image_path
+                        previous_image=anchor_bytes,
+                        user_id=user_id,
+                        use_cache=use_cache
                     )
+                    await self._asave_checkpointed_frame(checkpoint, frame.frame_number, image_bytes)
+                except (IOError, OSError, ValueError) as e:
+                    raise ValueError(
+                        f"Failed to generate image for frame {frame.frame_number}: {str(e)}"
+                    )
+            return frame, image_bytes
+        
+        tasks = []
+        try:
+            # Frames may still be arriving (e.g. from streamed segmentation)
+            async for frame in frames:
+                restored_image = await self._aload_checkpointed_frame(checkpoint, frame.frame_number)
+                if restored_image is not None:
+                    yield {
+                        'type': 'frame_complete',
+                        'frame_number': frame.frame_number,
+                        'image_bytes': restored_image,
+                        'restored': True
+                    }
+                    continue
                 
-                # Save current image to temp file for next iteration reference
-                previous_image_path = os.path.join(
-                    self.temp_dir,
-                    f"temp_frame_{frame.frame_number}.png"
-                )
-                with open(previous_image_path, 'wb') as f:
-                    f.write(image_bytes)
-                
-                # Emit frame complete event
+                tasks.append(asyncio.ensure_future(render(frame)))
+                yield {
+                    'type': 'frame_start',
+                    'frame_number': frame.frame_number
+                }
+            
+            for next_completed in asyncio.as_completed(tasks):
+                frame, image_bytes = await next_completed
                 yield {
                     'type': 'frame_complete',
                     'frame_number': frame.frame_number,
                     'image_bytes': image_bytes
                 }
-                
-            except (IOError, OSError, FileNotFoundError, ValueError) as e:
-                self._cleanup_temp_files()
-                raise ValueError(
-                    f"Failed to generate image for frame {frame.frame_number}: {str(e)}"
-                )
+        finally:
+            # Don't keep generating frames once one has failed
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def generate_images_stream(
+        self,
+        frames: Iterable[FrameData],
+        generation_mode: str = SEQUENTIAL,
+        user_id: Optional[str] = None,
+        use_cache: bool = True
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Generate images with progress events using the requested generation mode.
+        
+        Args:
+            frames: FrameData with descriptions, consumed lazily in order
+            generation_mode: 'sequential' or 'anchor_parallel'
+            user_id: The user the images are generated for, used for fair rate limiting
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+        
+        Yields:
+            Dict events with frame progress information
         
-        # Clean up temp files after successful generation
-        self._cleanup_temp_files()
+        Raises:
+            ValueError: If image generation fails
+        """
+        return background_loop.iterate(
+            self.agenerate_images_stream(frames, generation_mode, user_id=user_id, use_cache=use_cache)
+        )
     
-    def _cleanup_temp_files(self):
-        """Remove temporary files created during generation."""
-        if os.path.exists(self.temp_dir):
-            for file in os.listdir(self.temp_dir):
-                file_path = os.path.join(self.temp_dir, file)
-                try:
-                    if os.path.isfile(file_path):
-                        os.remove(file_path)
-                except (OSError, PermissionError):
-                    pass  # Ignore cleanup errors
+    def agenerate_images_stream(
+        self,
+        frames: Union[Iterable[FrameData], AsyncIterable[FrameData]],
+        generation_mode: str = SEQUENTIAL,
+        user_id: Optional[str] = None,
+        use_cache: bool = True,
+        checkpoint: Optional[GenerationCheckpoint] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Async variant of generate_images_stream.
+        
+        Args:
+            frames: FrameData with descriptions, consumed lazily in order
+            generation_mode: 'sequential' or 'anchor_parallel'
+            user_id: The user the images are generated for, used for fair rate limiting
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+            checkpoint: Optional checkpoint to restore frames from and save frames to
+        
+        Returns:
+            Async generator of dict events with frame progress information
+        """
+        if generation_mode == self.ANCHOR_PARALLEL:
+            stream = self.agenerate_anchor_parallel_images_stream
+        else:
+            stream = self.agenerate_sequential_images_stream
+        return stream(frames, user_id=user_id, use_cache=use_cache, checkpoint=checkpoint)
+    
+    def generate_images(
+        self,
+        frames: List[FrameData],
+        generation_mode: str = SEQUENTIAL,
+        user_id: Optional[str] = None,
+        use_cache: bool = True
+    ) -> List[Tuple[int, bytes]]:
+        """
+        Generate images using the requested generation mode.
+        
+        Args:
+            frames: List of FrameData with descriptions
+            generation_mode: 'sequential' or 'anchor_parallel'
+            user_id: The user the images are generated for, used for fair rate limiting
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+        
+        Returns:
+            List of tuples containing (frame_number, image_bytes) in frame order
+        
+        Raises:
+            ValueError: If image generation fails
+        """
+        return background_loop.run(
+            self.agenerate_images(frames, generation_mode, user_id=user_id, use_cache=use_cache)
+        )
+    
+    async def agenerate_images(
+        self,
+        frames: List[FrameData],
+        generation_mode: str = SEQUENTIAL,
+        user_id: Optional[str] = None,
+        use_cache: bool = True,
+        checkpoint: Optional[GenerationCheckpoint] = None
+    ) -> List[Tuple[int, bytes]]:
+        """
+        Async variant of generate_images.
+        
+        Args:
+            frames: List of FrameData with descriptions
+            generation_mode: 'sequential' or 'anchor_parallel'
+            user_id: The user the images are generated for, used for fair rate limiting
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+            checkpoint: Optional checkpoint to restore frames from and save frames to
+        
+        Returns:
+            List of tuples containing (frame_number, image_bytes) in frame order
+        
+        Raises:
+            ValueError: If image generation fails
+        """
+        generated_images = []
+        async with aclosing(
+            self.agenerate_images_stream(
+                frames,
+                generation_mode,
+                user_id=user_id,
+                use_cache=use_cache,
+                checkpoint=checkpoint
+            )
+        ) as events:
+            async for event in events:
+                if event['type'] == 'frame_complete':
+                    generated_images.append((event['frame_number'], event['image_bytes']))
+        
+        # Frames may complete out of order in anchor-parallel mode
+        generated_images.sort(key=lambda image: image[0])
+        return generated_images
+    
+    @staticmethod
+    async def _aload_checkpointed_frame(
+        checkpoint: Optional[GenerationCheckpoint],
+        frame_number: int
+    ) -> Optional[bytes]:
+        """Load a frame saved by an earlier run, or None if there is none."""
+        if checkpoint is None:
+            return None
+        return await asyncio.to_thread(checkpoint.load_frame, frame_number)
+    
+    @staticmethod
+    async def _asave_checkpointed_frame(
+        checkpoint: Optional[GenerationCheckpoint],
+        frame_number: int,
+        image_bytes: bytes
+    ) -> None:
+        """Save a newly generated frame so a resumed run doesn't pay for it again."""
+        if checkpoint is not None:
+            frame_path = await asyncio.to_thread(checkpoint.save_frame, frame_number, image_bytes)
+            await frame_derivatives.agenerate_quietly(frame_path)
     
     def save_images(self, images: List[Tuple[int, bytes]], session_id: str) -> List[str]:
         """
@@ -159,20 +482,16 @@ class ImageGenerationService:
         Returns:
             List of file paths where images were saved
         """
-        session_dir = os.path.join(settings.OUTPUT_DIR, session_id)
-        os.makedirs(session_dir, exist_ok=True)
+        checkpoint = GenerationCheckpoint(session_id)
         
-        saved_paths = []
-        for frame_number, image_bytes in images:
-            file_path = os.path.join(
-                session_dir, 
-                f"frame_{frame_number:03d}.png"
-            )
-            
-            with open(file_path, 'wb') as f:
-                f.write(image_bytes)
-            
-            saved_paths.append(file_path)
+        # Staged in the job workspace so readers never see a partial file
+        saved_paths = [
+            checkpoint.save_frame(frame_number, image_bytes)
+            for frame_number, image_bytes in images
+        ]
+        
+        for file_path in saved_paths:
+            background_loop.run(frame_derivatives.agenerate_quietly(file_path))
         
         return saved_paths
     
@@ -181,7 +500,8 @@ class ImageGenerationService:
         session_id: str, 
         frame_number: int, 
         edit_instructions: str,
-        storyboard_context: str
+        storyboard_context: str,
+        user_id: Optional[str] = None
     ) -> str:
         """
         Edit a specific frame in a storyboard session.
@@ -191,6 +511,40 @@ class ImageGenerationService:
             frame_number: The frame number to edit (1-based)
             edit_instructions: User's instructions for modifying the frame
             storyboard_context: The overall storyboard description for context
+            user_id: The user requesting the edit, used for fair rate limiting
+        
+        Returns:
+            Path to the edited frame image
+        
+        Raises:
+            FileNotFoundError: If the frame doesn't exist
+            ValueError: If editing fails
+        """
+        return background_loop.run(self.aedit_frame(
+            session_id,
+            frame_number,
+            edit_instructions,
+            storyboard_context,
+            user_id=user_id
+        ))
+    
+    async def aedit_frame(
+        self, 
+        session_id: str, 
+        frame_number: int, 
+        edit_instructions: str,
+        storyboard_context: str,
+        user_id: Optional[str] = None
+    ) -> str:
+        """
+        Async variant of edit_frame.
+        
+        Args:
+            session_id: The session ID containing the frame
+            frame_number: The frame number to edit (1-based)
+            edit_instructions: User's instructions for modifying the frame
+            storyboard_context: The overall storyboard description for context
+            user_id: The user requesting the edit, used for fair rate limiting
         
         Returns:
             Path to the edited frame image
@@ -200,32 +554,59 @@ class ImageGenerationService:
             ValueError: If editing fails
         """
         # Build the path to the current frame
-        session_dir = os.path.join(settings.OUTPUT_DIR, session_id)
-        current_frame_path = os.path.join(
-            session_dir, 
-            f"frame_{frame_number:03d}.png"
-        )
+        checkpoint = GenerationCheckpoint(session_id)
+        current_frame_path = checkpoint.frame_path(frame_number)
         
         if not os.path.isfile(current_frame_path):
             raise FileNotFoundError(f"Frame {frame_number} not found in session {session_id}")
         
         try:
-            # Generate edited frame using the agent
-            edited_image_bytes = self.agent.edit_frame(
-                current_image_path=current_frame_path,
-                edit_instructions=edit_instructions,
-                storyboard_context=storyboard_context
-            )
-            
-            # Overwrite the original frame with the edited version
-            with open(current_frame_path, 'wb') as f:
-                f.write(edited_image_bytes)
-            
+            # Edits of one frame apply one after another, each to the result
+            # of the last; edits of other frames in the session run in parallel
+            frame_lock = aframe_lock(session_id, frame_number)
+            lock_requested = time.monotonic()
+            async with frame_lock:
+                metrics.observe('frame_edit.lock_wait_seconds', time.monotonic() - lock_requested)
+                
+                current_image = await asyncio.to_thread(checkpoint.load_frame, frame_number)
+                if current_image is None:
+                    raise FileNotFoundError(f"Frame {frame_number} was removed")
+                
+                # Generate edited frame using the agent
+                edited_image_bytes = await self.agent.aedit_frame(
+                    current_image=current_image,
+                    edit_instructions=edit_instructions,
+                    storyboard_context=storyboard_context,
+                    user_id=user_id
+                )
+                
+                # Atomically replace the original frame with the edited version
+                await asyncio.to_thread(checkpoint.save_frame, frame_number, edited_image_bytes)
+                
+                await frame_derivatives.agenerate_quietly(current_frame_path)
             return current_frame_path
             
         except (IOError, OSError, ValueError) as e:
             raise ValueError(f"Failed to edit frame {frame_number}: {str(e)}")
     
+    @staticmethod
+    def get_frame_path(session_id: str, frame_number: int) -> str:
+        """
+        Get the path of a frame image in a session.
+        
+        Args:
+            session_id: The session ID containing the frame
+            frame_number: The frame number (1-based)
+        
+        Returns:
+            Path to the frame image, whether or not it exists
+        """
+        return os.path.join(
+            settings.OUTPUT_DIR,
+            session_id,
+            f"frame_{frame_number:03d}.png"
+        )
+    
     def get_session_frame_paths(self, session_id: str) -> List[str]:
         """
         Get all frame image paths for a session in order.
@@ -236,18 +617,7 @@ class ImageGenerationService:
         Returns:
             List of frame image paths sorted by frame number
         """
-        session_dir = os.path.join(settings.OUTPUT_DIR, session_id)
-        
-        if not os.path.isdir(session_dir):
-            return []
-        
-        frame_files = [
-            f for f in os.listdir(session_dir) 
-            if f.startswith('frame_') and f.endswith('.png')
-        ]
-        frame_files.sort()
-        
-        return [os.path.join(session_dir, f) for f in frame_files]
+        return list(GenerationCheckpoint(session_id).frame_paths().values())
     
     def save_frame_descriptions(self, frames: List[FrameData], session_id: str) -> None:
         """
@@ -257,22 +627,9 @@ class ImageGenerationService:
             frames: List of FrameData with descriptions
             session_id: Unique session identifier
         """
-        session_dir = os.path.join(settings.OUTPUT_DIR, session_id)
-        os.makedirs(session_dir, exist_ok=True)
-        
-        metadata = {
-            'frames': [
-                {
-                    'frame_number': frame.frame_number,
-                    'description': frame.description
-                }
-                for frame in frames
-            ]
-        }
-        
-        metadata_path = os.path.join(session_dir, 'metadata.json')
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        GenerationCheckpoint(session_id).save_storyboard(
+            StoryboardOutput(total_frames=len(frames), frames=frames)
+        )
     
     def load_frame_descriptions(self, session_id: str) -> List[str]:
         """
@@ -284,21 +641,10 @@ class ImageGenerationService:
         Returns:
             List of frame descriptions in order, or empty list if not found
         """
-        session_dir = os.path.join(settings.OUTPUT_DIR, session_id)
-        metadata_path = os.path.join(session_dir, 'metadata.json')
-        
-        if not os.path.isfile(metadata_path):
-            return []
-        
-        try:
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
-            
-            # Sort by frame_number and extract descriptions
-            frames = sorted(metadata['frames'], key=lambda x: x['frame_number'])
-            return [frame['description'] for frame in frames]
-        except (json.JSONDecodeError, KeyError, IOError):
+        storyboard = GenerationCheckpoint(session_id).load_storyboard()
+        if storyboard is None:
             return []
+        return [frame.description for frame in storyboard.frames]
     
     def delete_pdf(self, session_id: str) -> bool:
         """
@@ -0,0 +1,614 @@
+"""
+Job Queue Module
+
+Runs storyboard generation, frame edits and PDF renders on a pool of background workers.
+"""
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.models.storyboard import (
+    StoryboardRequest,
+    StoryboardResumeRequest,
+    FrameEditRequest,
+    BatchFrameEditRequest,
+    BatchFrameEditResponse
+)
+from app.services.job_store import JobStore
+from app.services.registry import ServiceRegistry
+from app.services.streaming_storyboard_service import StreamingStoryboardService
+from app.metrics import metrics
+from app.config import settings
+
+
+class JobQueue:
+    """
+    Background job queue backed by a persistent JobStore.
+    
+    Submitting a job records it in the store and returns its ID immediately.
+    A dispatcher thread claims queued jobs from the store whenever a worker
+    thread is free; the worker runs the pipeline and records progress events
+    and the final result in the store, where status endpoints can read them.
+    
+    Because jobs are claimed from the shared store, a queue that only
+    records jobs (run_jobs=False) can hand them to a separate worker
+    process, which keeps pipeline threads out of the web server.
+    
+    Once a session's frame edits settle (none running and none finished
+    for PDF_REBUILD_DEBOUNCE_SECONDS), one PDF render is queued for the
+    whole burst, so the next download doesn't wait for it.
+    
+    An edit with cascade set queues a job regenerating the frames after
+    the edited one. Any later edit of the session supersedes it: the
+    cascade stops before its next model call (or abandons the one in
+    flight) and ends as cancelled.
+    
+    A bulk job generates a whole list of storyboards, at most
+    BULK_MAX_CONCURRENCY at a time within the job, and records an
+    'item_complete' event as each one finishes. Cancelling it skips the
+    storyboards that haven't started; the ones in progress finish.
+    """
+    
+    STORYBOARD = 'storyboard'
+    STORYBOARD_RESUME = 'storyboard_resume'
+    EDIT_FRAME = 'edit_frame'
+    BATCH_EDIT = 'batch_edit'
+    CASCADE = 'cascade'
+    BULK = 'bulk'
+    PDF_RENDER = 'pdf_render'
+    
+    # Job kinds whose submission supersedes a running cascade of the session
+    CASCADE_SUPERSEDED_BY = (EDIT_FRAME, BATCH_EDIT)
+    
+    def __init__(
+        self,
+        store: JobStore,
+        registry: ServiceRegistry,
+        max_workers: int,
+        run_jobs: bool = True
+    ):
+        """
+        Initialize the job queue.
+        
+        Args:
+            store: The persistent job store
+            registry: Shared services used to run jobs
+            max_workers: Number of worker threads running jobs
+            run_jobs: Whether this process claims and runs jobs. When False,
+                jobs are only recorded for another process to run.
+        """
+        self.store = store
+        self.registry = registry
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._edits_lock = threading.Lock()
+        self._edits_running: Dict[str, int] = {}
+        self._pdf_rebuilds: Dict[str, threading.Timer] = {}
+        self._handlers: Dict[str, Callable[[str, Dict[str, Any]], Dict[str, Any]]] = {
+            self.STORYBOARD: self._run_storyboard,
+            self.STORYBOARD_RESUME: self._run_storyboard_resume,
+            self.EDIT_FRAME: self._run_frame_edit,
+            self.BATCH_EDIT: self._run_batch_edit,
+            self.CASCADE: self._run_cascade,
+            self.BULK: self._run_bulk,
+            self.PDF_RENDER: self._run_pdf_render
+        }
+        
+        if run_jobs:
+            self.executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix='job-worker'
+            )
+            self._dispatcher = threading.Thread(
+                target=self._dispatch,
+                name='job-dispatcher',
+                daemon=True
+            )
+            self._dispatcher.start()
+    
+    def submit_storyboard(self, storyboard_request: StoryboardRequest) -> str:
+        """
+        Queue a complete storyboard generation.
+        
+        Args:
+            storyboard_request: The validated storyboard request
+        
+        Returns:
+            The job ID
+        """
+        return self._submit(self.STORYBOARD, storyboard_request.model_dump())
+    
+    def submit_storyboard_resume(self, resume_request: StoryboardResumeRequest) -> str:
+        """
+        Queue the continuation of an interrupted storyboard generation.
+        
+        Args:
+            resume_request: The validated resume request
+        
+        Returns:
+            The job ID
+        """
+        return self._submit(self.STORYBOARD_RESUME, resume_request.model_dump())
+    
+    def submit_frame_edit(self, edit_request: FrameEditRequest) -> str:
+        """
+        Queue a frame edit.
+        
+        Args:
+            edit_request: The validated frame edit request
+        
+        Returns:
+            The job ID
+        """
+        return self._submit(self.EDIT_FRAME, edit_request.model_dump())
+    
+    def submit_batch_edit(self, batch_request: BatchFrameEditRequest) -> str:
+        """
+        Queue edits of several frames of one session.
+        
+        Args:
+            batch_request: The validated batch edit request
+        
+        Returns:
+            The job ID
+        """
+        return self._submit(self.BATCH_EDIT, batch_request.model_dump())
+    
+    def submit_bulk(self, storyboard_requests: List[StoryboardRequest]) -> str:
+        """
+        Queue generating several storyboards as one job.
+        
+        Args:
+            storyboard_requests: The validated storyboard requests, in order
+        
+        Returns:
+            The job ID
+        """
+        return self._submit(self.BULK, {
+            'items': [storyboard_request.model_dump() for storyboard_request in storyboard_requests]
+        })
+    
+    def cancel(self, job_id: str) -> None:
+        """
+        Cancel a queued job, or ask a running one to stop.
+        
+        Args:
+            job_id: The job ID
+        """
+        if self.store.request_cancel(job_id):
+            self.store.append_event(job_id, {'type': 'cancelled', 'message': 'Cancelled before it started'})
+    
+    def submit_pdf_render(self, session_id: str) -> str:
+        """
+        Queue rendering a session's storyboard PDF, unless it is already current.
+        
+        A render already waiting for the session is shared rather than
+        queued again, since it reads the session when it starts.
+        
+        Args:
+            session_id: The storyboard session ID
+        
+        Returns:
+            The job ID
+        """
+        queued_job_id = self.store.find_queued_job(self.PDF_RENDER, session_id)
+        if queued_job_id is not None:
+            metrics.increment('pdf.renders_coalesced')
+            return queued_job_id
+        return self._submit(self.PDF_RENDER, {'session_id': session_id})
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop claiming jobs and optionally wait for running ones."""
+        self._stopping.set()
+        self._wakeup.set()
+        
+        # Pending rebuilds are dropped; the next download renders the PDF instead
+        with self._edits_lock:
+            for timer in self._pdf_rebuilds.values():
+                timer.cancel()
+            self._pdf_rebuilds.clear()
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+    
+    def _submit(self, kind: str, payload: Dict[str, Any]) -> str:
+        """Record a job in the store and wake the dispatcher."""
+        job_id = self.store.create_job(kind, payload)
+        self._wakeup.set()
+        return job_id
+    
+    def _dispatch(self) -> None:
+        """Claim queued jobs from the store whenever a worker thread is free."""
+        while not self._stopping.is_set():
+            if not self._slots.acquire(timeout=settings.JOB_CLAIM_POLL_SECONDS):
+                continue
+            
+            # Clear first so a submit during the claim isn't missed
+            self._wakeup.clear()
+            try:
+                job = None if self._stopping.is_set() else self.store.claim_next_job()
+            except sqlite3.Error:
+                job = None  # Database busy; retry on the next poll
+            
+            if job is None:
+                self._slots.release()
+                self._wakeup.wait(settings.JOB_CLAIM_POLL_SECONDS)
+                continue
+            
+            future = self.executor.submit(self._execute, job['job_id'], job['kind'], job['payload'])
+            future.add_done_callback(lambda _: self._slots.release())
+    
+    def _execute(self, job_id: str, kind: str, payload: Dict[str, Any]) -> None:
+        """Run a claimed job and record its outcome."""
+        try:
+            result = self._handlers[kind](job_id, payload)
+            self.store.mark_succeeded(job_id, result)
+        except JobFailedError as e:
+            self._fail(job_id, str(e), result=e.result)
+        except JobCancelledError as e:
+            self.store.append_event(job_id, {'type': 'cancelled', 'message': str(e), **(e.result or {})})
+            self.store.mark_cancelled(job_id, str(e), result=e.result)
+        except Exception as e:
+            # Workers must always leave the job in a terminal state
+            self._fail(job_id, f'{type(e).__name__}: {e}')
+    
+    def _fail(self, job_id: str, message: str, result: Dict[str, Any] = None) -> None:
+        """Record a final error event and mark the job as failed."""
+        self.store.append_event(job_id, {'type': 'error', 'message': message, **(result or {})})
+        self.store.mark_failed(job_id, message, result=result)
+    
+    def _run_storyboard(self, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate a storyboard, recording every progress event."""
+        storyboard_request = StoryboardRequest(**payload)
+        service = self.registry.streaming_storyboard_service()
+        
+        return self._record_storyboard_events(job_id, service.generate_complete_storyboard_stream(
+            storyboard_request.user_description,
+            user_id=storyboard_request.user_id,
+            generation_mode=storyboard_request.generation_mode,
+            use_cache=not storyboard_request.bypass_cache,
+            pdf_profile=storyboard_request.pdf_profile
+        ))
+    
+    def _run_storyboard_resume(self, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Continue an interrupted storyboard from its checkpoint, recording every progress event."""
+        resume_request = StoryboardResumeRequest(**payload)
+        service = self.registry.streaming_storyboard_service()
+        
+        return self._record_storyboard_events(job_id, service.resume_storyboard_stream(
+            resume_request.session_id,
+            user_id=resume_request.user_id,
+            use_cache=not resume_request.bypass_cache
+        ))
+    
+    def _record_storyboard_events(
+        self,
+        job_id: str,
+        events: Iterator[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Record storyboard progress events and return the final result."""
+        for event in events:
+            if event['type'] == 'error':
+                # Keep the session ID so the client can resume the storyboard
+                session_id = event.get('session_id')
+                raise JobFailedError(
+                    event['message'],
+                    result={'session_id': session_id} if session_id else None
+                )
+            
+            self.store.append_event(job_id, event)
+            
+            if event['type'] == 'complete':
+                return {key: value for key, value in event.items() if key != 'type'}
+        
+        raise JobFailedError('Storyboard generation ended without a result')
+    
+    def _run_frame_edit(self, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Edit a frame; the session PDF is re-rendered once the session's edits settle."""
+        edit_request = FrameEditRequest(**payload)
+        service = self.registry.frame_edit_service()
+        session_id = edit_request.session_id
+        
+        self.store.append_event(job_id, {
+            'type': 'step_start',
+            'step_name': 'editing',
+            'frame_number': edit_request.frame_number,
+            'message': f'Editing frame {edit_request.frame_number}...'
+        })
+        
+        self._start_edit(session_id)
+        try:
+            response = service.edit_frame(edit_request)
+            if edit_request.cascade:
+                response.cascade_job_id = self._submit(self.CASCADE, {
+                    'session_id': session_id,
+                    'from_frame': edit_request.frame_number,
+                    'user_id': edit_request.user_id,
+                    'edit_job_id': job_id
+                })
+        except (FileNotFoundError, ValueError, IOError, OSError) as e:
+            raise JobFailedError(f'Frame edit failed: {str(e)}')
+        finally:
+            self._finish_edit(session_id)
+        
+        result = response.model_dump()
+        self.store.append_event(job_id, {'type': 'complete', **result})
+        return result
+    
+    def _run_batch_edit(self, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Edit several frames, replace them together and render the PDF once."""
+        batch_request = BatchFrameEditRequest(**payload)
+        service = self.registry.frame_edit_service()
+        session_id = batch_request.session_id
+        
+        # Counted as a running edit, so single-frame edits finishing
+        # meanwhile leave their PDF rebuild to the render below
+        self._start_edit(session_id)
+        try:
+            committed = self._record_batch_edit(job_id, service.edit_frames_stream(batch_request))
+            
+            self.store.append_event(job_id, {
+                'type': 'step_start',
+                'step_name': 'rendering',
+                'message': 'Rendering PDF storyboard...'
+            })
+            try:
+                pdf_path = self.registry.pdf_generator.ensure_storyboard_pdf(session_id)
+            except (FileNotFoundError, ValueError, IOError, OSError) as e:
+                # The frames are already replaced; the next download retries the PDF
+                raise JobFailedError(
+                    f'PDF rendering failed: {str(e)}',
+                    result={'session_id': session_id, 'frame_numbers': committed['frame_numbers']}
+                )
+        finally:
+            with self._edits_lock:
+                self._release_edit(session_id)
+        
+        result = BatchFrameEditResponse(
+            success=True,
+            message=f"{len(committed['frame_numbers'])} frames edited successfully",
+            frame_numbers=committed['frame_numbers'],
+            image_paths=committed['image_paths'],
+            storyboard_path=pdf_path
+        ).model_dump()
+        self.store.append_event(job_id, {'type': 'complete', **result})
+        return result
+    
+    def _run_cascade(self, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Regenerate the frames after an edited frame until a later edit supersedes the chain."""
+        service = self.registry.frame_edit_service()
+        session_id = payload['session_id']
+        
+        def superseded() -> bool:
+            # Later edits include ones queued before this cascade was, while the edit finished
+            return (
+                self.store.is_cancel_requested(job_id)
+                or self.store.has_newer_job(self.CASCADE_SUPERSEDED_BY, session_id, payload['edit_job_id'])
+            )
+        
+        regenerated = []
+        self._start_edit(session_id)
+        try:
+            events = service.regenerate_downstream_stream(
+                session_id,
+                payload['from_frame'],
+                user_id=payload.get('user_id'),
+                should_stop=superseded
+            )
+            for event in events:
+                if event['type'] == 'cascade_stopped':
+                    if self.store.is_cancel_requested(job_id):
+                        reason = 'Cancelled'
+                    else:
+                        reason = 'Superseded by a newer edit'
+                        metrics.increment('cascade.superseded')
+                    raise JobCancelledError(
+                        f"{reason}: {event['message']}",
+                        result={'session_id': session_id, 'frame_numbers': event['frame_numbers']}
+                    )
+                self.store.append_event(job_id, event)
+                if event['type'] == 'frame_regenerated':
+                    regenerated.append(event['frame_number'])
+        except (FileNotFoundError, ValueError, IOError, OSError) as e:
+            # Frames regenerated before the failure stay; they match the chain so far
+            raise JobFailedError(
+                f'Cascade regeneration failed: {str(e)}',
+                result={'session_id': session_id, 'frame_numbers': regenerated}
+            )
+        finally:
+            self._finish_edit(session_id)
+        
+        result = {
+            'session_id': session_id,
+            'from_frame': payload['from_frame'],
+            'frame_numbers': regenerated,
+            'message': f'{len(regenerated)} following frames regenerated'
+        }
+        self.store.append_event(job_id, {'type': 'complete', **result})
+        return result
+    
+    def _run_bulk(self, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate a list of storyboards a few at a time, recording each result as it finishes."""
+        storyboard_requests = [StoryboardRequest(**item) for item in payload['items']]
+        service = self.registry.streaming_storyboard_service()
+        started_at = time.time()
+        
+        max_concurrency = max(1, min(settings.BULK_MAX_CONCURRENCY, len(storyboard_requests)))
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='bulk-item') as items:
+            # Items are taken in order; each checks for cancellation when its turn comes
+            results = list(items.map(
+                lambda item: self._run_bulk_item(job_id, item[0], item[1], service, started_at),
+                enumerate(storyboard_requests)
+            ))
+        
+        summary = {
+            'total': len(results),
+            **{
+                status: sum(1 for result in results if result['status'] == status)
+                for status in ('succeeded', 'failed', 'cancelled')
+            },
+            'duration_seconds': round(time.time() - started_at, 3)
+        }
+        if summary['cancelled']:
+            raise JobCancelledError(
+                f"Bulk submission cancelled after {summary['total'] - summary['cancelled']} of {summary['total']} storyboards",
+                result=summary
+            )
+        
+        self.store.append_event(job_id, {'type': 'complete', **summary})
+        return summary
+    
+    def _run_bulk_item(
+        self,
+        job_id: str,
+        index: int,
+        storyboard_request: StoryboardRequest,
+        service: StreamingStoryboardService,
+        bulk_started_at: float
+    ) -> Dict[str, Any]:
+        """Generate one storyboard of a bulk job and record its result."""
+        started_at = time.time()
+        result = {
+            'index': index,
+            'status': 'cancelled',
+            'session_id': None,
+            'storyboard_path': None,
+            'error': None,
+            'queued_seconds': round(started_at - bulk_started_at, 3),
+            'duration_seconds': 0.0
+        }
+        
+        if not self.store.is_cancel_requested(job_id):
+            try:
+                for event in service.generate_complete_storyboard_stream(
+                    storyboard_request.user_description,
+                    user_id=storyboard_request.user_id,
+                    generation_mode=storyboard_request.generation_mode,
+                    use_cache=not storyboard_request.bypass_cache,
+                    pdf_profile=storyboard_request.pdf_profile
+                ):
+                    if event.get('session_id') and result['session_id'] is None:
+                        # Recorded before frames are written, so the sweeper keeps the session
+                        result['session_id'] = event['session_id']
+                        self.store.append_event(job_id, {
+                            'type': 'item_started',
+                            'index': index,
+                            'session_id': event['session_id']
+                        })
+                    if event['type'] == 'error':
+                        result.update(status='failed', error=event['message'])
+                        break
+                    if event['type'] == 'complete':
+                        result.update(status='succeeded', storyboard_path=event['storyboard_path'])
+                        break
+                else:
+                    result.update(status='failed', error='Storyboard generation ended without a result')
+            except Exception as e:
+                # One storyboard failing must not fail the rest of the batch
+                result.update(status='failed', error=f'{type(e).__name__}: {e}')
+            result['duration_seconds'] = round(time.time() - started_at, 3)
+        
+        metrics.increment(f"bulk.items_{result['status']}")
+        self.store.append_event(job_id, {'type': 'item_complete', **result})
+        return result
+    
+    def _record_batch_edit(self, job_id: str, events: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+        """Record batch edit progress events and return the commit event."""
+        committed = None
+        try:
+            for event in events:
+                self.store.append_event(job_id, event)
+                if event['type'] == 'frames_committed':
+                    committed = event
+        except (FileNotFoundError, ValueError, IOError, OSError) as e:
+            raise JobFailedError(f'Batch edit failed: {str(e)}')
+        
+        if committed is None:
+            raise JobFailedError('Batch edit ended without replacing the frames')
+        return committed
+    
+    def _start_edit(self, session_id: str) -> None:
+        """Count one more running edit of a session."""
+        with self._edits_lock:
+            self._edits_running[session_id] = self._edits_running.get(session_id, 0) + 1
+    
+    def _finish_edit(self, session_id: str) -> None:
+        """Restart the session's PDF rebuild countdown after one of its edits ends."""
+        if settings.PDF_REBUILD_DEBOUNCE_SECONDS <= 0:
+            with self._edits_lock:
+                self._release_edit(session_id)
+            return
+        
+        timer = threading.Timer(
+            settings.PDF_REBUILD_DEBOUNCE_SECONDS,
+            self._rebuild_pdf,
+            args=(session_id,)
+        )
+        timer.daemon = True
+        with self._edits_lock:
+            self._release_edit(session_id)
+            if self._stopping.is_set():
+                return
+            pending = self._pdf_rebuilds.pop(session_id, None)
+            if pending is not None:
+                pending.cancel()
+                metrics.increment('pdf.rebuilds_debounced')
+            self._pdf_rebuilds[session_id] = timer
+        timer.start()
+    
+    def _release_edit(self, session_id: str) -> None:
+        """Count one edit of a session as finished. Call with the edits lock held."""
+        remaining = self._edits_running.get(session_id, 1) - 1
+        if remaining > 0:
+            self._edits_running[session_id] = remaining
+        else:
+            self._edits_running.pop(session_id, None)
+    
+    def _rebuild_pdf(self, session_id: str) -> None:
+        """Queue the session's PDF render unless more of its edits are still running."""
+        with self._edits_lock:
+            if self._pdf_rebuilds.get(session_id) is not threading.current_thread():
+                return  # Superseded by a later edit
+            del self._pdf_rebuilds[session_id]
+            if self._edits_running.get(session_id):
+                return  # The last running edit restarts the countdown
+        
+        try:
+            self.submit_pdf_render(session_id)
+        except sqlite3.Error:
+            pass  # The next download renders the PDF instead
+    
+    def _run_pdf_render(self, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Render a session's storyboard PDF if its frames changed since the last render."""
+        session_id = payload['session_id']
+        
+        try:
+            pdf_path = self.registry.pdf_generator.ensure_storyboard_pdf(session_id)
+        except (FileNotFoundError, ValueError, IOError, OSError) as e:
+            raise JobFailedError(f'PDF rendering failed: {str(e)}')
+        
+        result = {'session_id': session_id, 'storyboard_path': pdf_path}
+        self.store.append_event(job_id, {'type': 'complete', **result})
+        return result
+
+
+class JobFailedError(Exception):
+    """Raised by job handlers to fail a job with a user-facing message."""
+    
+    def __init__(self, message: str, result: Dict[str, Any] = None):
+        super().__init__(message)
+        self.result = result
+
+
+class JobCancelledError(Exception):
+    """Raised by job handlers that stop early because their work was superseded."""
+    
+    def __init__(self, message: str, result: Dict[str, Any] = None):
+        super().__init__(message)
+        self.result = result
@@ -0,0 +1,451 @@
+"""
+Job Store Module
+
+Persistent SQLite store for background job state and progress events.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+
+class JobStatus:
+    """Lifecycle states of a background job."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    
+    TERMINAL = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobStore:
+    """
+    SQLite-backed store for jobs and their progress events.
+    
+    Every operation opens its own short-lived connection, so a single store
+    instance can be shared by request threads and queue workers, and several
+    processes can point at the same database file.
+    
+    A queued job can be cancelled outright. A running job can only be asked
+    to stop: its handler checks is_cancel_requested at points where it can
+    stop cleanly, and handlers that never check it run to completion.
+    """
+    
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            owner TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+        CREATE INDEX IF NOT EXISTS idx_jobs_finished_at ON jobs (finished_at);
+        CREATE TABLE IF NOT EXISTS job_events (
+            job_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            event TEXT NOT NULL,
+            PRIMARY KEY (job_id, seq)
+        );
+    """
+    
+    # Columns added to the jobs table after its first release
+    _ADDED_COLUMNS = {
+        'cancel_requested_at': 'REAL'
+    }
+    
+    def __init__(self, db_path: str):
+        """
+        Initialize the job store and create the schema if needed.
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self._SCHEMA)
+            self._add_missing_columns(conn)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection to the job database."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def create_job(self, kind: str, payload: Dict[str, Any]) -> str:
+        """
+        Create a new queued job.
+        
+        Args:
+            kind: The job type (e.g. 'storyboard', 'edit_frame')
+            payload: JSON-serializable job parameters
+        
+        Returns:
+            The new job ID
+        """
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT INTO jobs (id, kind, status, payload, owner, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job_id, kind, JobStatus.QUEUED, json.dumps(payload), self.owner, now, now)
+            )
+        
+        return job_id
+    
+    def claim_next_job(self) -> Optional[Dict[str, Any]]:
+        """
+        Take the oldest queued job and mark it as running in this process.
+        
+        The claim is a single write transaction, so when several processes
+        share the database each job is handed to exactly one of them.
+        
+        Returns:
+            Dictionary with 'job_id', 'kind' and 'payload', or None if no job is queued
+        """
+        with closing(self._connect()) as conn:
+            conn.isolation_level = None
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    'SELECT id, kind, payload FROM jobs WHERE status = ? '
+                    'ORDER BY created_at LIMIT 1',
+                    (JobStatus.QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    now = time.time()
+                    conn.execute(
+                        'UPDATE jobs SET status = ?, owner = ?, started_at = ?, updated_at = ? '
+                        'WHERE id = ?',
+                        (JobStatus.RUNNING, self.owner, now, now, row['id'])
+                    )
+                conn.execute('COMMIT')
+            except sqlite3.Error:
+                conn.execute('ROLLBACK')
+                raise
+        
+        if row is None:
+            return None
+        
+        return {
+            'job_id': row['id'],
+            'kind': row['kind'],
+            'payload': json.loads(row['payload'])
+        }
+    
+    def mark_succeeded(self, job_id: str, result: Dict[str, Any]) -> None:
+        """Mark a job as finished successfully and store its result."""
+        self._finish(job_id, JobStatus.SUCCEEDED, result=result)
+    
+    def mark_failed(self, job_id: str, error: str, result: Optional[Dict[str, Any]] = None) -> None:
+        """Mark a job as failed and store the error message."""
+        self._finish(job_id, JobStatus.FAILED, result=result, error=error)
+    
+    def mark_cancelled(self, job_id: str, reason: str, result: Optional[Dict[str, Any]] = None) -> None:
+        """Mark a job as stopped before it finished and store the reason."""
+        self._finish(job_id, JobStatus.CANCELLED, result=result, error=reason)
+    
+    def request_cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued job, or ask a running one to stop.
+        
+        Args:
+            job_id: The job ID
+        
+        Returns:
+            True if the job hadn't started and is now cancelled, False if it
+            is running (and now asked to stop) or has already finished
+        """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            cancelled = conn.execute(
+                'UPDATE jobs SET status = ?, error = ?, cancel_requested_at = ?, finished_at = ?, updated_at = ? '
+                'WHERE id = ? AND status = ?',
+                (JobStatus.CANCELLED, 'Cancelled before it started', now, now, now, job_id, JobStatus.QUEUED)
+            ).rowcount
+            if not cancelled:
+                conn.execute(
+                    'UPDATE jobs SET cancel_requested_at = ?, updated_at = ? '
+                    'WHERE id = ? AND status = ? AND cancel_requested_at IS NULL',
+                    (now, now, job_id, JobStatus.RUNNING)
+                )
+        return bool(cancelled)
+    
+    def is_cancel_requested(self, job_id: str) -> bool:
+        """Whether a job was asked to stop."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                'SELECT cancel_requested_at FROM jobs WHERE id = ?',
+                (job_id,)
+            ).fetchone()
+        return row is not None and row['cancel_requested_at'] is not None
+    
+    def _finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """Move a job to a terminal state."""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, updated_at = ? '
+                'WHERE id = ?',
+                (
+                    status,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    now,
+                    now,
+                    job_id
+                )
+            )
+    
+    def append_event(self, job_id: str, event: Dict[str, Any]) -> int:
+        """
+        Append a progress event to a job.
+        
+        Args:
+            job_id: The job ID
+            event: JSON-serializable progress event
+        
+        Returns:
+            The sequence number assigned to the event (1-based)
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            # Taking the write lock before reading the last sequence number
+            # keeps concurrent writers to one job from picking the same one
+            conn.isolation_level = None
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    'SELECT COALESCE(MAX(seq), 0) + 1 FROM job_events WHERE job_id = ?',
+                    (job_id,)
+                ).fetchone()
+                seq = row[0]
+                conn.execute(
+                    'INSERT INTO job_events (job_id, seq, created_at, event) VALUES (?, ?, ?, ?)',
+                    (job_id, seq, now, json.dumps(event))
+                )
+                conn.execute('UPDATE jobs SET updated_at = ? WHERE id = ?', (now, job_id))
+                conn.execute('COMMIT')
+            except sqlite3.Error:
+                conn.execute('ROLLBACK')
+                raise
+        return seq
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job's current state.
+        
+        Args:
+            job_id: The job ID
+        
+        Returns:
+            Job dictionary, or None if the job doesn't exist
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return None
+            last_event = conn.execute(
+                'SELECT seq, event FROM job_events WHERE job_id = ? ORDER BY seq DESC LIMIT 1',
+                (job_id,)
+            ).fetchone()
+        
+        return {
+            'job_id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'payload': json.loads(row['payload']),
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+            'cancel_requested': row['cancel_requested_at'] is not None,
+            'event_count': last_event['seq'] if last_event else 0,
+            'last_event': json.loads(last_event['event']) if last_event else None
+        }
+    
+    def list_events(self, job_id: str, after_seq: int = 0) -> List[Dict[str, Any]]:
+        """
+        List a job's progress events in order.
+        
+        Args:
+            job_id: The job ID
+            after_seq: Only return events with a sequence number above this
+        
+        Returns:
+            List of dictionaries with 'seq' and 'event' keys
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT seq, event FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq',
+                (job_id, after_seq)
+            ).fetchall()
+        
+        return [{'seq': row['seq'], 'event': json.loads(row['event'])} for row in rows]
+    
+    def find_queued_job(self, kind: str, session_id: str) -> Optional[str]:
+        """
+        Find a job of a kind that is still waiting to run for a session.
+        
+        Args:
+            kind: The job type
+            session_id: The session ID in the job's payload
+        
+        Returns:
+            The oldest matching job ID, or None if there is none
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? AND kind = ? "
+                "AND json_extract(payload, '$.session_id') = ? ORDER BY created_at LIMIT 1",
+                (JobStatus.QUEUED, kind, session_id)
+            ).fetchone()
+        return row['id'] if row else None
+    
+    def has_newer_job(self, kinds: Sequence[str], session_id: str, job_id: str) -> bool:
+        """
+        Check whether a job of one of the kinds was created for a session after a job.
+        
+        Args:
+            kinds: The job types to look for
+            session_id: The session ID in the job's payload
+            job_id: The job to compare creation times with
+        
+        Returns:
+            True if a later matching job exists, whatever its status
+        """
+        placeholders = ', '.join('?' for _ in kinds)
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                f"SELECT 1 FROM jobs WHERE kind IN ({placeholders}) "
+                "AND json_extract(payload, '$.session_id') = ? "
+                "AND created_at > (SELECT created_at FROM jobs WHERE id = ?) LIMIT 1",
+                (*kinds, session_id, job_id)
+            ).fetchone()
+        return row is not None
+    
+    def active_session_ids(self) -> Set[str]:
+        """
+        Get the sessions that queued or running jobs work on.
+        
+        A job's session is named in its payload (edits, resumes, PDF
+        renders) or, for a new storyboard, in the progress event it records
+        before writing anything to the session directory.
+        
+        Returns:
+            Set of session IDs
+        """
+        active = (JobStatus.QUEUED, JobStatus.RUNNING)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT json_extract(payload, '$.session_id') FROM jobs WHERE status IN (?, ?) "
+                "UNION SELECT json_extract(e.event, '$.session_id') FROM job_events e "
+                "JOIN jobs j ON j.id = e.job_id WHERE j.status IN (?, ?)",
+                active + active
+            ).fetchall()
+        
+        return {row[0] for row in rows if row[0]}
+    
+    def prune_finished_jobs(self, max_age_seconds: float, dry_run: bool = False) -> int:
+        """
+        Delete jobs that finished longer ago than an age, with their events.
+        
+        Queued and running jobs are never deleted, whatever their age.
+        
+        Args:
+            max_age_seconds: Keep jobs that finished more recently than this
+            dry_run: Only count the jobs that would be deleted
+        
+        Returns:
+            Number of jobs deleted, or that would be deleted
+        """
+        placeholders = ', '.join('?' for _ in JobStatus.TERMINAL)
+        finished = f'SELECT id FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?'
+        params = (*JobStatus.TERMINAL, time.time() - max_age_seconds)
+        
+        with closing(self._connect()) as conn, conn:
+            if dry_run:
+                return conn.execute(f'SELECT COUNT(*) FROM ({finished})', params).fetchone()[0]
+            conn.execute(f'DELETE FROM job_events WHERE job_id IN ({finished})', params)
+            return conn.execute(f'DELETE FROM jobs WHERE id IN ({finished})', params).rowcount
+    
+    def fail_orphaned_jobs(self) -> int:
+        """
+        Fail running jobs whose owning process on this host no longer exists.
+        
+        A job that was running when its process died is lost; marking it
+        failed keeps status queries from reporting it as running forever.
+        Queued jobs are left for the next worker to claim. Call this at
+        startup, before this process claims any jobs: a running job that
+        claims to be ours must then predate a restart that reused our PID
+        (e.g. PID 1 in a container).
+        
+        Returns:
+            Number of jobs marked as failed
+        """
+        hostname = socket.gethostname()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT id, owner FROM jobs WHERE status = ?',
+                (JobStatus.RUNNING,)
+            ).fetchall()
+        
+        orphaned = []
+        for row in rows:
+            host, _, pid = row['owner'].rpartition(':')
+            if host == hostname and (row['owner'] == self.owner or not _process_alive(int(pid))):
+                orphaned.append(row['id'])
+        
+        for job_id in orphaned:
+            self.mark_failed(job_id, 'Job interrupted by a server restart')
+        
+        return len(orphaned)
+    
+    @classmethod
+    def _add_missing_columns(cls, conn: sqlite3.Connection) -> None:
+        """Add columns introduced since a job database was created."""
+        existing = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+        for column, column_type in cls._ADDED_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f'ALTER TABLE jobs ADD COLUMN {column} {column_type}')
+
+
+def _process_alive(pid: int) -> bool:
+    """Check whether a process with the given PID is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,164 @@
+"""
+Metrics Store Module
+
+Shared SQLite store of every process's metrics, so one endpoint can report
+what the web workers and the job worker count between them.
+"""
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Any, Dict, Optional
+from app.metrics import MetricsRegistry, merge_snapshots
+
+
+class MetricsStore:
+    """
+    Latest metrics snapshot of each process, keyed by host and PID.
+    
+    Processes publish their whole snapshot periodically, replacing the
+    previous one. Snapshots that stopped being refreshed belong to
+    processes that exited; they are left out of the aggregate and deleted,
+    so counters drop by what an exited process had counted, as they would
+    for any restarted process.
+    """
+    
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS process_metrics (
+            owner TEXT PRIMARY KEY,
+            role TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            snapshot TEXT NOT NULL
+        );
+    """
+    
+    def __init__(self, db_path: str, stale_seconds: float):
+        """
+        Initialize the metrics store and create the schema if needed.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            stale_seconds: Snapshots not refreshed for this long are dropped
+        """
+        self.db_path = db_path
+        self.stale_seconds = stale_seconds
+        
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self._SCHEMA)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection to the metrics database."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def publish(self, role: str, snapshot: Dict[str, Any]) -> None:
+        """
+        Replace this process's snapshot and drop those of exited processes.
+        
+        Args:
+            role: What the process is, e.g. 'web' or 'worker'
+            snapshot: Snapshot as returned by MetricsRegistry.snapshot
+        """
+        # Computed per call: forked processes inherit the store but publish as themselves
+        owner = f"{socket.gethostname()}:{os.getpid()}"
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO process_metrics (owner, role, updated_at, snapshot) '
+                'VALUES (?, ?, ?, ?)',
+                (owner, role, now, json.dumps(snapshot))
+            )
+            conn.execute(
+                'DELETE FROM process_metrics WHERE updated_at < ?',
+                (now - self.stale_seconds,)
+            )
+    
+    def aggregate(self) -> Dict[str, Any]:
+        """
+        Combine the snapshots of all live processes.
+        
+        Returns:
+            Dictionary with merged 'counters', 'gauges' and 'summaries', and
+            'processes' (owner, role and last update of each contributor)
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT owner, role, updated_at, snapshot FROM process_metrics '
+                'WHERE updated_at >= ? ORDER BY updated_at',
+                (time.time() - self.stale_seconds,)
+            ).fetchall()
+        
+        aggregate = merge_snapshots(json.loads(row['snapshot']) for row in rows)
+        aggregate['processes'] = [
+            {'owner': row['owner'], 'role': row['role'], 'updated_at': row['updated_at']}
+            for row in rows
+        ]
+        return aggregate
+
+
+class MetricsPublisher:
+    """Publishes a process's metrics to the shared store on a daemon thread."""
+    
+    def __init__(self, store: MetricsStore, registry: MetricsRegistry, role: str):
+        """
+        Initialize the publisher.
+        
+        Args:
+            store: Store to publish to
+            registry: This process's metrics registry
+            role: What the process is, e.g. 'web' or 'worker'
+        """
+        self.store = store
+        self.registry = registry
+        self.role = role
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def publish(self) -> None:
+        """Publish the current snapshot now."""
+        self.store.publish(self.role, self.registry.snapshot())
+    
+    def start(self, interval_seconds: float) -> None:
+        """
+        Publish periodically on a daemon thread.
+        
+        Args:
+            interval_seconds: Time between publications (<= 0 disables the thread)
+        """
+        if interval_seconds <= 0 or self._thread is not None:
+            return
+        
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(interval_seconds,),
+            name='metrics-publisher',
+            daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the publisher thread, publishing one last time."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self, interval_seconds: float) -> None:
+        """Publish every interval until stopped, and once more on the way out."""
+        while True:
+            stopping = self._stopping.wait(interval_seconds)
+            try:
+                self.publish()
+            except sqlite3.Error:
+                self.registry.increment('metrics.publish_failures')
+            if stopping:
+                return
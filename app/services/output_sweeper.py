@@ -0,0 +1,228 @@
+"""
+Output Sweeper Module
+
+Background removal of expired sessions and enforcement of the output disk quota.
+"""
+import os
+import time
+import fcntl
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+from app.metrics import metrics
+from app.services.job_store import JobStore
+from app.services.session_catalog import SessionCatalog
+from app.services.workspace import JobWorkspace
+from app.config import settings
+
+
+class OutputSweeper:
+    """
+    Removes whole session directories that expired or exceed the disk quota.
+    
+    Sessions are taken least recently used first, where use is the last
+    save, edit or download recorded in the session catalog. A session is
+    removed once it has been unused for longer than the TTL, or while all
+    sessions together take more than the quota. Sessions that a queued or
+    running job works on, or that were used within the minimum idle time,
+    are never removed. Each sweep also deletes jobs, with their progress
+    events, that finished longer ago than the job retention time.
+    
+    Every process may run a sweeper; a lock file in the output directory
+    lets only one of them sweep per interval.
+    """
+    
+    LOCK_FILE = '.sweep.lock'
+    
+    def __init__(
+        self,
+        job_store: JobStore,
+        catalog: SessionCatalog,
+        ttl_seconds: float,
+        quota_bytes: int,
+        min_idle_seconds: float,
+        job_retention_seconds: float = 0,
+        dry_run: bool = False
+    ):
+        """
+        Initialize the sweeper.
+        
+        Args:
+            job_store: Job store consulted for sessions with work in flight
+            catalog: Session catalog with last use and size of every session
+            ttl_seconds: Remove sessions unused for longer than this (<= 0 disables)
+            quota_bytes: Total bytes all sessions may take (<= 0 disables)
+            min_idle_seconds: Never remove sessions used more recently than this
+            job_retention_seconds: Delete jobs finished longer ago than this (<= 0 disables)
+            dry_run: Only report what would be removed
+        """
+        self.job_store = job_store
+        self.catalog = catalog
+        self.ttl_seconds = ttl_seconds
+        self.quota_bytes = quota_bytes
+        self.min_idle_seconds = min_idle_seconds
+        self.job_retention_seconds = job_retention_seconds
+        self.dry_run = dry_run
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self, interval_seconds: float) -> None:
+        """
+        Sweep periodically on a daemon thread.
+        
+        Args:
+            interval_seconds: Time between sweeps (<= 0 disables the thread)
+        """
+        if interval_seconds <= 0 or self._thread is not None:
+            return
+        
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(interval_seconds,),
+            name='output-sweeper',
+            daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the sweeper thread after its current sweep."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def sweep(self, dry_run: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Remove expired sessions, then the least recently used ones while over quota.
+        
+        Args:
+            dry_run: Only report what would be removed. Defaults to the
+                sweeper's setting.
+        
+        Returns:
+            Report with 'dry_run', 'removed' (session ID, bytes, reason and
+            last use of each removed session), 'bytes_reclaimed',
+            'in_flight' (sessions kept because jobs work on them),
+            'session_bytes' (total size of the remaining sessions) and
+            'jobs_pruned' (finished jobs deleted)
+        """
+        dry_run = self.dry_run if dry_run is None else dry_run
+        now = time.time()
+        self._refresh_sizes()
+        
+        in_flight = self.job_store.active_session_ids()
+        sessions = self.catalog.sessions_by_last_use()
+        total_bytes = sum(session['size_bytes'] for session in sessions)
+        
+        removed = []
+        kept_in_flight = []
+        for session in sessions:
+            idle_seconds = now - session['last_used_at']
+            expired = self.ttl_seconds > 0 and idle_seconds > self.ttl_seconds
+            over_quota = self.quota_bytes > 0 and total_bytes > self.quota_bytes
+            if not expired and not over_quota:
+                # Sessions are in last use order, so no later one qualifies either
+                break
+            
+            if idle_seconds < self.min_idle_seconds:
+                continue
+            if session['session_id'] in in_flight:
+                kept_in_flight.append(session['session_id'])
+                continue
+            
+            if not dry_run:
+                self._remove_session(session['session_id'])
+            total_bytes -= session['size_bytes']
+            removed.append({
+                'session_id': session['session_id'],
+                'bytes': session['size_bytes'],
+                'reason': 'expired' if expired else 'quota',
+                'last_used_at': session['last_used_at']
+            })
+        
+        bytes_reclaimed = sum(session['bytes'] for session in removed)
+        jobs_pruned = 0
+        if self.job_retention_seconds > 0:
+            jobs_pruned = self.job_store.prune_finished_jobs(self.job_retention_seconds, dry_run=dry_run)
+        if not dry_run:
+            metrics.increment('output_sweeper.sweeps')
+            metrics.increment('output_sweeper.sessions_removed', len(removed))
+            metrics.increment('output_sweeper.bytes_reclaimed', bytes_reclaimed)
+            metrics.increment('output_sweeper.kept_in_flight', len(kept_in_flight))
+            metrics.set_gauge('output_sweeper.session_bytes', total_bytes)
+            metrics.increment('output_sweeper.jobs_pruned', jobs_pruned)
+        
+        return {
+            'dry_run': dry_run,
+            'removed': removed,
+            'bytes_reclaimed': bytes_reclaimed,
+            'in_flight': kept_in_flight,
+            'session_bytes': total_bytes,
+            'jobs_pruned': jobs_pruned
+        }
+    
+    def _run(self, interval_seconds: float) -> None:
+        """Sweep every interval until stopped."""
+        while not self._stopping.wait(interval_seconds):
+            try:
+                self._sweep_once_per_interval(interval_seconds)
+            except (OSError, sqlite3.Error):
+                metrics.increment('output_sweeper.failures')
+    
+    def _sweep_once_per_interval(self, interval_seconds: float) -> None:
+        """Sweep unless another process swept within the interval."""
+        os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+        lock_path = os.path.join(settings.OUTPUT_DIR, self.LOCK_FILE)
+        
+        with open(lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # Another process is sweeping
+            
+            # The lock file holds the end time of the last sweep, so its
+            # modification time tells whether this interval was swept already
+            lock_stat = os.fstat(lock_file.fileno())
+            if lock_stat.st_size and time.time() - lock_stat.st_mtime < interval_seconds * 0.9:
+                return
+            
+            self.sweep()
+            lock_file.truncate(0)
+            lock_file.write(f"{time.time()}\n")
+    
+    def _refresh_sizes(self) -> None:
+        """Measure the sessions used since their size was last recorded."""
+        for session_id in self.catalog.sessions_to_size():
+            sized_at = time.time()
+            session_dir = os.path.join(settings.OUTPUT_DIR, session_id)
+            if not os.path.isdir(session_dir):
+                # Removed outside the sweeper
+                self.catalog.delete_session(session_id)
+                continue
+            self.catalog.set_size(session_id, _directory_size(session_dir), sized_at)
+    
+    def _remove_session(self, session_id: str) -> None:
+        """Remove a session's directory and catalog entry."""
+        session_dir = os.path.join(settings.OUTPUT_DIR, session_id)
+        
+        # Moving the directory out first makes the removal atomic for readers;
+        # the workspace deletes it, or the next startup's stale workspace cleanup does
+        with JobWorkspace(f"sweep-{session_id}") as workspace:
+            try:
+                os.rename(session_dir, workspace.file_path(session_id))
+            except FileNotFoundError:
+                pass
+            self.catalog.delete_session(session_id)
+
+
+def _directory_size(path: str) -> int:
+    """Total size of the files below a directory."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                pass  # Replaced or removed while walking
+    return total
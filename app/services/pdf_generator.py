@@ -3,26 +3,214 @@ PDF Generation Utility Module
 
 Utility for creating PDF documents from storyboard images.
 """
+import io
 import os
-from typing import List, Optional
+import time
+import hashlib
+from typing import ContextManager, Dict, List, Optional, Set, Tuple
 from PIL import Image
+from pypdf import PdfReader, PdfWriter
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import Paragraph
 from app.config import settings
+from app.metrics import metrics
+from app.services.checkpoint import GenerationCheckpoint
+from app.services.file_lock import file_lock
+from app.services.file_versions import file_versions
+from app.services.workspace import JobWorkspace
 
 
 class PDFGenerator:
-    """Utility for generating PDF documents from images."""
+    """
+    Utility for generating PDF documents from images.
+    
+    Every page is rendered on its own and cached as a single-page PDF in the
+    session's .pages directory, keyed by a hash of the frame image, its
+    description and its frame number. Building a document only renders the
+    pages whose key changed and reassembles the rest from the cache, so
+    rebuilding after a frame edit re-encodes one image instead of all of them.
+    
+    Frames are embedded according to an export profile: 'screen' and
+    'print' resample each frame to the profile's DPI for the area it fills
+    on the page and re-encode it as JPEG, 'archive' embeds the original
+    image losslessly.
+    
+    A session's storyboard PDF is a derived artifact: ensure_storyboard_pdf
+    renders it on demand and records a hash of its inputs (the checkpointed
+    frames and descriptions) next to the page cache, so it is only rendered
+    again once a frame or description has changed. Renders of the same
+    document are serialized with a file lock, so concurrent first requests,
+    even from different processes, render it only once.
+    """
+    
+    # Cache directory for rendered pages, inside the session directory
+    PAGE_CACHE_DIR = '.pages'
+    
+    # Bump whenever the page layout changes so cached pages are re-rendered
+    LAYOUT_VERSION = 1
+    
+    # How often a request waiting for another process's render re-checks the lock
+    RENDER_LOCK_POLL_SECONDS = 0.05
+    
+    # Export profiles: target DPI of the image area and JPEG quality (None keeps the original)
+    PROFILES: Dict[str, Dict[str, Optional[int]]] = {
+        'screen': {
+            'dpi': settings.PDF_SCREEN_DPI if settings.PDF_SCREEN_DPI > 0 else None,
+            'jpeg_quality': settings.PDF_SCREEN_JPEG_QUALITY if settings.PDF_SCREEN_JPEG_QUALITY > 0 else None
+        },
+        'print': {
+            'dpi': settings.PDF_PRINT_DPI if settings.PDF_PRINT_DPI > 0 else None,
+            'jpeg_quality': settings.PDF_PRINT_JPEG_QUALITY if settings.PDF_PRINT_JPEG_QUALITY > 0 else None
+        },
+        'archive': {
+            'dpi': None,
+            'jpeg_quality': None
+        }
+    }
+    
+    @staticmethod
+    def storyboard_pdf_path(session_id: str, filename: str = "storyboard.pdf") -> str:
+        """
+        Get the path of a session's storyboard PDF, whether or not it is rendered yet.
+        
+        Args:
+            session_id: Unique session identifier
+            filename: Name of the PDF file
+        
+        Returns:
+            Path of the PDF file in the session directory
+        """
+        return os.path.join(settings.OUTPUT_DIR, session_id, filename)
+    
+    def storyboard_pdf_version(self, session_id: str) -> str:
+        """
+        Get the fingerprint of the inputs a session's PDF is rendered from.
+        
+        The fingerprint changes whenever the PDF would, and is known without
+        rendering it, so it can version the PDF's URL.
+        
+        Args:
+            session_id: Unique session identifier
+        
+        Returns:
+            Hex digest of the session's frames, descriptions and export profile
+        
+        Raises:
+            FileNotFoundError: If the session has no complete storyboard
+        """
+        image_paths, frame_descriptions, pdf_profile = self._session_inputs(session_id)
+        return self.fingerprint(image_paths, frame_descriptions, pdf_profile)
+    
+    def is_storyboard_pdf_current(
+        self,
+        session_id: str,
+        filename: str = "storyboard.pdf",
+        version: Optional[str] = None
+    ) -> bool:
+        """
+        Check whether a session's PDF is rendered from its current frames.
+        
+        Args:
+            session_id: Unique session identifier
+            filename: Name of the PDF file
+            version: The session's storyboard_pdf_version, if already known
+        
+        Returns:
+            True if the PDF exists and its inputs haven't changed since it was rendered
+        
+        Raises:
+            FileNotFoundError: If the session has no complete storyboard
+        """
+        return self._is_current(session_id, filename, version or self.storyboard_pdf_version(session_id))
+    
+    def ensure_storyboard_pdf(self, session_id: str, filename: str = "storyboard.pdf") -> str:
+        """
+        Render a session's PDF unless it is already current.
+        
+        Args:
+            session_id: Unique session identifier
+            filename: Name of the PDF file
+        
+        Returns:
+            Path to the up-to-date PDF file
+        
+        Raises:
+            FileNotFoundError: If the session has no complete storyboard
+        """
+        image_paths, frame_descriptions, pdf_profile = self._session_inputs(session_id)
+        fingerprint = self.fingerprint(image_paths, frame_descriptions, pdf_profile)
+        pdf_path = self.storyboard_pdf_path(session_id, filename)
+        
+        if self._is_current(session_id, filename, fingerprint):
+            metrics.increment('pdf.cache_hits')
+            return pdf_path
+        
+        with self._render_lock(session_id, filename):
+            # Another request may have rendered it while we waited for the lock
+            if self._is_current(session_id, filename, fingerprint):
+                metrics.increment('pdf.cache_hits')
+                return pdf_path
+            
+            started = time.monotonic()
+            self.create_storyboard_pdf(
+                image_paths=image_paths,
+                session_id=session_id,
+                filename=filename,
+                frame_descriptions=frame_descriptions,
+                pdf_profile=pdf_profile
+            )
+            # Recorded after the PDF is in place, so a crash in between only costs a re-render
+            with JobWorkspace(session_id) as workspace:
+                workspace.write_atomic(
+                    self._stamp_path(session_id, filename),
+                    fingerprint.encode('utf-8')
+                )
+            
+            metrics.increment('pdf.renders')
+            metrics.observe('pdf.render_seconds', time.monotonic() - started)
+        
+        return pdf_path
+    
+    def fingerprint(
+        self,
+        image_paths: List[str],
+        frame_descriptions: Optional[List[str]] = None,
+        pdf_profile: Optional[str] = None
+    ) -> str:
+        """
+        Compute a content hash of everything a storyboard PDF is rendered from.
+        
+        Args:
+            image_paths: List of paths to image files
+            frame_descriptions: Optional list of frame descriptions to include
+            pdf_profile: Export profile name. Defaults to the configured profile.
+        
+        Returns:
+            Hex digest of the layout version, export profile, frame images and descriptions
+        """
+        digest = hashlib.sha256(
+            f"v{self.LAYOUT_VERSION}:{self._profile_tag(pdf_profile)}".encode('utf-8')
+        )
+        for idx, img_path in enumerate(image_paths):
+            digest.update(file_versions.digest(img_path))
+            if frame_descriptions and idx < len(frame_descriptions):
+                description = frame_descriptions[idx].encode('utf-8')
+                digest.update(len(description).to_bytes(8, 'big') + description)
+            else:
+                digest.update(b'\0' * 8)
+        return digest.hexdigest()
     
     @staticmethod
     def create_storyboard_pdf(
         image_paths: List[str], 
         session_id: str,
         filename: str = "storyboard.pdf",
-        frame_descriptions: Optional[List[str]] = None
+        frame_descriptions: Optional[List[str]] = None,
+        pdf_profile: Optional[str] = None
     ) -> str:
         """
         Create a PDF document with all storyboard frames.
@@ -32,15 +220,256 @@ class PDFGenerator:
             session_id: Unique session identifier
             filename: Name of the PDF file
             frame_descriptions: Optional list of frame descriptions to include
+            pdf_profile: Export profile name. Defaults to the configured profile.
         
         Returns:
             Path to the generated PDF file
+        
+        Raises:
+            ValueError: If the export profile is unknown
         """
+        profile_tag = PDFGenerator._profile_tag(pdf_profile)
+        profile = PDFGenerator._profile(pdf_profile)
         session_dir = os.path.join(settings.OUTPUT_DIR, session_id)
         pdf_path = os.path.join(session_dir, filename)
+        cache_dir = os.path.join(session_dir, PDFGenerator.PAGE_CACHE_DIR)
+        os.makedirs(cache_dir, exist_ok=True)
+        
+        writer = PdfWriter()
+        page_keys: Set[str] = set()
+        
+        # Render into a private workspace, then move the finished files into place
+        with JobWorkspace(session_id) as workspace:
+            for idx, img_path in enumerate(image_paths):
+                description = None
+                if frame_descriptions and idx < len(frame_descriptions):
+                    description = frame_descriptions[idx]
+                
+                with open(img_path, 'rb') as f:
+                    image_bytes = f.read()
+                page_key = PDFGenerator._page_key(image_bytes, description, idx + 1, profile_tag)
+                page_keys.add(page_key)
+                page_path = os.path.join(cache_dir, f"page_{page_key}.pdf")
+                
+                page_pdf = PDFGenerator._load_page(page_path)
+                if page_pdf is None:
+                    page_pdf = PDFGenerator._render_page(image_bytes, description, idx + 1, profile)
+                    workspace.write_atomic(page_path, page_pdf)
+                    metrics.increment('pdf.pages_rendered')
+                else:
+                    metrics.increment('pdf.pages_reused')
+                
+                writer.append(PdfReader(io.BytesIO(page_pdf)))
+            
+            buffer = io.BytesIO()
+            writer.write(buffer)
+            workspace.write_atomic(pdf_path, buffer.getvalue())
+        
+        PDFGenerator._prune_pages(cache_dir, page_keys)
+        return pdf_path
+    
+    @staticmethod
+    def _session_inputs(session_id: str) -> Tuple[List[str], List[str], str]:
+        """
+        Get the frame images, descriptions and export profile a session's PDF is rendered from.
+        
+        Args:
+            session_id: Unique session identifier
+        
+        Returns:
+            Tuple of frame image paths and frame descriptions, in frame order,
+            and the session's export profile
+        
+        Raises:
+            FileNotFoundError: If segmentation hasn't finished or a frame is missing
+        """
+        checkpoint = GenerationCheckpoint(session_id)
+        storyboard = checkpoint.load_storyboard()
+        if storyboard is None:
+            raise FileNotFoundError(f"No storyboard found for session {session_id}")
+        
+        image_paths = [checkpoint.frame_path(frame.frame_number) for frame in storyboard.frames]
+        for img_path in image_paths:
+            if not os.path.isfile(img_path):
+                raise FileNotFoundError(f"Storyboard for session {session_id} is incomplete")
+        
+        descriptions = [frame.description for frame in storyboard.frames]
+        return image_paths, descriptions, checkpoint.load_pdf_profile()
+    
+    @staticmethod
+    def _profile(pdf_profile: Optional[str]) -> Dict[str, Optional[int]]:
+        """
+        Look up the settings of an export profile.
         
-        # Create PDF canvas
-        c = canvas.Canvas(pdf_path, pagesize=A4)
+        Raises:
+            ValueError: If the profile is unknown
+        """
+        name = pdf_profile or settings.PDF_DEFAULT_PROFILE
+        if name not in PDFGenerator.PROFILES:
+            raise ValueError(f"Unknown PDF profile: {name}")
+        return PDFGenerator.PROFILES[name]
+    
+    @staticmethod
+    def _profile_tag(pdf_profile: Optional[str]) -> str:
+        """Identify an export profile by its settings, so changing them invalidates cached output."""
+        profile = PDFGenerator._profile(pdf_profile)
+        return f"dpi={profile['dpi']}:jpeg={profile['jpeg_quality']}"
+    
+    @staticmethod
+    def _stamp_path(session_id: str, filename: str) -> str:
+        """Get the path of the file recording which inputs a PDF was rendered from."""
+        return os.path.join(
+            settings.OUTPUT_DIR, session_id, PDFGenerator.PAGE_CACHE_DIR, f"{filename}.sha256"
+        )
+    
+    @staticmethod
+    def _is_current(session_id: str, filename: str, fingerprint: str) -> bool:
+        """Whether the PDF exists and was rendered from inputs with the given fingerprint."""
+        if not os.path.isfile(PDFGenerator.storyboard_pdf_path(session_id, filename)):
+            return False
+        try:
+            with open(PDFGenerator._stamp_path(session_id, filename), 'r', encoding='utf-8') as f:
+                return f.read().strip() == fingerprint
+        except FileNotFoundError:
+            return False
+    
+    @staticmethod
+    def _render_lock(session_id: str, filename: str) -> ContextManager[None]:
+        """Hold an exclusive lock, across processes, on rendering one session PDF."""
+        lock_path = os.path.join(
+            settings.OUTPUT_DIR,
+            session_id,
+            PDFGenerator.PAGE_CACHE_DIR,
+            f"{filename}.lock"
+        )
+        return file_lock(lock_path, PDFGenerator.RENDER_LOCK_POLL_SECONDS)
+    
+    @staticmethod
+    def _page_key(
+        image_bytes: bytes,
+        description: Optional[str],
+        frame_number: int,
+        profile_tag: str
+    ) -> str:
+        """
+        Compute the cache key of one page.
+        
+        Args:
+            image_bytes: The frame image
+            description: The frame description, if any
+            frame_number: The frame number printed on the page
+            profile_tag: Settings of the export profile
+        
+        Returns:
+            Hex digest identifying the rendered page
+        """
+        digest = hashlib.sha256()
+        digest.update(
+            f"v{PDFGenerator.LAYOUT_VERSION}:{profile_tag}:{frame_number}:".encode('utf-8')
+        )
+        digest.update(hashlib.sha256(image_bytes).digest())
+        if description is not None:
+            digest.update(description.encode('utf-8'))
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _load_page(page_path: str) -> Optional[bytes]:
+        """Read a cached page, or None if it isn't cached."""
+        try:
+            with open(page_path, 'rb') as f:
+                return f.read() or None
+        except FileNotFoundError:
+            return None
+    
+    @staticmethod
+    def _render_page(
+        image_bytes: bytes,
+        description: Optional[str],
+        frame_number: int,
+        profile: Dict[str, Optional[int]]
+    ) -> bytes:
+        """
+        Render one frame as a single-page PDF.
+        
+        Args:
+            image_bytes: The frame image
+            description: The frame description, if any
+            frame_number: The frame number printed on the page
+            profile: Settings of the export profile
+        
+        Returns:
+            The single-page PDF document
+        """
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=A4)
+        PDFGenerator._draw_page(c, io.BytesIO(image_bytes), description, frame_number, profile)
+        c.save()
+        return buffer.getvalue()
+    
+    @staticmethod
+    def _prune_pages(cache_dir: str, page_keys: Set[str]) -> None:
+        """Remove cached pages that are no longer part of the document."""
+        for name in os.listdir(cache_dir):
+            if name.startswith('page_') and name[len('page_'):-len('.pdf')] not in page_keys:
+                try:
+                    os.remove(os.path.join(cache_dir, name))
+                except FileNotFoundError:
+                    pass
+    
+    @staticmethod
+    def _prepare_image(
+        img: Image.Image,
+        width: float,
+        height: float,
+        profile: Dict[str, Optional[int]]
+    ) -> ImageReader:
+        """
+        Resample and re-encode a frame for embedding as the export profile asks.
+        
+        Args:
+            img: The decoded frame image
+            width: Width the image is drawn at on the page, in points
+            height: Height the image is drawn at on the page, in points
+            profile: Settings of the export profile
+        
+        Returns:
+            Image reader for canvas.drawImage. JPEG data is embedded as is.
+        """
+        if profile['dpi']:
+            # Downsample only; upscaling would grow the file without adding detail
+            target_size = (
+                max(1, round(width / inch * profile['dpi'])),
+                max(1, round(height / inch * profile['dpi']))
+            )
+            if target_size[0] < img.width and target_size[1] < img.height:
+                img = img.resize(target_size, Image.LANCZOS)
+        
+        if profile['jpeg_quality']:
+            buffer = io.BytesIO()
+            img.convert('RGB').save(buffer, format='JPEG', quality=profile['jpeg_quality'], optimize=True)
+            buffer.seek(0)
+            return ImageReader(buffer)
+        
+        return ImageReader(img)
+    
+    @staticmethod
+    def _draw_page(
+        c: canvas.Canvas,
+        image_file,
+        description: Optional[str],
+        frame_number: int,
+        profile: Dict[str, Optional[int]]
+    ) -> None:
+        """
+        Draw one frame onto the current page of a PDF canvas.
+        
+        Args:
+            c: The canvas to draw on
+            image_file: Path or file object of the frame image
+            description: Optional frame description to include
+            frame_number: The frame number printed at the bottom of the page
+            profile: Settings of the export profile
+        """
         page_width, page_height = A4
         
         # Margins and layout settings
@@ -50,77 +479,67 @@ class PDFGenerator:
         max_img_width = page_width - (2 * margin)
         max_img_height = page_height - (2 * margin) - frame_number_height - description_area_height
         
-        for idx, img_path in enumerate(image_paths):
-            if idx > 0:
-                c.showPage()  # Start new page for each frame after the first
+        # Open image to get dimensions
+        with Image.open(image_file) as img:
+            img_width, img_height = img.size
             
-            # Open image to get dimensions
-            with Image.open(img_path) as img:
-                img_width, img_height = img.size
-                
-                # Calculate scaling to fit page while maintaining aspect ratio
-                width_ratio = max_img_width / img_width
-                height_ratio = max_img_height / img_height
-                scale = min(width_ratio, height_ratio)
+            # Calculate scaling to fit page while maintaining aspect ratio
+            width_ratio = max_img_width / img_width
+            height_ratio = max_img_height / img_height
+            scale = min(width_ratio, height_ratio)
+            
+            scaled_width = img_width * scale
+            scaled_height = img_height * scale
+            
+            # Position image at top of page
+            x = (page_width - scaled_width) / 2
+            y = page_height - margin - scaled_height
+            
+            # Draw image
+            c.drawImage(
+                PDFGenerator._prepare_image(img, scaled_width, scaled_height, profile),
+                x, y,
+                width=scaled_width,
+                height=scaled_height,
+                preserveAspectRatio=True
+            )
+            
+            # Add frame description right below the image
+            if description is not None:
+                # Start description right below the image
+                desc_start_y = y - 0.3 * inch
                 
-                scaled_width = img_width * scale
-                scaled_height = img_height * scale
+                # Add "Description:" label
+                c.setFont("Helvetica-Bold", 10)
+                c.drawString(margin, desc_start_y, "Description:")
                 
-                # Position image at top of page
-                x = (page_width - scaled_width) / 2
-                y = page_height - margin - scaled_height
+                # Add the description text with word wrap
+                c.setFont("Helvetica", 9)
+                text_y = desc_start_y - 0.2 * inch
                 
-                # Draw image
-                c.drawImage(
-                    img_path,
-                    x, y,
-                    width=scaled_width,
-                    height=scaled_height,
-                    preserveAspectRatio=True
-                )
+                # Simple text wrapping
+                max_chars_per_line = 90
+                words = description.split()
+                current_line = ""
                 
-                # Add frame description right below the image
-                if frame_descriptions and idx < len(frame_descriptions):
-                    description = frame_descriptions[idx]
-                    
-                    # Start description right below the image
-                    desc_start_y = y - 0.3 * inch
-                    
-                    # Add "Description:" label
-                    c.setFont("Helvetica-Bold", 10)
-                    c.drawString(margin, desc_start_y, "Description:")
-                    
-                    # Add the description text with word wrap
-                    c.setFont("Helvetica", 9)
-                    text_y = desc_start_y - 0.2 * inch
-                    
-                    # Simple text wrapping
-                    max_chars_per_line = 90
-                    words = description.split()
-                    current_line = ""
-                    
-                    for word in words:
-                        test_line = current_line + (" " if current_line else "") + word
-                        if len(test_line) <= max_chars_per_line:
-                            current_line = test_line
-                        else:
-                            if current_line:
-                                c.drawString(margin, text_y, current_line)
-                                text_y -= 0.15 * inch
-                            current_line = word
-                    
-                    # Draw the last line
-                    if current_line:
-                        c.drawString(margin, text_y, current_line)
+                for word in words:
+                    test_line = current_line + (" " if current_line else "") + word
+                    if len(test_line) <= max_chars_per_line:
+                        current_line = test_line
+                    else:
+                        if current_line:
+                            c.drawString(margin, text_y, current_line)
+                            text_y -= 0.15 * inch
+                        current_line = word
                 
-                # Add frame number at bottom
-                frame_number = idx + 1
-                c.setFont("Helvetica-Bold", 12)
-                c.drawCentredString(
-                    page_width / 2,
-                    margin / 2,
-                    f"Frame {frame_number}"
-                )
-        
-        c.save()
-        return pdf_path
+                # Draw the last line
+                if current_line:
+                    c.drawString(margin, text_y, current_line)
+            
+            # Add frame number at bottom
+            c.setFont("Helvetica-Bold", 12)
+            c.drawCentredString(
+                page_width / 2,
+                margin / 2,
+                f"Frame {frame_number}"
+            )
@@ -0,0 +1,115 @@
+"""
+Service Registry Module
+
+Long-lived clients, agents and services shared across requests.
+"""
+import threading
+from typing import Any, Callable, Dict
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import Client
+
+from app.agents import create_storyboard_agent, create_model_backend, ImageGenerationAgent, ModelBackend
+from app.services.storyboard_service import StoryboardService
+from app.services.streaming_storyboard_service import StreamingStoryboardService
+from app.services.image_generation_service import ImageGenerationService
+from app.services.frame_edit_service import FrameEditService
+from app.services.pdf_generator import PDFGenerator
+from app.config import settings
+
+
+class ServiceRegistry:
+    """
+    Application-wide owner of expensive, thread-safe resources.
+    
+    The Gemini client (with its pooled HTTP connections), the model backend,
+    the agents and the ADK runner are built once and shared by every request and job worker.
+    Services handed out by the factory methods are lightweight wrappers
+    around these shared resources, so each request only pays for its own
+    per-request state.
+    
+    Resources are created on first use, so the application can start (and
+    serve health checks) before API credentials are available.
+    """
+    
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.RLock()
+        self._instances: Dict[str, Any] = {}
+    
+    @property
+    def genai_client(self) -> Client:
+        """Shared Gemini API client."""
+        return self._get('genai_client', Client)
+    
+    @property
+    def model_backend(self) -> ModelBackend:
+        """Shared model backend, calling the API through the shared client."""
+        return self._get(
+            'model_backend',
+            lambda: create_model_backend(settings.MODEL_BACKEND, lambda: self.genai_client)
+        )
+    
+    @property
+    def image_agent(self) -> ImageGenerationAgent:
+        """Shared image generation agent."""
+        return self._get(
+            'image_agent',
+            lambda: ImageGenerationAgent(backend=self.model_backend)
+        )
+    
+    @property
+    def storyboard_runner(self) -> Runner:
+        """Shared ADK runner for the storyboard agent, with its session service."""
+        return self._get(
+            'storyboard_runner',
+            lambda: Runner(
+                agent=create_storyboard_agent(backend=self.model_backend),
+                app_name=settings.STORYBOARD_APP_NAME,
+                session_service=InMemorySessionService()
+            )
+        )
+    
+    @property
+    def image_service(self) -> ImageGenerationService:
+        """Shared image generation service."""
+        return self._get(
+            'image_service',
+            lambda: ImageGenerationService(agent=self.image_agent)
+        )
+    
+    @property
+    def pdf_generator(self) -> PDFGenerator:
+        """Shared PDF generator."""
+        return self._get('pdf_generator', PDFGenerator)
+    
+    def storyboard_service(self) -> StoryboardService:
+        """Get a storyboard service backed by the shared resources."""
+        return StoryboardService(
+            runner=self.storyboard_runner,
+            image_service=self.image_service,
+            pdf_generator=self.pdf_generator
+        )
+    
+    def streaming_storyboard_service(self) -> StreamingStoryboardService:
+        """Get a streaming storyboard service backed by the shared resources."""
+        return StreamingStoryboardService(
+            runner=self.storyboard_runner,
+            image_service=self.image_service,
+            pdf_generator=self.pdf_generator
+        )
+    
+    def frame_edit_service(self) -> FrameEditService:
+        """Get a frame edit service backed by the shared resources."""
+        return FrameEditService(image_service=self.image_service)
+    
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Return the named instance, creating it exactly once."""
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = factory()
+                    self._instances[name] = instance
+        return instance
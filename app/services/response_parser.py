@@ -4,8 +4,9 @@ Agent Response Parser
 Utilities for parsing and validating agent responses.
 """
 import json
-from typing import TypeVar, Type
+from typing import List, Optional, TypeVar, Type
 from pydantic import BaseModel
+from app.models.storyboard import FrameData
 
 T = TypeVar('T', bound=BaseModel)
 
@@ -42,12 +43,52 @@ class ResponseParser:
             raise ValueError(f"Failed to parse agent response: {e}")
     
     @staticmethod
-    def extract_final_response(events) -> str:
+    async def aextract_text_chunks(events):
+        """
+        Yield response text from streamed agent events as it arrives.
+        
+        With streaming enabled the agent emits partial events carrying text
+        deltas followed by a final event repeating the complete text. Only
+        the deltas are yielded, unless the agent produced no partial events,
+        in which case the final text is yielded once.
+        
+        Args:
+            events: Async iterator of agent response events
+        
+        Yields:
+            Pieces of response text in order
+        
+        Raises:
+            ValueError: If the agent produced no text at all
+        """
+        received_partial = False
+        
+        async for event in events:
+            if not event.content or not event.content.parts:
+                continue
+            text = ''.join(part.text or '' for part in event.content.parts)
+            
+            if event.partial:
+                received_partial = True
+                if text:
+                    yield text
+            elif event.is_final_response():
+                if not received_partial:
+                    if not text:
+                        break
+                    yield text
+                return
+        
+        if not received_partial:
+            raise ValueError("Agent did not return a response")
+    
+    @staticmethod
+    async def aextract_final_response(events) -> str:
         """
         Extract the final response text from agent events.
         
         Args:
-            events: Iterator of agent response events
+            events: Async iterator of agent response events
         
         Returns:
             The final response text
@@ -55,8 +96,113 @@ class ResponseParser:
         Raises:
             ValueError: If no final response is found
         """
-        for event in events:
+        async for event in events:
             if event.is_final_response() and event.content:
                 return event.content.parts[0].text.strip()
         
         raise ValueError("Agent did not return a response")
+
+
+class IncrementalFrameParser:
+    """
+    Decodes storyboard frames from a StoryboardOutput JSON document as it streams in.
+    
+    The parser tracks string and nesting state across calls to `feed`, so each
+    character is scanned once. Every object inside the top-level "frames"
+    array is validated as a FrameData as soon as its closing brace arrives.
+    """
+    
+    def __init__(self):
+        """Initialize an empty parser."""
+        self.total_frames: Optional[int] = None
+        self._buffer = ''
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+        self._value_start = 0
+        self._in_frames = False
+        self._object_start: Optional[int] = None
+    
+    def feed(self, chunk: str) -> List[FrameData]:
+        """
+        Add streamed text and decode any frames it completes.
+        
+        Args:
+            chunk: The next piece of the agent's JSON response
+        
+        Returns:
+            Frames completed by this chunk, in document order
+        
+        Raises:
+            ValueError: If a completed frame is not a valid FrameData
+        """
+        self._buffer += chunk
+        buffer = self._buffer
+        frames = []
+        
+        for i in range(self._pos, len(buffer)):
+            ch = buffer[i]
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = buffer[self._string_start:i]
+                continue
+            
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i + 1
+            elif ch in '{[':
+                if ch == '[' and self._depth == 1 and self._key == 'frames':
+                    self._in_frames = True
+                self._depth += 1
+                if ch == '{' and self._in_frames and self._depth == 3:
+                    self._object_start = i
+            elif ch in '}]':
+                if self._depth == 1:
+                    self._end_value(i)
+                self._depth -= 1
+                if ch == '}' and self._in_frames and self._depth == 2 and self._object_start is not None:
+                    frames.append(self._decode_frame(buffer[self._object_start:i + 1]))
+                    self._object_start = None
+                elif ch == ']' and self._in_frames and self._depth == 1:
+                    self._in_frames = False
+            elif ch == ':' and self._depth == 1:
+                self._key = self._last_string
+                self._value_start = i + 1
+            elif ch == ',' and self._depth == 1:
+                self._end_value(i)
+        
+        self._pos = len(buffer)
+        return frames
+    
+    @property
+    def text(self) -> str:
+        """The full text received so far."""
+        return self._buffer
+    
+    def _end_value(self, end: int) -> None:
+        """Handle the end of a top-level value."""
+        if self._key == 'total_frames':
+            try:
+                self.total_frames = int(self._buffer[self._value_start:end].strip())
+            except ValueError:
+                pass
+        self._key = None
+    
+    @staticmethod
+    def _decode_frame(text: str) -> FrameData:
+        """Validate one complete frame object."""
+        try:
+            return FrameData(**json.loads(text))
+        except (json.JSONDecodeError, TypeError, ValueError) as e:
+            raise ValueError(f"Failed to parse streamed frame: {e}")
@@ -0,0 +1,291 @@
+"""
+Segmentation Cache Module
+
+Two-tier cache of validated storyboard segmentation results.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Tuple
+from pydantic import ValidationError
+from app.agents.prompts import STORYBOARD_INSTRUCTION
+from app.models.storyboard import StoryboardOutput
+from app.metrics import metrics
+from app.config import settings
+
+
+class SegmentationCache:
+    """
+    Cache of StoryboardOutput results with an in-memory LRU tier and a disk tier.
+    
+    Entries are keyed on the normalized description, the text model and a
+    hash of the segmentation instruction, so changing either invalidates
+    old results. Both tiers expire entries after the same TTL; the disk
+    tier is shared by all worker processes. Every few writes the disk tier
+    is pruned of expired entries, then of the oldest ones while it holds
+    more than its maximum, so it stays bounded even for descriptions that
+    are never requested again.
+    """
+    
+    # The disk tier is pruned on the first write and then every this many writes
+    PRUNE_EVERY_WRITES = 32
+    
+    # Staging files older than this were left behind by a crashed writer
+    STALE_STAGING_SECONDS = 3600
+    
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl_seconds: float,
+        max_memory_entries: int,
+        max_disk_entries: int = 0
+    ):
+        """
+        Initialize the segmentation cache.
+        
+        Args:
+            cache_dir: Directory holding the disk tier
+            ttl_seconds: How long results stay valid. Zero disables the cache.
+            max_memory_entries: Maximum number of results kept in memory
+            max_disk_entries: Maximum number of results kept on disk (<= 0
+                only removes expired ones)
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, Tuple[float, StoryboardOutput]]' = OrderedDict()
+        self._writes_until_prune = 0
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores and serves results."""
+        return self.ttl_seconds > 0
+    
+    @staticmethod
+    def make_key(user_description: str, model_name: Optional[str] = None) -> str:
+        """
+        Build the cache key for a description.
+        
+        Args:
+            user_description: The text description of the video sequence
+            model_name: The text model name. Defaults to configured model.
+        
+        Returns:
+            Hex SHA-256 key
+        """
+        if model_name is None:
+            model_name = settings.GEMINI_TEXT_MODEL
+        
+        # Resubmissions often differ only in whitespace or Unicode form
+        normalized = ' '.join(unicodedata.normalize('NFC', user_description).split())
+        instruction_hash = hashlib.sha256(STORYBOARD_INSTRUCTION.encode('utf-8')).hexdigest()
+        
+        payload = json.dumps([normalized, model_name, instruction_hash])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[StoryboardOutput]:
+        """
+        Look up a cached result, checking memory before disk.
+        
+        Args:
+            key: Cache key from make_key
+        
+        Returns:
+            The cached StoryboardOutput, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        
+        now = time.time()
+        storyboard = self._get_memory(key, now)
+        if storyboard is not None:
+            return storyboard
+        return self._get_disk(key, now)
+    
+    async def aget(self, key: str) -> Optional[StoryboardOutput]:
+        """
+        Async variant of get, reading the disk tier off the event loop.
+        
+        Args:
+            key: Cache key from make_key
+        
+        Returns:
+            The cached StoryboardOutput, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        
+        now = time.time()
+        storyboard = self._get_memory(key, now)
+        if storyboard is not None:
+            return storyboard
+        return await asyncio.to_thread(self._get_disk, key, now)
+    
+    def put(self, key: str, storyboard: StoryboardOutput) -> None:
+        """
+        Store a validated result in both tiers.
+        
+        Args:
+            key: Cache key from make_key
+            storyboard: The validated segmentation result
+        """
+        if not self.enabled:
+            return
+        
+        created_at = time.time()
+        self._remember(key, created_at, storyboard)
+        self._put_disk(key, created_at, storyboard)
+    
+    async def aput(self, key: str, storyboard: StoryboardOutput) -> None:
+        """
+        Async variant of put, writing the disk tier off the event loop.
+        
+        Args:
+            key: Cache key from make_key
+            storyboard: The validated segmentation result
+        """
+        if not self.enabled:
+            return
+        
+        created_at = time.time()
+        self._remember(key, created_at, storyboard)
+        await asyncio.to_thread(self._put_disk, key, created_at, storyboard)
+    
+    def prune(self) -> int:
+        """
+        Remove expired entries from the disk tier, then the oldest while over its maximum.
+        
+        Staging files that crashed writers left behind are removed too.
+        
+        Returns:
+            Number of entries removed
+        """
+        now = time.time()
+        try:
+            scanned = list(os.scandir(self.cache_dir))
+        except FileNotFoundError:
+            return 0
+        
+        live = []
+        removed = 0
+        for entry in scanned:
+            try:
+                written_at = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue  # Replaced or removed meanwhile
+            if entry.name.endswith('.json'):
+                if now - written_at < self.ttl_seconds:
+                    live.append((written_at, entry.path))
+                elif _remove_quietly(entry.path):
+                    removed += 1
+            elif entry.name.endswith('.tmp') and now - written_at > self.STALE_STAGING_SECONDS:
+                _remove_quietly(entry.path)
+        
+        if self.max_disk_entries > 0 and len(live) > self.max_disk_entries:
+            live.sort()
+            for _, path in live[:len(live) - self.max_disk_entries]:
+                if _remove_quietly(path):
+                    removed += 1
+        
+        if removed:
+            metrics.increment('segmentation_cache.disk_evictions', removed)
+        return removed
+    
+    def _get_memory(self, key: str, now: float) -> Optional[StoryboardOutput]:
+        """Look up an unexpired result in the memory tier."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, storyboard = entry
+                if now - created_at < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    metrics.increment('segmentation_cache.memory_hits')
+                    return storyboard
+                del self._memory[key]
+        return None
+    
+    def _get_disk(self, key: str, now: float) -> Optional[StoryboardOutput]:
+        """Look up a result in the disk tier and promote it to memory."""
+        entry = self._read_disk(key, now)
+        if entry is None:
+            metrics.increment('segmentation_cache.misses')
+            return None
+        
+        created_at, storyboard = entry
+        self._remember(key, created_at, storyboard)
+        metrics.increment('segmentation_cache.disk_hits')
+        return storyboard
+    
+    def _put_disk(self, key: str, created_at: float, storyboard: StoryboardOutput) -> None:
+        """Write a result to the disk tier, pruning it every few writes."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, staging_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': created_at,
+                'storyboard': storyboard.model_dump()
+            }, f, ensure_ascii=False)
+        os.replace(staging_path, self._path(key))
+        
+        with self._lock:
+            self._writes_until_prune -= 1
+            prune_due = self._writes_until_prune <= 0
+            if prune_due:
+                self._writes_until_prune = self.PRUNE_EVERY_WRITES
+        if prune_due:
+            self.prune()
+    
+    def _path(self, key: str) -> str:
+        """Get the disk tier file path for a key."""
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def _remember(self, key: str, created_at: float, storyboard: StoryboardOutput) -> None:
+        """Add an entry to the memory tier, evicting the least recently used."""
+        with self._lock:
+            self._memory[key] = (created_at, storyboard)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+    
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[float, StoryboardOutput]]:
+        """Read an unexpired entry from the disk tier, removing it if expired or corrupt."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            created_at = float(data['created_at'])
+            if now - created_at < self.ttl_seconds:
+                return created_at, StoryboardOutput.model_validate(data['storyboard'])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError, ValidationError):
+            pass
+        
+        _remove_quietly(path)
+        return None
+
+
+def _remove_quietly(path: str) -> bool:
+    """Remove a file, returning whether this call removed it."""
+    try:
+        os.remove(path)
+    except OSError:
+        return False
+    return True
+
+
+# Process-wide cache shared by every storyboard service
+segmentation_cache = SegmentationCache(
+    settings.SEGMENTATION_CACHE_DIR,
+    settings.SEGMENTATION_CACHE_TTL_SECONDS,
+    settings.SEGMENTATION_CACHE_MEMORY_ENTRIES,
+    settings.SEGMENTATION_CACHE_DISK_ENTRIES
+)
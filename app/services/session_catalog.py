@@ -0,0 +1,427 @@
+"""
+Session Catalog Module
+
+Indexed SQLite catalog of storyboard sessions, their frames and descriptions.
+"""
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.config import settings
+
+
+class SessionCatalog:
+    """
+    SQLite index of every storyboard session in the output directory.
+    
+    The session files stay the source of truth for resuming and rendering;
+    the catalog records what they contain (request, descriptions, frame
+    hashes and timestamps) so lookups and listings are index reads instead
+    of directory scans and JSON parsing. Every update is a single
+    transaction, and like the job store each operation opens its own
+    short-lived connection, so the catalog is safe to share between
+    threads and processes.
+    """
+    
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            user_description TEXT,
+            generation_mode TEXT,
+            pdf_profile TEXT,
+            total_frames INTEGER,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            accessed_at REAL,
+            size_bytes INTEGER,
+            sized_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_created ON sessions (created_at, id);
+        CREATE TABLE IF NOT EXISTS frames (
+            session_id TEXT NOT NULL,
+            frame_number INTEGER NOT NULL,
+            description TEXT,
+            sha256 TEXT,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (session_id, frame_number)
+        );
+    """
+    
+    # Session columns plus the number of frames saved so far
+    _SESSION_QUERY = (
+        'SELECT s.*, (SELECT COUNT(*) FROM frames f '
+        'WHERE f.session_id = s.id AND f.sha256 IS NOT NULL) AS frames_completed '
+        'FROM sessions s '
+    )
+    
+    # Columns added to the sessions table after its first release
+    _ADDED_COLUMNS = {
+        'accessed_at': 'REAL',
+        'size_bytes': 'INTEGER',
+        'sized_at': 'REAL'
+    }
+    
+    # Largest page size of a session listing
+    MAX_PAGE_SIZE = 100
+    
+    # Accesses to a session within this many seconds are recorded once
+    ACCESS_RESOLUTION_SECONDS = 60
+    
+    # Number of sessions whose last recorded access is remembered
+    MAX_ACCESS_ENTRIES = 4096
+    
+    def __init__(self, db_path: str):
+        """
+        Initialize the catalog. The database is created on first use.
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._accesses: Dict[str, float] = OrderedDict()
+        self._access_lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection, creating the schema on first use."""
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    db_dir = os.path.dirname(self.db_path)
+                    if db_dir:
+                        os.makedirs(db_dir, exist_ok=True)
+                    with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+                        conn.execute('PRAGMA journal_mode=WAL')
+                        conn.executescript(self._SCHEMA)
+                        self._add_missing_columns(conn)
+                    self._initialized = True
+        
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def record_session(
+        self,
+        session_id: str,
+        user_description: str,
+        generation_mode: str,
+        pdf_profile: str,
+        created_at: Optional[float] = None
+    ) -> None:
+        """
+        Record the request a session was started with.
+        
+        Args:
+            session_id: The storyboard session ID
+            user_description: The text description of the video sequence
+            generation_mode: 'sequential' or 'anchor_parallel' image generation
+            pdf_profile: PDF export profile of the session
+            created_at: Creation time of the session. Defaults to now.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            self._touch(conn, session_id, created_at or now)
+            conn.execute(
+                'UPDATE sessions SET user_description = ?, generation_mode = ?, pdf_profile = ?, '
+                'updated_at = ? WHERE id = ?',
+                (user_description, generation_mode, pdf_profile, now, session_id)
+            )
+    
+    def set_pdf_profile(self, session_id: str, pdf_profile: str) -> None:
+        """Change the recorded PDF export profile of a session."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'UPDATE sessions SET pdf_profile = ?, updated_at = ? WHERE id = ?',
+                (pdf_profile, time.time(), session_id)
+            )
+    
+    def record_storyboard(
+        self,
+        session_id: str,
+        total_frames: int,
+        descriptions: Iterable[Tuple[int, str]]
+    ) -> None:
+        """
+        Record the segmentation of a session.
+        
+        Args:
+            session_id: The storyboard session ID
+            total_frames: Number of frames in the storyboard
+            descriptions: (frame_number, description) pairs
+        """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            self._touch(conn, session_id, now)
+            conn.execute(
+                'UPDATE sessions SET total_frames = ?, updated_at = ? WHERE id = ?',
+                (total_frames, now, session_id)
+            )
+            conn.executemany(
+                'INSERT INTO frames (session_id, frame_number, description, updated_at) '
+                'VALUES (?, ?, ?, ?) ON CONFLICT (session_id, frame_number) '
+                'DO UPDATE SET description = excluded.description',
+                [(session_id, frame_number, description, now) for frame_number, description in descriptions]
+            )
+    
+    def record_frame(
+        self,
+        session_id: str,
+        frame_number: int,
+        sha256: str,
+        updated_at: Optional[float] = None
+    ) -> None:
+        """
+        Record a saved frame image.
+        
+        Args:
+            session_id: The storyboard session ID
+            frame_number: The frame number (1-based)
+            sha256: Hex digest of the image content
+            updated_at: When the image was saved. Defaults to now.
+        """
+        self.record_frames(session_id, [(frame_number, sha256)], updated_at=updated_at)
+    
+    def record_frames(
+        self,
+        session_id: str,
+        frames: Iterable[Tuple[int, str]],
+        updated_at: Optional[float] = None
+    ) -> None:
+        """
+        Record several saved frame images in one transaction.
+        
+        Args:
+            session_id: The storyboard session ID
+            frames: (frame_number, hex digest of the image content) pairs
+            updated_at: When the images were saved. Defaults to now.
+        """
+        now = updated_at or time.time()
+        with closing(self._connect()) as conn, conn:
+            self._touch(conn, session_id, now)
+            conn.executemany(
+                'INSERT INTO frames (session_id, frame_number, sha256, updated_at) '
+                'VALUES (?, ?, ?, ?) ON CONFLICT (session_id, frame_number) '
+                'DO UPDATE SET sha256 = excluded.sha256, updated_at = excluded.updated_at',
+                [(session_id, frame_number, sha256, now) for frame_number, sha256 in frames]
+            )
+            conn.execute(
+                'UPDATE sessions SET updated_at = MAX(updated_at, ?) WHERE id = ?',
+                (now, session_id)
+            )
+    
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a session and its frames.
+        
+        Args:
+            session_id: The storyboard session ID
+        
+        Returns:
+            Session dictionary with a 'frames' list ordered by frame number,
+            or None if the session isn't catalogued
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                self._SESSION_QUERY + 'WHERE s.id = ?',
+                (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            frame_rows = conn.execute(
+                'SELECT frame_number, description, sha256, updated_at FROM frames '
+                'WHERE session_id = ? ORDER BY frame_number',
+                (session_id,)
+            ).fetchall()
+        
+        session = self._session_dict(row)
+        session['frames'] = [
+            {
+                'frame_number': frame['frame_number'],
+                'description': frame['description'],
+                'sha256': frame['sha256'],
+                'updated_at': frame['updated_at']
+            }
+            for frame in frame_rows
+        ]
+        return session
+    
+    def list_sessions(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List sessions, newest first, one page at a time.
+        
+        Pages are keyed on the creation time index rather than an offset,
+        so every page costs the same however deep into the listing it is.
+        
+        Args:
+            limit: Maximum number of sessions to return (capped at MAX_PAGE_SIZE)
+            cursor: The cursor returned with the previous page, if any
+        
+        Returns:
+            Tuple of (sessions, cursor of the next page or None on the last page)
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        
+        with closing(self._connect()) as conn:
+            if cursor is None:
+                rows = conn.execute(
+                    self._SESSION_QUERY + 'ORDER BY s.created_at DESC, s.id DESC LIMIT ?',
+                    (limit + 1,)
+                ).fetchall()
+            else:
+                created_at, session_id = self._parse_cursor(cursor)
+                rows = conn.execute(
+                    self._SESSION_QUERY + 'WHERE (s.created_at, s.id) < (?, ?) '
+                    'ORDER BY s.created_at DESC, s.id DESC LIMIT ?',
+                    (created_at, session_id, limit + 1)
+                ).fetchall()
+        
+        sessions = [self._session_dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = f"{last['created_at']!r}:{last['id']}"
+        return sessions, next_cursor
+    
+    def record_access(self, session_id: str) -> None:
+        """
+        Record that a session's files were read.
+        
+        Accesses are recorded at most once per ACCESS_RESOLUTION_SECONDS
+        per session and process, so serving every file of a storyboard
+        costs one write rather than one per file.
+        
+        Args:
+            session_id: The storyboard session ID
+        """
+        now = time.time()
+        with self._access_lock:
+            last_access = self._accesses.get(session_id)
+            if last_access is not None and now - last_access < self.ACCESS_RESOLUTION_SECONDS:
+                return
+            self._accesses[session_id] = now
+            self._accesses.move_to_end(session_id)
+            while len(self._accesses) > self.MAX_ACCESS_ENTRIES:
+                self._accesses.popitem(last=False)
+        
+        with closing(self._connect()) as conn, conn:
+            conn.execute('UPDATE sessions SET accessed_at = ? WHERE id = ?', (now, session_id))
+    
+    def sessions_to_size(self) -> List[str]:
+        """
+        Get the sessions whose recorded size may be out of date.
+        
+        Returns:
+            IDs of sessions never sized, or used since they were last sized
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT id FROM sessions WHERE sized_at IS NULL '
+                'OR sized_at < MAX(updated_at, COALESCE(accessed_at, 0))'
+            ).fetchall()
+        return [row['id'] for row in rows]
+    
+    def set_size(self, session_id: str, size_bytes: int, sized_at: float) -> None:
+        """
+        Record the disk usage of a session.
+        
+        Args:
+            session_id: The storyboard session ID
+            size_bytes: Bytes used by the session directory
+            sized_at: When the directory walk started
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'UPDATE sessions SET size_bytes = ?, sized_at = ? WHERE id = ?',
+                (size_bytes, sized_at, session_id)
+            )
+    
+    def sessions_by_last_use(self) -> List[Dict[str, Any]]:
+        """
+        Get every session with its size, least recently used first.
+        
+        Returns:
+            List of dictionaries with 'session_id', 'last_used_at' (last
+            update or access) and 'size_bytes'
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT id, MAX(updated_at, COALESCE(accessed_at, 0)) AS last_used_at, '
+                'COALESCE(size_bytes, 0) AS size_bytes FROM sessions ORDER BY last_used_at, id'
+            ).fetchall()
+        return [
+            {
+                'session_id': row['id'],
+                'last_used_at': row['last_used_at'],
+                'size_bytes': row['size_bytes']
+            }
+            for row in rows
+        ]
+    
+    def delete_session(self, session_id: str) -> None:
+        """Remove a session and its frames from the catalog."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM frames WHERE session_id = ?', (session_id,))
+            conn.execute('DELETE FROM sessions WHERE id = ?', (session_id,))
+        with self._access_lock:
+            self._accesses.pop(session_id, None)
+    
+    def is_empty(self) -> bool:
+        """Whether no session has been catalogued yet."""
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT 1 FROM sessions LIMIT 1').fetchone() is None
+    
+    @classmethod
+    def _add_missing_columns(cls, conn: sqlite3.Connection) -> None:
+        """Add columns introduced since a catalog database was created."""
+        existing = {row[1] for row in conn.execute('PRAGMA table_info(sessions)')}
+        for column, column_type in cls._ADDED_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f'ALTER TABLE sessions ADD COLUMN {column} {column_type}')
+    
+    @staticmethod
+    def _touch(conn: sqlite3.Connection, session_id: str, created_at: float) -> None:
+        """Create the session row if it doesn't exist yet."""
+        conn.execute(
+            'INSERT OR IGNORE INTO sessions (id, created_at, updated_at) VALUES (?, ?, ?)',
+            (session_id, created_at, created_at)
+        )
+    
+    @staticmethod
+    def _parse_cursor(cursor: str) -> Tuple[float, str]:
+        """Split a listing cursor into its creation time and session ID."""
+        created_at, _, session_id = cursor.partition(':')
+        try:
+            return float(created_at), session_id
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor}")
+    
+    @staticmethod
+    def _session_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a session row to a dictionary."""
+        return {
+            'session_id': row['id'],
+            'user_description': row['user_description'],
+            'generation_mode': row['generation_mode'],
+            'pdf_profile': row['pdf_profile'],
+            'total_frames': row['total_frames'],
+            'frames_completed': row['frames_completed'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+            'accessed_at': row['accessed_at'],
+            'size_bytes': row['size_bytes']
+        }
+
+
+# Process-wide catalog shared by all services
+session_catalog = SessionCatalog(settings.SESSION_DB_PATH)
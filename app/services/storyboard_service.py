@@ -2,16 +2,27 @@
 Storyboard Service Module
 
 Business logic for storyboard generation.
+The pipeline is async-native and runs on the shared background event loop;
+the sync methods are thin wrappers for thread-based callers.
 """
+import time
 import asyncio
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Dict, Generator, Optional
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
 
 from app.models.storyboard import StoryboardOutput, StoryboardGenerationResponse
 from app.agents import create_storyboard_agent
+from app.agents.rate_limiter import text_rate_limiter
+from app.agents.resilience import text_resilience
 from app.services.session_manager import SessionManager
-from app.services.response_parser import ResponseParser
+from app.services.response_parser import ResponseParser, IncrementalFrameParser
+from app.services.segmentation_cache import segmentation_cache
+from app.services.checkpoint import GenerationCheckpoint
+from app.services.event_loop import background_loop
 from app.services.image_generation_service import ImageGenerationService
 from app.services.pdf_generator import PDFGenerator
 from app.config import settings
@@ -20,23 +31,56 @@ from app.config import settings
 class StoryboardService:
     """Service for handling storyboard generation operations."""
     
-    def __init__(self):
-        """Initialize the storyboard service."""
-        self.session_service = InMemorySessionService()
+    def __init__(
+        self,
+        runner: Optional[Runner] = None,
+        image_service: Optional[ImageGenerationService] = None,
+        pdf_generator: Optional[PDFGenerator] = None
+    ):
+        """
+        Initialize the storyboard service.
+        
+        Args:
+            runner: ADK runner for the storyboard agent. Defaults to a new
+                runner with its own in-memory session service.
+            image_service: Image generation service to use. Defaults to a new service.
+            pdf_generator: PDF generator to use. Defaults to a new generator.
+        """
+        if runner is None:
+            runner = Runner(
+                agent=create_storyboard_agent(),
+                app_name=settings.STORYBOARD_APP_NAME,
+                session_service=InMemorySessionService()
+            )
+        
+        self.runner = runner
+        self.session_service = runner.session_service
         self.session_manager = SessionManager(
             session_service=self.session_service,
             app_name=settings.STORYBOARD_APP_NAME
         )
         self.response_parser = ResponseParser()
-        self.image_service = ImageGenerationService()
-        self.pdf_generator = PDFGenerator()
+        self.segmentation_cache = segmentation_cache
+        # Segmentations are cached by the model that made them, so a fake
+        # model backend's never answer for the real model's
+        model = runner.agent.model
+        self.text_model_name = (model if isinstance(model, str) else model.model) or None
+        self.image_service = image_service or ImageGenerationService()
+        self.pdf_generator = pdf_generator or PDFGenerator()
     
-    def generate_frames(self, user_description: str) -> StoryboardOutput:
+    def generate_frames(
+        self,
+        user_description: str,
+        user_id: Optional[str] = None
+    ) -> StoryboardOutput:
         """
         Generate storyboard frames from a user description.
         
+        Results are cached, so resubmitting a description skips the agent call.
+        
         Args:
             user_description: The text description of the video sequence
+            user_id: The user the storyboard is generated for. Defaults to configured default.
         
         Returns:
             StoryboardOutput containing total_frames and list of frames
@@ -44,19 +88,206 @@ class StoryboardService:
         Raises:
             ValueError: If agent execution fails or returns invalid data
         """
-        # Create agent and runner
-        agent = create_storyboard_agent()
-        runner = Runner(
-            agent=agent,
-            app_name=settings.STORYBOARD_APP_NAME,
-            session_service=self.session_service
+        return background_loop.run(self.agenerate_frames(user_description, user_id))
+    
+    async def agenerate_frames(
+        self,
+        user_description: str,
+        user_id: Optional[str] = None
+    ) -> StoryboardOutput:
+        """
+        Async variant of generate_frames.
+        
+        Args:
+            user_description: The text description of the video sequence
+            user_id: The user the storyboard is generated for. Defaults to configured default.
+        
+        Returns:
+            StoryboardOutput containing total_frames and list of frames
+        
+        Raises:
+            ValueError: If agent execution fails or returns invalid data
+        """
+        cache_key = self.segmentation_cache.make_key(user_description, self.text_model_name)
+        storyboard = await self.segmentation_cache.aget(cache_key)
+        if storyboard is not None:
+            return storyboard
+        
+        storyboard = await self._asegment(user_description, user_id)
+        await self.segmentation_cache.aput(cache_key, storyboard)
+        return storyboard
+    
+    def generate_frames_stream(
+        self,
+        user_description: str,
+        user_id: Optional[str] = None
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Generate storyboard frames, yielding each frame as soon as it is decoded.
+        
+        Args:
+            user_description: The text description of the video sequence
+            user_id: The user the storyboard is generated for. Defaults to configured default.
+        
+        Yields:
+            Events as described in agenerate_frames_stream
+        
+        Raises:
+            ValueError: If agent execution fails or returns invalid data
+        """
+        return background_loop.iterate(self.agenerate_frames_stream(user_description, user_id))
+    
+    async def agenerate_frames_stream(
+        self,
+        user_description: str,
+        user_id: Optional[str] = None,
+        checkpoint: Optional[GenerationCheckpoint] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Generate storyboard frames, yielding each frame as soon as it is decoded.
+        
+        The agent response is streamed and parsed incrementally, so callers can
+        start working on frame 1 while later frames are still being written.
+        Cached results, and a segmentation saved in the checkpoint by an
+        earlier run, are replayed without calling the agent.
+        
+        Args:
+            user_description: The text description of the video sequence
+            user_id: The user the storyboard is generated for. Defaults to configured default.
+            checkpoint: Optional checkpoint to restore the segmentation from and save it to
+        
+        Yields:
+            'frame_decoded' events with the FrameData and the announced total
+            frame count (None until known), then one 'segmentation_complete'
+            event with the validated StoryboardOutput
+        
+        Raises:
+            ValueError: If agent execution fails or returns invalid data
+        """
+        parser = IncrementalFrameParser()
+        decoded_numbers = set()
+        cache_key = self.segmentation_cache.make_key(user_description, self.text_model_name)
+        checkpointed = None
+        if checkpoint is not None:
+            checkpointed = await asyncio.to_thread(checkpoint.load_storyboard)
+        storyboard = checkpointed or await self.segmentation_cache.aget(cache_key)
+        
+        if storyboard is None and settings.STREAM_SEGMENTATION:
+            run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+            async with aclosing(self._arun_agent(user_description, user_id, run_config)) as events:
+                async for chunk in self.response_parser.aextract_text_chunks(events):
+                    for frame in parser.feed(chunk):
+                        decoded_numbers.add(frame.frame_number)
+                        yield {
+                            'type': 'frame_decoded',
+                            'frame': frame,
+                            'total_frames': parser.total_frames
+                        }
+            
+            storyboard = self.response_parser.parse_json_response(
+                parser.text.strip(),
+                StoryboardOutput
+            )
+            await self.segmentation_cache.aput(cache_key, storyboard)
+        elif storyboard is None:
+            storyboard = await self._asegment(user_description, user_id)
+            await self.segmentation_cache.aput(cache_key, storyboard)
+        
+        if checkpoint is not None and checkpointed is None:
+            await asyncio.to_thread(checkpoint.save_storyboard, storyboard)
+        
+        # The validated document is authoritative; emit anything not yet decoded
+        for frame in storyboard.frames:
+            if frame.frame_number not in decoded_numbers:
+                yield {
+                    'type': 'frame_decoded',
+                    'frame': frame,
+                    'total_frames': storyboard.total_frames
+                }
+        
+        yield {
+            'type': 'segmentation_complete',
+            'storyboard': storyboard
+        }
+    
+    async def _asegment(
+        self,
+        user_description: str,
+        user_id: Optional[str] = None
+    ) -> StoryboardOutput:
+        """
+        Run the storyboard agent without streaming and validate its response.
+        
+        Args:
+            user_description: The text description of the video sequence
+            user_id: The user the storyboard is generated for. Defaults to configured default.
+        
+        Returns:
+            StoryboardOutput containing total_frames and list of frames
+        
+        Raises:
+            ValueError: If agent execution fails or returns invalid data
+        """
+        async with aclosing(self._arun_agent(user_description, user_id)) as events:
+            # Extract and parse response
+            final_response = await self.response_parser.aextract_final_response(events)
+        
+        return self.response_parser.parse_json_response(
+            final_response, 
+            StoryboardOutput
         )
+    
+    def _arun_agent(
+        self,
+        user_description: str,
+        user_id: Optional[str] = None,
+        run_config: Optional[RunConfig] = None
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Run the storyboard agent under the text model resilience policy.
+        
+        Failed runs are retried in a fresh session until the agent has
+        produced its first event; the whole run is bounded by the text model
+        deadline and guarded by its circuit breaker.
+        
+        Args:
+            user_description: The text description of the video sequence
+            user_id: The user the storyboard is generated for. Defaults to configured default.
+            run_config: Optional ADK run configuration (e.g. for streaming)
+        
+        Returns:
+            Async generator of ADK events produced by the agent
+        """
+        return text_resilience.aiterate(
+            lambda: self._arun_agent_attempt(user_description, user_id, run_config)
+        )
+    
+    async def _arun_agent_attempt(
+        self,
+        user_description: str,
+        user_id: Optional[str] = None,
+        run_config: Optional[RunConfig] = None
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Run the storyboard agent once in a temporary session.
+        
+        Args:
+            user_description: The text description of the video sequence
+            user_id: The user the storyboard is generated for. Defaults to configured default.
+            run_config: Optional ADK run configuration (e.g. for streaming)
+        
+        Yields:
+            ADK events produced by the agent; the session is deleted when the
+            generator is exhausted or closed
+        """
+        if user_id is None:
+            user_id = settings.DEFAULT_USER_ID
         
         # Generate unique session
         session_id = self.session_manager.generate_session_id()
         
         # Create session
-        asyncio.run(self.session_manager.create_session(session_id))
+        await self.session_manager.create_session(session_id, user_id)
         
         # Create user message content
         content = types.Content(
@@ -65,67 +296,111 @@ class StoryboardService:
         )
         
         try:
-            # Run the agent
-            events = runner.run(
-                user_id=settings.DEFAULT_USER_ID,
+            # Run the agent once the shared text model limiter admits the call
+            await text_rate_limiter.acquire_async(user_id)
+            async for event in self.runner.run_async(
+                user_id=user_id,
                 session_id=session_id,
-                new_message=content
-            )
-            
-            # Extract and parse response
-            final_response = self.response_parser.extract_final_response(events)
-            storyboard = self.response_parser.parse_json_response(
-                final_response, 
-                StoryboardOutput
-            )
-            
-            return storyboard
+                new_message=content,
+                run_config=run_config
+            ):
+                yield event
         
         finally:
             # Clean up session
-            asyncio.run(self.session_manager.delete_session(session_id))
+            await self.session_manager.delete_session(session_id, user_id)
     
-    def generate_complete_storyboard(self, user_description: str) -> StoryboardGenerationResponse:
+    def generate_complete_storyboard(
+        self,
+        user_description: str,
+        user_id: Optional[str] = None,
+        generation_mode: str = ImageGenerationService.SEQUENTIAL,
+        use_cache: bool = True,
+        pdf_profile: Optional[str] = None
+    ) -> StoryboardGenerationResponse:
         """
         Generate complete storyboard with sequential images and PDF.
         
         Args:
             user_description: The text description of the video sequence
+            user_id: The user the storyboard is generated for. Defaults to configured default.
+            generation_mode: 'sequential' or 'anchor_parallel' image generation
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+            pdf_profile: PDF export profile of the storyboard. Defaults to the configured profile.
+        
+        Returns:
+            StoryboardGenerationResponse with success status and PDF path
+        """
+        return background_loop.run(self.agenerate_complete_storyboard(
+            user_description,
+            user_id=user_id,
+            generation_mode=generation_mode,
+            use_cache=use_cache,
+            pdf_profile=pdf_profile
+        ))
+    
+    async def agenerate_complete_storyboard(
+        self,
+        user_description: str,
+        user_id: Optional[str] = None,
+        generation_mode: str = ImageGenerationService.SEQUENTIAL,
+        use_cache: bool = True,
+        pdf_profile: Optional[str] = None
+    ) -> StoryboardGenerationResponse:
+        """
+        Async variant of generate_complete_storyboard.
+        
+        Model calls are awaited on the event loop; the segmentation and each
+        frame are checkpointed to the session directory as soon as they exist.
+        The PDF is not rendered here: it is derived from the checkpoint on
+        its first download. The response records the seconds spent on
+        'segmentation' and 'images'.
+        
+        Args:
+            user_description: The text description of the video sequence
+            user_id: The user the storyboard is generated for. Defaults to configured default.
+            generation_mode: 'sequential' or 'anchor_parallel' image generation
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+            pdf_profile: PDF export profile of the storyboard. Defaults to the configured profile.
         
         Returns:
             StoryboardGenerationResponse with success status and PDF path
         """
+        session_id = None
+        timings = {}
         try:
-            # Step 1: Generate frame descriptions using the first agent
-            storyboard_output = self.generate_frames(user_description)
-            
-            # Step 2: Generate unique session ID for this storyboard
+            # Step 1: Generate unique session ID and checkpoint for this storyboard
             session_id = self.session_manager.generate_session_id()
+            checkpoint = GenerationCheckpoint(session_id)
+            await asyncio.to_thread(checkpoint.start, user_description, generation_mode, pdf_profile)
             
-            # Step 3: Generate images sequentially using the second agent
-            generated_images = self.image_service.generate_sequential_images(
-                storyboard_output.frames
-            )
+            # Step 2: Generate frame descriptions using the first agent
+            stage_started = time.perf_counter()
+            storyboard_output = await self.agenerate_frames(user_description, user_id)
+            await asyncio.to_thread(checkpoint.save_storyboard, storyboard_output)
+            timings['segmentation'] = time.perf_counter() - stage_started
             
-            # Step 4: Save images to disk
-            image_paths = self.image_service.save_images(generated_images, session_id)
-            
-            # Step 4.5: Save frame descriptions metadata
-            self.image_service.save_frame_descriptions(storyboard_output.frames, session_id)
-            
-            # Step 5: Generate PDF from images with descriptions
-            frame_descriptions = [frame.description for frame in storyboard_output.frames]
-            pdf_path = self.pdf_generator.create_storyboard_pdf(
-                image_paths=image_paths,
-                session_id=session_id,
-                frame_descriptions=frame_descriptions
+            # Step 3: Generate images using the second agent, saving each frame
+            stage_started = time.perf_counter()
+            await self.image_service.agenerate_images(
+                storyboard_output.frames,
+                generation_mode=generation_mode,
+                user_id=user_id,
+                use_cache=use_cache,
+                checkpoint=checkpoint
             )
+            timings['images'] = time.perf_counter() - stage_started
+            
+            # Step 4: The PDF is rendered from the saved frames when first downloaded
+            pdf_path = self.pdf_generator.storyboard_pdf_path(session_id)
             
             return StoryboardGenerationResponse(
                 success=True,
                 message="Storyboard generated successfully",
                 storyboard_path=pdf_path,
-                total_frames=storyboard_output.total_frames
+                total_frames=storyboard_output.total_frames,
+                session_id=session_id,
+                timings=timings
             )
         
         except (ValueError, IOError, OSError) as e:
@@ -133,5 +408,7 @@ class StoryboardService:
                 success=False,
                 message=f"Storyboard generation failed: {str(e)}",
                 storyboard_path=None,
-                total_frames=None
+                total_frames=None,
+                session_id=session_id,
+                timings=timings
             )
@@ -4,13 +4,14 @@ Streaming Storyboard Service Module
 Business logic for storyboard generation with progress streaming.
 Extends StoryboardService to add real-time SSE progress events.
 """
-from typing import Generator, Dict, Any
+import asyncio
+from contextlib import aclosing
+from typing import AsyncGenerator, Generator, Dict, Any, Optional
 
+from app.services.checkpoint import GenerationCheckpoint
+from app.services.event_loop import background_loop
 from app.services.storyboard_service import StoryboardService
-from app.services.session_manager import SessionManager
 from app.services.image_generation_service import ImageGenerationService
-from app.services.pdf_generator import PDFGenerator
-from app.config import settings
 
 
 class StreamingStoryboardService(StoryboardService):
@@ -21,20 +22,24 @@ class StreamingStoryboardService(StoryboardService):
     SSE-compatible progress events for real-time UI updates.
     """
     
-    def __init__(self):
-        """Initialize the streaming storyboard service."""
-        super().__init__()
-        # Override with fresh instances if needed for streaming context
-        self.image_service = ImageGenerationService()
-        self.pdf_generator = PDFGenerator()
-    
     def generate_complete_storyboard_stream(
         self, 
-        user_description: str
+        user_description: str,
+        user_id: Optional[str] = None,
+        generation_mode: str = ImageGenerationService.SEQUENTIAL,
+        use_cache: bool = True,
+        pdf_profile: Optional[str] = None
     ) -> Generator[Dict[str, Any], None, None]:
         """
         Generate complete storyboard with progress events.
         
+        Args:
+            user_description: The text description of the video sequence
+            user_id: The user the storyboard is generated for. Defaults to configured default.
+            generation_mode: 'sequential' or 'anchor_parallel' image generation
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+            pdf_profile: PDF export profile of the storyboard. Defaults to the configured profile.
+        
         Yields events with the following types:
         - step_start: A step has started
         - step_progress: Progress within a step (for frame generation)
@@ -42,66 +47,138 @@ class StreamingStoryboardService(StoryboardService):
         - complete: Generation is finished with final result
         - error: An error occurred
         """
+        return background_loop.iterate(self.agenerate_complete_storyboard_stream(
+            user_description,
+            user_id=user_id,
+            generation_mode=generation_mode,
+            use_cache=use_cache,
+            pdf_profile=pdf_profile
+        ))
+    
+    async def agenerate_complete_storyboard_stream(
+        self, 
+        user_description: str,
+        user_id: Optional[str] = None,
+        generation_mode: str = ImageGenerationService.SEQUENTIAL,
+        use_cache: bool = True,
+        session_id: Optional[str] = None,
+        pdf_profile: Optional[str] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Async variant of generate_complete_storyboard_stream.
+        
+        The segmentation and every frame are checkpointed to the session
+        directory as soon as they exist. The session ID is announced in the
+        first event and repeated in error events, so a failed run can be
+        continued with aresume_storyboard_stream.
+        
+        Args:
+            user_description: The text description of the video sequence
+            user_id: The user the storyboard is generated for. Defaults to configured default.
+            generation_mode: 'sequential' or 'anchor_parallel' image generation
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+            session_id: Session to generate into. Defaults to a new session;
+                an existing session is continued from its checkpoint.
+            pdf_profile: PDF export profile of a new session. Defaults to the configured profile.
+        
+        Yields:
+            The same events as generate_complete_storyboard_stream
+        """
+        # Generate unique session ID for this storyboard
+        session_id = session_id or self.session_manager.generate_session_id()
+        checkpoint = GenerationCheckpoint(session_id)
+        
         try:
             # Step 1: Analyzing description
             yield {
                 'type': 'step_start',
                 'step': 1,
                 'step_name': 'analyzing',
-                'message': 'Analyzing your description...'
-            }
-            
-            storyboard_output = self.generate_frames(user_description)
-            total_frames = storyboard_output.total_frames
-            
-            yield {
-                'type': 'step_complete',
-                'step': 1,
-                'step_name': 'analyzing',
-                'message': f'Analysis complete. Planning {total_frames} frames.',
-                'total_frames': total_frames
+                'message': 'Analyzing your description...',
+                'session_id': session_id
             }
             
-            # Step 2: Generate images with per-frame progress
-            yield {
-                'type': 'step_start',
-                'step': 2,
-                'step_name': 'generating',
-                'message': 'Generating frame images...',
-                'total_frames': total_frames
-            }
+            if not await asyncio.to_thread(checkpoint.exists):
+                await asyncio.to_thread(checkpoint.start, user_description, generation_mode, pdf_profile)
             
-            # Generate unique session ID for this storyboard
-            session_id = self.session_manager.generate_session_id()
-            
-            # Generate images with progress updates
+            # Steps 1 and 2 overlap: frame images start as soon as their
+            # descriptions are decoded from the streamed agent response
+            storyboard_output = None
+            total_frames = None
+            decoded_frames = 0
             generated_images = []
-            for frame_event in self.image_service.generate_sequential_images_stream(
-                storyboard_output.frames
+            
+            async for event in self._agenerate_overlapped(
+                user_description, user_id, generation_mode, use_cache, checkpoint
             ):
-                if frame_event['type'] == 'frame_complete':
+                if event['type'] == 'frame_decoded':
+                    frame = event['frame']
+                    decoded_frames += 1
+                    total_frames = event['total_frames'] or total_frames
+                    
+                    if decoded_frames == 1:
+                        # Step 2: Generate images with per-frame progress
+                        yield {
+                            'type': 'step_start',
+                            'step': 2,
+                            'step_name': 'generating',
+                            'message': 'Generating frame images...',
+                            'total_frames': total_frames,
+                            'generation_mode': generation_mode
+                        }
+                    
+                    yield {
+                        'type': 'frame_description',
+                        'frame_number': frame.frame_number,
+                        'description': frame.description,
+                        'total_frames': total_frames
+                    }
+                
+                elif event['type'] == 'segmentation_complete':
+                    storyboard_output = event['storyboard']
+                    total_frames = storyboard_output.total_frames
+                    
+                    yield {
+                        'type': 'step_complete',
+                        'step': 1,
+                        'step_name': 'analyzing',
+                        'message': f'Analysis complete. Planning {total_frames} frames.',
+                        'total_frames': total_frames
+                    }
+                
+                elif event['type'] == 'frame_complete':
                     generated_images.append(
-                        (frame_event['frame_number'], frame_event['image_bytes'])
+                        (event['frame_number'], event['image_bytes'])
                     )
+                    verb = 'Restored' if event.get('restored') else 'Generated'
                     yield {
                         'type': 'step_progress',
                         'step': 2,
                         'step_name': 'generating',
-                        'current_frame': frame_event['frame_number'],
-                        'total_frames': total_frames,
-                        'message': f"Generated frame {frame_event['frame_number']}/{total_frames}"
+                        'current_frame': event['frame_number'],
+                        'completed_frames': len(generated_images),
+                        'total_frames': total_frames or decoded_frames,
+                        'generation_mode': generation_mode,
+                        'restored': bool(event.get('restored')),
+                        'message': f"{verb} frame {event['frame_number']}/{total_frames or decoded_frames}"
                     }
-                elif frame_event['type'] == 'frame_start':
+                
+                elif event['type'] == 'frame_start':
                     yield {
                         'type': 'step_progress',
                         'step': 2,
                         'step_name': 'generating',
-                        'current_frame': frame_event['frame_number'],
-                        'total_frames': total_frames,
+                        'current_frame': event['frame_number'],
+                        'completed_frames': len(generated_images),
+                        'total_frames': total_frames or decoded_frames,
+                        'generation_mode': generation_mode,
                         'generating': True,
-                        'message': f"Generating frame {frame_event['frame_number']}/{total_frames}..."
+                        'message': f"Generating frame {event['frame_number']}/{total_frames or decoded_frames}..."
                     }
             
+            # Frames may complete out of order in anchor-parallel mode
+            generated_images.sort(key=lambda image: image[0])
+            
             yield {
                 'type': 'step_complete',
                 'step': 2,
@@ -110,33 +187,22 @@ class StreamingStoryboardService(StoryboardService):
                 'total_frames': total_frames
             }
             
-            # Step 3: Save images and generate PDF
+            # Step 3: Frames are already saved; the PDF is rendered from
+            # them when first downloaded
             yield {
                 'type': 'step_start',
                 'step': 3,
                 'step_name': 'creating_pdf',
-                'message': 'Creating PDF storyboard...'
+                'message': 'Preparing PDF storyboard...'
             }
             
-            # Save images to disk
-            image_paths = self.image_service.save_images(generated_images, session_id)
-            
-            # Save frame descriptions metadata
-            self.image_service.save_frame_descriptions(storyboard_output.frames, session_id)
-            
-            # Generate PDF with descriptions
-            frame_descriptions = [frame.description for frame in storyboard_output.frames]
-            pdf_path = self.pdf_generator.create_storyboard_pdf(
-                image_paths=image_paths,
-                session_id=session_id,
-                frame_descriptions=frame_descriptions
-            )
+            pdf_path = self.pdf_generator.storyboard_pdf_path(session_id)
             
             yield {
                 'type': 'step_complete',
                 'step': 3,
                 'step_name': 'creating_pdf',
-                'message': 'PDF created successfully.'
+                'message': 'PDF ready to download.'
             }
             
             # Final complete event
@@ -152,5 +218,152 @@ class StreamingStoryboardService(StoryboardService):
         except (ValueError, IOError, OSError) as e:
             yield {
                 'type': 'error',
-                'message': f'Storyboard generation failed: {str(e)}'
+                'message': f'Storyboard generation failed: {str(e)}',
+                'session_id': session_id
             }
+    
+    def resume_storyboard_stream(
+        self,
+        session_id: str,
+        user_id: Optional[str] = None,
+        use_cache: bool = True
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Continue an interrupted storyboard generation with progress events.
+        
+        Args:
+            session_id: The session of the interrupted generation
+            user_id: The user the storyboard is generated for. Defaults to configured default.
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+        
+        Yields:
+            The same events as generate_complete_storyboard_stream
+        """
+        return background_loop.iterate(
+            self.aresume_storyboard_stream(session_id, user_id=user_id, use_cache=use_cache)
+        )
+    
+    async def aresume_storyboard_stream(
+        self,
+        session_id: str,
+        user_id: Optional[str] = None,
+        use_cache: bool = True
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Async variant of resume_storyboard_stream.
+        
+        The original description and generation mode are read from the
+        session checkpoint. A checkpointed segmentation is reused, frames
+        that were already generated are restored, and generation continues
+        from the first missing frame with the right reference image.
+        
+        Args:
+            session_id: The session of the interrupted generation
+            user_id: The user the storyboard is generated for. Defaults to configured default.
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+        
+        Yields:
+            The same events as generate_complete_storyboard_stream
+        """
+        try:
+            request = await asyncio.to_thread(GenerationCheckpoint(session_id).load_request)
+        except (ValueError, IOError, OSError) as e:
+            yield {
+                'type': 'error',
+                'message': f'Storyboard resume failed: {str(e)}',
+                'session_id': session_id
+            }
+            return
+        
+        async with aclosing(self.agenerate_complete_storyboard_stream(
+            request['user_description'],
+            user_id=user_id,
+            generation_mode=request['generation_mode'],
+            use_cache=use_cache,
+            session_id=session_id
+        )) as events:
+            async for event in events:
+                yield event
+    
+    async def _agenerate_overlapped(
+        self,
+        user_description: str,
+        user_id: Optional[str],
+        generation_mode: str,
+        use_cache: bool = True,
+        checkpoint: Optional[GenerationCheckpoint] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Run segmentation and image generation concurrently and merge their events.
+        
+        A segmentation task streams frame descriptions from the agent while
+        an image task consumes them as they arrive, so the first image call
+        starts without waiting for the full agent response.
+        
+        Args:
+            user_description: The text description of the video sequence
+            user_id: The user the storyboard is generated for
+            generation_mode: 'sequential' or 'anchor_parallel' image generation
+            use_cache: Whether cached images may be reused instead of generating fresh ones
+            checkpoint: Optional checkpoint to restore progress from and save progress to
+        
+        Yields:
+            'frame_decoded' and 'segmentation_complete' events from segmentation,
+            and 'frame_start' and 'frame_complete' events from image generation
+        
+        Raises:
+            ValueError: If either segmentation or image generation fails
+        """
+        events = asyncio.Queue()
+        frames = asyncio.Queue()
+        
+        async def segment():
+            try:
+                async for event in self.agenerate_frames_stream(user_description, user_id, checkpoint):
+                    events.put_nowait(event)
+                    if event['type'] == 'frame_decoded':
+                        frames.put_nowait(event['frame'])
+            finally:
+                frames.put_nowait(_END)
+        
+        async def decoded_frames():
+            while True:
+                frame = await frames.get()
+                if frame is _END:
+                    return
+                yield frame
+        
+        async def render():
+            async for event in self.image_service.agenerate_images_stream(
+                decoded_frames(),
+                generation_mode=generation_mode,
+                user_id=user_id,
+                use_cache=use_cache,
+                checkpoint=checkpoint
+            ):
+                events.put_nowait(event)
+        
+        tasks = [asyncio.ensure_future(segment()), asyncio.ensure_future(render())]
+        for task in tasks:
+            # A finished task is queued behind every event it produced
+            task.add_done_callback(events.put_nowait)
+        
+        try:
+            finished = 0
+            while finished < len(tasks):
+                event = await events.get()
+                if isinstance(event, asyncio.Future):
+                    finished += 1
+                    if not event.cancelled() and event.exception() is not None:
+                        raise ValueError(str(event.exception()))
+                else:
+                    yield event
+        finally:
+            # Stop both tasks early on failure or client disconnect
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Marks the end of the decoded frames in the overlap queue
+_END = object()
@@ -0,0 +1,105 @@
+"""
+Job Workspace Module
+
+Isolated scratch directories for individual generation jobs.
+"""
+import os
+import time
+import shutil
+import tempfile
+from typing import Optional
+from app.config import settings
+
+
+class JobWorkspace:
+    """
+    Private scratch directory for one job, removed when the job ends.
+    
+    Each workspace is a unique directory under OUTPUT_DIR/.work, so
+    concurrent jobs never see or delete each other's files. Because it sits
+    on the same filesystem as the session directories, files staged here
+    can be moved into place atomically with os.replace.
+    """
+    
+    def __init__(self, job_id: Optional[str] = None, root: Optional[str] = None):
+        """
+        Initialize the workspace.
+        
+        Args:
+            job_id: Optional identifier used as the directory name prefix
+            root: Parent directory for workspaces. Defaults to OUTPUT_DIR/.work.
+        """
+        self.job_id = job_id
+        self.root = root or os.path.join(settings.OUTPUT_DIR, '.work')
+        self.path: Optional[str] = None
+    
+    def __enter__(self) -> 'JobWorkspace':
+        """Create the workspace directory."""
+        os.makedirs(self.root, exist_ok=True)
+        prefix = f"{self.job_id}-" if self.job_id else 'job-'
+        self.path = tempfile.mkdtemp(prefix=prefix, dir=self.root)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """Remove the workspace directory and everything in it."""
+        if self.path:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path = None
+    
+    def file_path(self, name: str) -> str:
+        """
+        Get the path of a scratch file inside the workspace.
+        
+        Args:
+            name: File name
+        
+        Returns:
+            Absolute path inside the workspace
+        """
+        if self.path is None:
+            raise RuntimeError("Workspace is not open")
+        return os.path.join(self.path, os.path.basename(name))
+    
+    def write_atomic(self, target_path: str, data: bytes) -> str:
+        """
+        Write a file so readers only ever see the old or the new content.
+        
+        Args:
+            target_path: Final destination of the file
+            data: File content
+        
+        Returns:
+            The target path
+        """
+        staging_path = self.file_path(os.path.basename(target_path))
+        with open(staging_path, 'wb') as f:
+            f.write(data)
+        os.replace(staging_path, target_path)
+        return target_path
+    
+    @staticmethod
+    def remove_stale(max_age_seconds: float, root: Optional[str] = None) -> int:
+        """
+        Remove workspaces left behind by jobs that were killed mid-run.
+        
+        Args:
+            max_age_seconds: Workspaces older than this are removed
+            root: Parent directory for workspaces. Defaults to OUTPUT_DIR/.work.
+        
+        Returns:
+            Number of workspaces removed
+        """
+        root = root or os.path.join(settings.OUTPUT_DIR, '.work')
+        if not os.path.isdir(root):
+            return 0
+        
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for entry in os.scandir(root):
+            try:
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                pass  # Ignore workspaces removed concurrently
+        return removed
@@ -3,6 +3,11 @@
  * Handles single frame editing functionality
  */
 
+/**
+ * Interval between job status polls while an edit is running
+ */
+const JOB_POLL_INTERVAL_MS = 1000;
+
 /**
  * Edit modal DOM elements - populated by initFrameEdit()
  */
@@ -75,7 +80,7 @@ function openEditModal(frameNumber, imagePath) {
     
     // Update modal content
     document.getElementById('editFrameNumber').textContent = frameNumber;
-    editElements.previewImage.src = imagePath + '?t=' + Date.now();
+    editElements.previewImage.src = imagePath;
     editElements.instructionsInput.value = '';
     
     // Show form, hide loading
@@ -156,7 +161,7 @@ async function applyFrameEdit() {
     editElements.applyBtn.disabled = true;
     
     try {
-        const response = await fetch('/storyboard/edit-frame', {
+        const response = await fetch('/jobs/edit-frame', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
@@ -167,11 +172,15 @@ async function applyFrameEdit() {
             })
         });
         
-        const data = await response.json();
+        const job = await response.json();
+        const data = response.ok
+            ? await waitForJob(job.status_url)
+            : { success: false, message: job.error };
         
         if (data.success) {
             window.UI.showToast(`Frame ${state.selectedFrameNumber} edited successfully!`, 'success');
-            refreshFrameImage(state.sessionId, state.selectedFrameNumber);
+            await loadAssets(state.sessionId);
+            refreshFrameImage(state.selectedFrameNumber);
             refreshPdfLink(state.sessionId);
             closeEditModal();
         } else {
@@ -187,12 +196,27 @@ async function applyFrameEdit() {
     state.isEditing = false;
 }
 
+/**
+ * Poll a background job until it finishes and return its result
+ */
+async function waitForJob(statusUrl) {
+    while (true) {
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+        
+        if (job.status === 'succeeded') return job.result;
+        if (job.status === 'failed' || job.status === 'cancelled') return { success: false, message: job.error };
+        
+        await window.delay(JOB_POLL_INTERVAL_MS);
+    }
+}
+
 /**
  * Refresh frame image after edit
+ * The edit changed the frame's content, so its reloaded asset URL is new.
  */
-function refreshFrameImage(sessionId, frameNumber) {
-    const paddedNumber = String(frameNumber).padStart(3, '0');
-    const newImagePath = `/output/${sessionId}/frame_${paddedNumber}.png?t=${Date.now()}`;
+function refreshFrameImage(frameNumber) {
+    const newImagePath = frameAssetUrl(frameNumber, 'thumb');
     
     const frameCard = document.querySelector(`.frame-card[data-frame-number="${frameNumber}"]`);
     if (frameCard) {
@@ -206,7 +230,8 @@ function refreshFrameImage(sessionId, frameNumber) {
  */
 function refreshPdfLink(sessionId) {
     const pdfLink = document.getElementById('pdfDownloadLink');
-    pdfLink.href = `/output/${sessionId}/storyboard.pdf?t=${Date.now()}`;
+    const assets = window.AppState.assets;
+    pdfLink.href = (assets && assets.pdfUrl) || `/output/${sessionId}/storyboard.pdf`;
 }
 
 /**
@@ -14,7 +14,10 @@ const state = {
     eventSource: null,
     selectedFrameNumber: null,
     sessionId: null,
-    storyboardContext: null
+    resumeSessionId: null,
+    storyboardContext: null,
+    assets: null,
+    frameDescriptions: {}
 };
 
 // Export for use by other modules
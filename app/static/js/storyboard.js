@@ -3,6 +3,12 @@
  * Handles storyboard generation, streaming, and frame rendering
  */
 
+/**
+ * Reconnect settings for job event streams interrupted mid-generation
+ */
+const STREAM_RECONNECT_DELAY_MS = 1000;
+const MAX_STREAM_RECONNECTS = 5;
+
 /**
  * Storyboard DOM elements - populated by initStoryboard()
  */
@@ -10,7 +16,9 @@ const storyboardElements = {
     textInput: null,
     charCount: null,
     generateBtn: null,
-    framesGrid: null
+    parallelModeToggle: null,
+    framesGrid: null,
+    resumeBtn: null
 };
 
 /**
@@ -20,7 +28,9 @@ function initStoryboard() {
     storyboardElements.textInput = document.getElementById('textInput');
     storyboardElements.charCount = document.getElementById('charCount');
     storyboardElements.generateBtn = document.getElementById('generateBtn');
+    storyboardElements.parallelModeToggle = document.getElementById('parallelModeToggle');
     storyboardElements.framesGrid = document.getElementById('framesGrid');
+    storyboardElements.resumeBtn = document.getElementById('resumeBtn');
     
     // Event listeners
     storyboardElements.textInput.addEventListener('input', handleInputChange);
@@ -51,7 +61,7 @@ function handleKeyDown(e) {
 }
 
 /**
- * Handle generate button click - Uses SSE for real-time progress
+ * Handle generate button click - Queues a job and follows its SSE progress
  */
 async function handleGenerate() {
     const state = window.AppState;
@@ -59,10 +69,38 @@ async function handleGenerate() {
     
     if (!description || state.isGenerating) return;
 
+    state.resumeSessionId = null;
+    await runGenerationJob('/jobs/storyboard', {
+        user_description: description,
+        generation_mode: storyboardElements.parallelModeToggle.checked
+            ? 'anchor_parallel'
+            : 'sequential'
+    });
+}
+
+/**
+ * Resume the failed generation - frames already generated are kept
+ */
+async function resumeGeneration() {
+    const state = window.AppState;
+    if (!state.resumeSessionId || state.isGenerating) return;
+
+    await runGenerationJob('/jobs/storyboard/resume', {
+        session_id: state.resumeSessionId
+    });
+}
+
+/**
+ * Queue a generation job and follow its progress until it finishes
+ */
+async function runGenerationJob(url, body) {
+    const state = window.AppState;
+
     state.isGenerating = true;
     state.currentStep = 0;
     state.totalFrames = 0;
     state.currentFrame = 0;
+    state.frameDescriptions = {};
 
     // Update UI state
     window.UI.showLoading();
@@ -71,18 +109,20 @@ async function handleGenerate() {
     window.UI.resetProgress();
 
     try {
-        const response = await fetch('/storyboard/generate-stream', {
+        // Queue the generation as a background job, then follow its events
+        const submitResponse = await fetch(url, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ user_description: description })
+            body: JSON.stringify(body)
         });
 
-        if (!response.ok) throw new Error('Failed to start generation');
+        if (!submitResponse.ok) throw new Error('Failed to start generation');
 
-        await processStreamResponse(response);
+        const job = await submitResponse.json();
+        await followJobEvents(job.events_url);
     } catch (error) {
         console.error('Generation error:', error);
-        window.UI.showError(error.message);
+        showGenerationError(error.message);
         window.UI.showToast('Failed to generate storyboard', 'error');
         state.isGenerating = false;
         window.UI.hideLoading();
@@ -90,24 +130,58 @@ async function handleGenerate() {
 }
 
 /**
- * Process SSE stream response
+ * Follow a job's SSE progress until it completes or fails, resuming after
+ * the last received event if the connection drops (e.g. a server restart)
+ */
+async function followJobEvents(eventsUrl) {
+    const state = window.AppState;
+    let lastEventId = 0;
+    let reconnects = 0;
+
+    while (state.isGenerating) {
+        const response = await fetch(`${eventsUrl}?after=${lastEventId}`);
+        if (!response.ok) throw new Error('Failed to follow generation progress');
+
+        const previousEventId = lastEventId;
+        lastEventId = await processStreamResponse(response, lastEventId);
+        if (!state.isGenerating) break;
+
+        // Only count reconnects that made no progress
+        reconnects = lastEventId > previousEventId ? 0 : reconnects + 1;
+        if (reconnects > MAX_STREAM_RECONNECTS) {
+            throw new Error('Lost connection to generation progress');
+        }
+        await window.delay(STREAM_RECONNECT_DELAY_MS);
+    }
+}
+
+/**
+ * Process SSE stream response, returning the ID of the last event received
  */
-async function processStreamResponse(response) {
+async function processStreamResponse(response, lastEventId = 0) {
     const reader = response.body.getReader();
     const decoder = new TextDecoder();
     let buffer = '';
 
     while (true) {
-        const { done, value } = await reader.read();
-        if (done) break;
+        let chunk;
+        try {
+            chunk = await reader.read();
+        } catch (e) {
+            // Connection dropped; the caller resumes from lastEventId
+            break;
+        }
+        if (chunk.done) break;
 
-        buffer += decoder.decode(value, { stream: true });
+        buffer += decoder.decode(chunk.value, { stream: true });
         
         const lines = buffer.split('\n');
         buffer = lines.pop() || '';
 
         for (const line of lines) {
-            if (line.startsWith('data: ')) {
+            if (line.startsWith('id: ')) {
+                lastEventId = parseInt(line.slice(4), 10) || lastEventId;
+            } else if (line.startsWith('data: ')) {
                 const jsonStr = line.slice(6);
                 if (jsonStr.trim()) {
                     try {
@@ -119,6 +193,8 @@ async function processStreamResponse(response) {
             }
         }
     }
+
+    return lastEventId;
 }
 
 /**
@@ -137,6 +213,9 @@ function handleStreamEvent(event) {
         case 'step_complete':
             handleStepComplete(event);
             break;
+        case 'frame_description':
+            handleFrameDescription(event);
+            break;
         case 'complete':
             handleGenerationComplete(event);
             break;
@@ -153,6 +232,10 @@ function handleStepStart(event) {
     const state = window.AppState;
     state.currentStep = event.step;
     
+    if (event.session_id) {
+        state.resumeSessionId = event.session_id;
+    }
+    
     if (event.total_frames) {
         state.totalFrames = event.total_frames;
     }
@@ -174,9 +257,12 @@ function handleStepProgress(event) {
     state.currentFrame = event.current_frame;
     state.totalFrames = event.total_frames;
     
+    // Frames finish out of order in anchor-parallel mode, so prefer the completed count
+    const completedFrames = event.completed_frames ?? event.current_frame;
+    
     const stepElement = document.querySelector(`.progress-step[data-step="${event.step}"]`);
     if (stepElement) {
-        const progressPercent = (event.current_frame / event.total_frames) * 100;
+        const progressPercent = (completedFrames / event.total_frames) * 100;
         stepElement.style.setProperty('--progress', `${progressPercent}%`);
         stepElement.classList.add('in-progress');
         
@@ -189,6 +275,18 @@ function handleStepProgress(event) {
     window.UI.updateLoadingText(event.message);
 }
 
+/**
+ * Handle frame description event - descriptions stream in during analysis
+ */
+function handleFrameDescription(event) {
+    const state = window.AppState;
+    state.frameDescriptions[event.frame_number] = event.description;
+    
+    if (event.total_frames) {
+        state.totalFrames = event.total_frames;
+    }
+}
+
 /**
  * Handle step complete event
  */
@@ -209,6 +307,7 @@ function handleGenerationComplete(event) {
     const state = window.AppState;
     state.isGenerating = false;
     state.generatedData = event;
+    state.resumeSessionId = null;
     
     window.UI.hideLoading();
     showResults(event);
@@ -221,15 +320,26 @@ function handleGenerationComplete(event) {
 function handleGenerationError(event) {
     const state = window.AppState;
     state.isGenerating = false;
+    if (event.session_id) {
+        state.resumeSessionId = event.session_id;
+    }
     window.UI.hideLoading();
-    window.UI.showError(event.message);
+    showGenerationError(event.message);
     window.UI.showToast('Failed to generate storyboard', 'error');
 }
 
+/**
+ * Show the error state, offering to resume when the failed run left a checkpoint
+ */
+function showGenerationError(message) {
+    window.UI.showError(message);
+    storyboardElements.resumeBtn.hidden = !window.AppState.resumeSessionId;
+}
+
 /**
  * Show results with frame data
  */
-function showResults(data) {
+async function showResults(data) {
     const state = window.AppState;
     
     // Store context for frame editing
@@ -240,10 +350,47 @@ function showResults(data) {
     document.getElementById('frameCount').textContent = 
         `${data.total_frames} frames generated`;
 
+    await loadAssets(resolveSessionId(data));
     renderFrames(data);
     updatePdfLink(data);
 }
 
+/**
+ * Get the session ID of a generation result
+ */
+function resolveSessionId(data) {
+    if (data.session_id) return data.session_id;
+    if (data.storyboard_path) {
+        const pathMatch = data.storyboard_path.match(/([a-f0-9-]+)\/storyboard\.pdf$/i);
+        if (pathMatch) return pathMatch[1];
+    }
+    return null;
+}
+
+/**
+ * Load the content-versioned URLs of a session's frames and PDF
+ * Versioned URLs are cached by the browser for good, so this is fetched
+ * again after every change to pick up the new versions.
+ */
+async function loadAssets(sessionId) {
+    const state = window.AppState;
+    state.assets = null;
+    if (!sessionId) return;
+    
+    try {
+        const response = await fetch(`/storyboard/${sessionId}/assets`);
+        if (!response.ok) return;
+        
+        const assets = await response.json();
+        state.assets = {
+            pdfUrl: assets.pdf_url,
+            frames: Object.fromEntries(assets.frames.map(frame => [frame.frame_number, frame]))
+        };
+    } catch (error) {
+        console.error('Failed to load asset URLs:', error);
+    }
+}
+
 /**
  * Render frame cards
  */
@@ -251,13 +398,7 @@ function renderFrames(data) {
     const state = window.AppState;
     storyboardElements.framesGrid.innerHTML = '';
 
-    // Extract session ID
-    let sessionId = data.session_id;
-    if (!sessionId && data.storyboard_path) {
-        const pathMatch = data.storyboard_path.match(/([a-f0-9-]+)\/storyboard\.pdf$/i);
-        if (pathMatch) sessionId = pathMatch[1];
-    }
-
+    const sessionId = resolveSessionId(data);
     if (!sessionId) {
         console.error('Could not determine session ID');
         return;
@@ -271,6 +412,26 @@ function renderFrames(data) {
     }
 }
 
+/**
+ * Get the URL of a frame image derivative
+ * @param {string} kind - 'thumb' for cards, 'web' for previews
+ */
+function frameImageUrl(sessionId, frameNumber, kind) {
+    const paddedNumber = String(frameNumber).padStart(3, '0');
+    return `/output/${sessionId}/derived/frame_${paddedNumber}_${kind}.webp`;
+}
+
+/**
+ * Get the versioned URL of a frame image derivative, falling back to the
+ * unversioned one when asset URLs couldn't be loaded
+ * @param {string} kind - 'thumb' for cards, 'web' for previews
+ */
+function frameAssetUrl(frameNumber, kind) {
+    const state = window.AppState;
+    const frame = state.assets && state.assets.frames[frameNumber];
+    return frame ? frame[`${kind}_url`] : frameImageUrl(state.sessionId, frameNumber, kind);
+}
+
 /**
  * Create a frame card element
  */
@@ -280,25 +441,29 @@ function createFrameCard(frameNumber, sessionId) {
     card.style.animationDelay = `${(frameNumber - 1) * 0.1}s`;
     card.dataset.frameNumber = frameNumber;
 
-    const paddedNumber = String(frameNumber).padStart(3, '0');
-    const imagePath = `/output/${sessionId}/frame_${paddedNumber}.png`;
+    const thumbPath = frameAssetUrl(frameNumber, 'thumb');
 
     card.innerHTML = `
         <div class="frame-image-container">
-            <img src="${imagePath}" alt="Frame ${frameNumber}" class="frame-image" 
-                 onclick="openModal('${imagePath}')"
+            <img src="${thumbPath}" alt="Frame ${frameNumber}" class="frame-image" loading="lazy"
+                 onclick="openModal(frameAssetUrl(${frameNumber}, 'web'))"
                  onerror="this.src='data:image/svg+xml,<svg xmlns=%22http://www.w3.org/2000/svg%22 viewBox=%220 0 16 9%22><rect fill=%22%231e1e3f%22 width=%2216%22 height=%229%22/><text x=%228%22 y=%225%22 text-anchor=%22middle%22 fill=%22%236b6b80%22 font-size=%221%22>Image not found</text></svg>'">
             <span class="frame-number">Frame ${frameNumber}</span>
             <div class="frame-select-checkbox" onclick="toggleFrameSelection(event, ${frameNumber})"></div>
-            <button class="frame-edit-btn" onclick="openEditModal(${frameNumber}, '${imagePath}')">
+            <button class="frame-edit-btn" onclick="openEditModal(${frameNumber}, frameAssetUrl(${frameNumber}, 'web'))">
                 ✏️ Edit
             </button>
         </div>
         <div class="frame-content">
-            <p class="frame-description">Generated frame ${frameNumber}</p>
+            <p class="frame-description"></p>
         </div>
     `;
 
+    // Descriptions are model output, so set them as text rather than HTML
+    const description = window.AppState.frameDescriptions[frameNumber];
+    card.querySelector('.frame-description').textContent =
+        description || `Generated frame ${frameNumber}`;
+
     return card;
 }
 
@@ -309,6 +474,12 @@ function updatePdfLink(data) {
     if (!data.storyboard_path) return;
     
     const pdfLink = document.getElementById('pdfDownloadLink');
+    const assets = window.AppState.assets;
+    if (assets && assets.pdfUrl) {
+        pdfLink.href = assets.pdfUrl;
+        return;
+    }
+    
     const pathMatch = data.storyboard_path.match(/([a-f0-9-]+\/storyboard\.pdf)$/i);
     
     if (pathMatch) {
@@ -326,8 +497,10 @@ function newGeneration() {
     
     state.generatedData = null;
     state.sessionId = null;
+    state.resumeSessionId = null;
     state.storyboardContext = null;
     state.selectedFrameNumber = null;
+    state.assets = null;
     
     window.UI.elements.heroSection.classList.remove('minimized');
     window.UI.hideResults();
@@ -343,8 +516,10 @@ function newGeneration() {
 window.Storyboard = {
     init: initStoryboard,
     generate: handleGenerate,
+    resume: resumeGeneration,
     newGeneration
 };
 
 // Global function access
 window.newGeneration = newGeneration;
+window.resumeGeneration = resumeGeneration;
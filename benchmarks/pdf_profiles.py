@@ -0,0 +1,107 @@
+"""
+PDF Profile Benchmark
+
+Measures file size and render time of a storyboard PDF for every export
+profile. Run from the repository root:
+
+    python -m benchmarks.pdf_profiles
+    python -m benchmarks.pdf_profiles --frames-dir output/<session_id>
+
+Without --frames-dir, synthetic frames with photo-like gradients and noise
+are generated at the resolution the image model returns.
+"""
+import os
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+from typing import List
+from app.agents.fake_backend import render_image
+from app.config import settings
+from app.services.pdf_generator import PDFGenerator
+
+
+def synthetic_frames(directory: str, count: int, width: int, height: int) -> List[str]:
+    """
+    Write synthetic storyboard frames, rendered like the fake model backend's images.
+    
+    Args:
+        directory: Directory to write the frames to
+        count: Number of frames
+        width: Frame width in pixels
+        height: Frame height in pixels
+    
+    Returns:
+        Paths of the written frames in order
+    """
+    paths = []
+    for frame_number in range(1, count + 1):
+        path = os.path.join(directory, f"frame_{frame_number:03d}.png")
+        with open(path, 'wb') as f:
+            f.write(render_image(frame_number, (width, height)))
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    """Run the benchmark and print one row per profile."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames-dir', help="Directory with frame_*.png files to benchmark")
+    parser.add_argument('--frames', type=int, default=8, help="Number of synthetic frames")
+    parser.add_argument('--width', type=int, default=1344, help="Synthetic frame width")
+    parser.add_argument('--height', type=int, default=768, help="Synthetic frame height")
+    args = parser.parse_args()
+    
+    root = tempfile.mkdtemp(prefix='pdf-bench-')
+    settings.OUTPUT_DIR = root
+    try:
+        if args.frames_dir:
+            frame_paths = sorted(glob.glob(os.path.join(args.frames_dir, 'frame_*.png')))
+        else:
+            frames_dir = os.path.join(root, 'frames')
+            os.makedirs(frames_dir)
+            frame_paths = synthetic_frames(frames_dir, args.frames, args.width, args.height)
+        
+        if not frame_paths:
+            parser.error("No frames to benchmark")
+        
+        descriptions = [f"Frame {idx + 1} of the benchmark storyboard." for idx in range(len(frame_paths))]
+        source_bytes = sum(os.path.getsize(path) for path in frame_paths)
+        print(f"{len(frame_paths)} frames, {source_bytes / 1024 / 1024:.1f} MiB of PNG")
+        print(f"{'profile':<10}{'dpi':>6}{'jpeg':>6}{'size MiB':>11}{'render s':>10}{'rebuild s':>11}")
+        
+        for name, profile in PDFGenerator.PROFILES.items():
+            # Each profile renders into its own session, so no pages are reused
+            session_id = f"bench-{name}"
+            os.makedirs(os.path.join(root, session_id))
+            
+            started = time.perf_counter()
+            pdf_path = PDFGenerator.create_storyboard_pdf(
+                image_paths=frame_paths,
+                session_id=session_id,
+                frame_descriptions=descriptions,
+                pdf_profile=name
+            )
+            render_seconds = time.perf_counter() - started
+            
+            # A rebuild with unchanged frames reassembles cached pages only
+            started = time.perf_counter()
+            PDFGenerator.create_storyboard_pdf(
+                image_paths=frame_paths,
+                session_id=session_id,
+                frame_descriptions=descriptions,
+                pdf_profile=name
+            )
+            rebuild_seconds = time.perf_counter() - started
+            
+            print(
+                f"{name:<10}{str(profile['dpi'] or '-'):>6}{str(profile['jpeg_quality'] or '-'):>6}"
+                f"{os.path.getsize(pdf_path) / 1024 / 1024:>11.2f}{render_seconds:>10.2f}{rebuild_seconds:>11.2f}"
+            )
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
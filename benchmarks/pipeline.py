@@ -0,0 +1,152 @@
+"""
+Pipeline Benchmark
+
+Generates storyboards end to end against the fake model backend and
+reports per-stage latency percentiles and throughput, with no network or
+credentials needed. Run from the repository root:
+
+    python -m benchmarks.pipeline
+    python -m benchmarks.pipeline --storyboards 32 --workers 8 --image-latency lognormal:6,0.4
+    python -m benchmarks.pipeline --backend replay --recordings-dir output/.recordings
+
+The run happens in a temporary directory, so sessions, caches and the job
+and rate limit databases start empty and are removed afterwards. Rate
+limits are lifted unless --rate-limits is given, so the numbers show what
+the pipeline itself sustains.
+"""
+import os
+import math
+import time
+import shutil
+import random
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Sequence
+
+# Shots the synthetic descriptions are assembled from
+SHOTS = [
+    "A lighthouse keeper climbs the spiral stairs at dusk.",
+    "Waves crash against the rocks below the tower.",
+    "The lamp flickers and goes dark.",
+    "She lights a lantern and checks the old mechanism.",
+    "A fishing boat appears through the fog.",
+    "Its crew waves a red flag towards the shore.",
+    "The keeper cranks the lamp back to life by hand.",
+    "The beam sweeps across the water.",
+    "The boat turns away from the reef just in time.",
+    "At dawn the keeper sleeps in her chair beside the lamp."
+]
+
+STAGES = ['segmentation', 'images', 'pdf', 'total']
+
+
+def synthetic_descriptions(count: int, seed: int) -> List[str]:
+    """
+    Build distinct storyboard descriptions of three to eight shots each.
+    
+    Args:
+        count: Number of descriptions
+        seed: Seed of the shot selection
+    
+    Returns:
+        The descriptions
+    """
+    rng = random.Random(seed)
+    descriptions = []
+    for index in range(count):
+        shots = rng.sample(SHOTS, rng.randint(3, 8))
+        # The take number keeps descriptions apart, so none is a segmentation cache hit
+        descriptions.append(f"Take {index + 1}. " + ' '.join(shots))
+    return descriptions
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty sequence."""
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(len(ordered) * pct / 100)) - 1]
+
+
+def main() -> None:
+    """Run the benchmark and print one row per stage."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--storyboards', type=int, default=8, help="Number of storyboards to generate")
+    parser.add_argument('--workers', type=int, default=2, help="Storyboards generated at the same time")
+    parser.add_argument('--mode', choices=['sequential', 'anchor_parallel'], default='sequential', help="Image generation mode")
+    parser.add_argument('--backend', choices=['fake', 'replay'], default='fake', help="Model backend")
+    parser.add_argument('--recordings-dir', help="Recordings to replay, for --backend replay")
+    parser.add_argument('--text-latency', default='lognormal:2,0.4', help="Fake storyboard call latency spec")
+    parser.add_argument('--image-latency', default='lognormal:6,0.4', help="Fake image call latency spec")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of fake calls that fail")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the descriptions and fake draws")
+    parser.add_argument('--no-pdf', action='store_true', help="Skip rendering the PDFs")
+    parser.add_argument('--rate-limits', action='store_true', help="Keep the configured rate limits")
+    args = parser.parse_args()
+    if args.backend == 'replay' and not args.recordings_dir:
+        parser.error("--backend replay needs --recordings-dir")
+    
+    # Settings and module-level limiters and caches read the environment on
+    # import, so it is prepared before the application is imported
+    os.environ.update({
+        'MODEL_BACKEND': args.backend,
+        'FAKE_TEXT_LATENCY': args.text_latency,
+        'FAKE_IMAGE_LATENCY': args.image_latency,
+        'FAKE_ERROR_RATE': str(args.error_rate),
+        'FAKE_MODEL_SEED': str(args.seed)
+    })
+    if args.recordings_dir:
+        os.environ['MODEL_RECORDINGS_DIR'] = os.path.abspath(args.recordings_dir)
+    if not args.rate_limits:
+        os.environ.update({'TEXT_REQUESTS_PER_MINUTE': '0', 'IMAGE_REQUESTS_PER_MINUTE': '0'})
+    
+    # OUTPUT_DIR and everything below it are relative to the working directory
+    root = tempfile.mkdtemp(prefix='pipeline-bench-')
+    os.chdir(root)
+    try:
+        from app.services import ServiceRegistry
+        
+        registry = ServiceRegistry()
+        descriptions = synthetic_descriptions(args.storyboards, args.seed)
+        
+        def generate(description: str) -> Dict[str, Any]:
+            started = time.perf_counter()
+            response = registry.storyboard_service().generate_complete_storyboard(
+                description,
+                generation_mode=args.mode,
+                use_cache=False
+            )
+            timings = dict(response.timings or {})
+            if response.success and not args.no_pdf:
+                stage_started = time.perf_counter()
+                registry.pdf_generator.ensure_storyboard_pdf(response.session_id)
+                timings['pdf'] = time.perf_counter() - stage_started
+            timings['total'] = time.perf_counter() - started
+            return {'success': response.success, 'frames': response.total_frames or 0, 'timings': timings}
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as workers:
+            results = list(workers.map(generate, descriptions))
+        wall_seconds = time.perf_counter() - started
+        
+        succeeded = [result for result in results if result['success']]
+        frames = sum(result['frames'] for result in succeeded)
+        print(
+            f"{args.backend} backend, {len(results)} storyboards ({len(results) - len(succeeded)} failed), "
+            f"{frames} frames, {args.workers} workers, {args.mode}"
+        )
+        print(f"{'stage':<14}{'p50 s':>8}{'p95 s':>8}{'max s':>8}")
+        for stage in STAGES:
+            values = [result['timings'][stage] for result in succeeded if stage in result['timings']]
+            if values:
+                print(f"{stage:<14}{percentile(values, 50):>8.2f}{percentile(values, 95):>8.2f}{max(values):>8.2f}")
+        print(
+            f"{wall_seconds:.1f}s wall, {len(succeeded) / wall_seconds * 60:.1f} storyboards/min, "
+            f"{frames / wall_seconds * 60:.1f} frames/min"
+        )
+    finally:
+        os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
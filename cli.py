@@ -0,0 +1,180 @@
+"""
+Command-Line Entry Point
+
+Generates storyboards without the web server, for batch runs and profiling.
+
+Each input (a file, or stdin when no file or '-' is given) is one
+description, or one description per non-empty line with --per-line.
+Sessions are written to OUTPUT_DIR as usual. One JSON line per storyboard
+is printed to stdout as it finishes, with its per-stage timings in
+seconds; a summary goes to stderr.
+
+    python cli.py scene1.txt scene2.txt --workers 4
+    python cli.py --per-line < descriptions.txt > results.jsonl
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.services import ImageGenerationService, ServiceRegistry
+from app.config import settings
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Generate the storyboards described by the inputs.
+    
+    Args:
+        argv: Command-line arguments. Defaults to sys.argv[1:].
+    
+    Returns:
+        Exit status: 0 if every storyboard succeeded, 1 if any failed,
+        2 if there was nothing to generate
+    """
+    args = _parse_args(argv)
+    descriptions = _read_descriptions(args.inputs, args.per_line)
+    if not descriptions:
+        print('No descriptions given', file=sys.stderr)
+        return 2
+    
+    registry = ServiceRegistry()
+    print_lock = threading.Lock()
+    started = time.perf_counter()
+    
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, args.workers), thread_name_prefix='cli-worker') as workers:
+        futures = [
+            workers.submit(_generate, registry, source, description, args)
+            for source, description in descriptions
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            with print_lock:
+                print(json.dumps(result), flush=True)
+    
+    failed = sum(1 for result in results if not result['success'])
+    print(
+        f'{len(results) - failed} of {len(results)} storyboards generated '
+        f'in {time.perf_counter() - started:.1f}s with {args.workers} workers',
+        file=sys.stderr
+    )
+    return 1 if failed else 0
+
+
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    """Parse the command-line arguments."""
+    parser = argparse.ArgumentParser(description='Generate storyboards without the web server.')
+    parser.add_argument(
+        'inputs',
+        nargs='*',
+        default=['-'],
+        help="Files holding descriptions ('-' or none reads stdin)"
+    )
+    parser.add_argument(
+        '--per-line',
+        action='store_true',
+        help='Treat every non-empty line of an input as its own description'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=settings.CLI_WORKERS,
+        help=f'Storyboards generated at the same time (default {settings.CLI_WORKERS})'
+    )
+    parser.add_argument(
+        '--mode',
+        choices=[ImageGenerationService.SEQUENTIAL, ImageGenerationService.ANCHOR_PARALLEL],
+        default=ImageGenerationService.SEQUENTIAL,
+        help='Image generation mode'
+    )
+    parser.add_argument(
+        '--pdf-profile',
+        choices=['screen', 'print', 'archive'],
+        default=None,
+        help='PDF export profile (default PDF_DEFAULT_PROFILE)'
+    )
+    parser.add_argument(
+        '--no-pdf',
+        action='store_true',
+        help='Skip rendering the PDF; it is rendered on first download instead'
+    )
+    parser.add_argument(
+        '--bypass-cache',
+        action='store_true',
+        help='Generate fresh images instead of reusing cached ones'
+    )
+    parser.add_argument(
+        '--user-id',
+        default=settings.DEFAULT_USER_ID,
+        help='User the storyboards are generated for, used for fair rate limiting'
+    )
+    return parser.parse_args(argv)
+
+
+def _read_descriptions(inputs: List[str], per_line: bool) -> List[Tuple[str, str]]:
+    """Read (source, description) pairs from files and stdin."""
+    descriptions = []
+    for name in inputs:
+        if name == '-':
+            source, text = '<stdin>', sys.stdin.read()
+        else:
+            source = name
+            with open(name, 'r', encoding='utf-8') as f:
+                text = f.read()
+        
+        if per_line:
+            descriptions.extend(
+                (f'{source}:{line_number}', line.strip())
+                for line_number, line in enumerate(text.splitlines(), start=1)
+                if line.strip()
+            )
+        elif text.strip():
+            descriptions.append((source, text.strip()))
+    return descriptions
+
+
+def _generate(
+    registry: ServiceRegistry,
+    source: str,
+    description: str,
+    args: argparse.Namespace
+) -> Dict[str, Any]:
+    """Generate one storyboard and its PDF, timing each stage."""
+    started = time.perf_counter()
+    response = registry.storyboard_service().generate_complete_storyboard(
+        description,
+        user_id=args.user_id,
+        generation_mode=args.mode,
+        use_cache=not args.bypass_cache,
+        pdf_profile=args.pdf_profile
+    )
+    timings = dict(response.timings or {})
+    
+    storyboard_path = response.storyboard_path
+    error = None if response.success else response.message
+    if response.success and not args.no_pdf:
+        stage_started = time.perf_counter()
+        try:
+            storyboard_path = registry.pdf_generator.ensure_storyboard_pdf(response.session_id)
+        except (FileNotFoundError, ValueError, IOError, OSError) as e:
+            error = f'PDF rendering failed: {str(e)}'
+        timings['pdf'] = time.perf_counter() - stage_started
+    timings['total'] = time.perf_counter() - started
+    
+    return {
+        'source': source,
+        'success': error is None,
+        'session_id': response.session_id,
+        'storyboard_path': storyboard_path,
+        'total_frames': response.total_frames,
+        'error': error,
+        'timings': {stage: round(seconds, 3) for stage, seconds in timings.items()}
+    }
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""
+Gunicorn Configuration
+
+Production server settings. Run with: gunicorn -c gunicorn.conf.py wsgi:app
+
+Web workers use gevent, so an open progress stream or a request waiting on
+a job costs a greenlet rather than a thread. Generation never runs in the
+web workers: they record jobs in the job store, and worker.py runs them in
+ordinary threads (the ADK runner needs a real thread per event loop, which
+gevent's monkey-patching would take away).
+"""
+import os
+
+# Jobs are run by worker.py, never inside gevent workers
+os.environ.setdefault('JOB_EXECUTION', 'external')
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Worker processes, each serving up to worker_connections concurrent requests
+workers = int(os.getenv('WEB_WORKERS', '2'))
+worker_class = 'gevent'
+worker_connections = int(os.getenv('WEB_WORKER_CONNECTIONS', '1000'))
+
+# Recycle workers periodically; jitter keeps them from restarting together
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', '100'))
+
+# Time a recycled worker gets to finish open requests; clients resume
+# interrupted event streams from their last event ID
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+timeout = int(os.getenv('WEB_TIMEOUT', '60'))
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
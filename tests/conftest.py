@@ -0,0 +1,33 @@
+"""
+Test Configuration
+
+Tests run in a scratch working directory, since OUTPUT_DIR and the
+databases below it are relative to it, against the fake model backend
+with rate limits lifted.
+"""
+import os
+import sys
+import shutil
+import tempfile
+
+# Settings and module-level limiters and caches read the environment on
+# import, so it is prepared before any test imports the application
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.update({
+    'MODEL_BACKEND': 'fake',
+    'FAKE_TEXT_LATENCY': 'fixed:0',
+    'FAKE_IMAGE_LATENCY': 'fixed:0',
+    'FAKE_IMAGE_SIZE': '64x36',
+    'TEXT_REQUESTS_PER_MINUTE': '0',
+    'IMAGE_REQUESTS_PER_MINUTE': '0',
+    'DERIVATIVE_WORKERS': '0'
+})
+
+WORK_DIR = tempfile.mkdtemp(prefix='storyboard-tests-')
+os.chdir(WORK_DIR)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Remove the scratch working directory."""
+    os.chdir(os.path.dirname(WORK_DIR))
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
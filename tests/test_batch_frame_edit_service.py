@@ -0,0 +1,69 @@
+"""Tests for batch frame edits."""
+import uuid
+import asyncio
+import pytest
+from app.services.batch_frame_edit_service import BatchFrameEditService
+from app.services.checkpoint import GenerationCheckpoint
+from app.services.frame_lock import aframe_lock
+
+
+class StubAgent:
+    """Image agent whose edits fail, hang or succeed by instruction."""
+    
+    def __init__(self):
+        self.running = set()
+    
+    async def aedit_frame(self, current_image, edit_instructions, storyboard_context, user_id=None):
+        self.running.add(edit_instructions)
+        try:
+            if edit_instructions == 'fail':
+                await asyncio.sleep(0.01)
+                raise ValueError('model refused')
+            if edit_instructions == 'hang':
+                await asyncio.sleep(60)
+            return current_image + edit_instructions.encode('utf-8')
+        finally:
+            self.running.discard(edit_instructions)
+
+
+@pytest.fixture
+def session_id():
+    session_id = str(uuid.uuid4())
+    checkpoint = GenerationCheckpoint(session_id)
+    for frame_number in (1, 2, 3):
+        checkpoint.save_frame(frame_number, f'frame {frame_number} '.encode('utf-8'))
+    return session_id
+
+
+def test_edits_replace_the_frames_together(session_id):
+    service = BatchFrameEditService(StubAgent())
+    
+    async def scenario():
+        return [event async for event in service.aedit_frames_stream(session_id, [(1, 'a'), (3, 'b')], 'context')]
+    
+    events = asyncio.run(scenario())
+    assert events[-1]['type'] == 'frames_committed'
+    assert events[-1]['frame_numbers'] == [1, 3]
+    checkpoint = GenerationCheckpoint(session_id)
+    assert checkpoint.load_frame(1) == b'frame 1 a'
+    assert checkpoint.load_frame(2) == b'frame 2 '
+    assert checkpoint.load_frame(3) == b'frame 3 b'
+
+
+def test_failed_edit_winds_down_the_others_before_releasing_the_locks(session_id):
+    agent = StubAgent()
+    service = BatchFrameEditService(agent)
+    
+    async def scenario():
+        with pytest.raises(ValueError, match='model refused'):
+            async for _ in service.aedit_frames_stream(session_id, [(1, 'fail'), (2, 'hang')], 'context'):
+                pass
+        # Nothing is left running once the batch has failed
+        assert agent.running == set()
+        async with aframe_lock(session_id, 2):
+            pass
+    
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+    checkpoint = GenerationCheckpoint(session_id)
+    assert checkpoint.load_frame(1) == b'frame 1 '
+    assert checkpoint.load_frame(2) == b'frame 2 '
@@ -0,0 +1,65 @@
+"""Tests for frame derivatives."""
+import os
+import time
+import asyncio
+import hashlib
+from PIL import Image
+from app.services.derivatives import FrameDerivatives
+from app.metrics import metrics
+
+
+def write_frame(path: str, shade: int) -> bytes:
+    """Atomically replace a frame with a flat image."""
+    staging_path = f"{path}.staging"
+    Image.new('RGB', (64, 36), (shade, shade, shade)).save(staging_path, format='PNG')
+    os.replace(staging_path, path)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def renders() -> float:
+    return metrics.snapshot()['counters'].get('derivatives.rendered_on_request', 0)
+
+
+def test_current_derivative_is_not_rendered_again(tmp_path):
+    derivatives = FrameDerivatives(max_workers=0)
+    frame_path = str(tmp_path / 'frame_001.png')
+    frame = write_frame(frame_path, 10)
+    asyncio.run(derivatives.agenerate(frame_path))
+    before = renders()
+    
+    assert derivatives.ensure(frame_path, 'thumb') == hashlib.sha256(frame).digest()
+    assert renders() == before
+
+
+def test_derivative_of_a_replaced_frame_is_stale_however_new(tmp_path):
+    derivatives = FrameDerivatives(max_workers=0)
+    frame_path = str(tmp_path / 'frame_001.png')
+    write_frame(frame_path, 10)
+    asyncio.run(derivatives.agenerate(frame_path))
+    
+    # The frame is replaced while the old one is rendered, which then
+    # lands after the new frame and so looks newer
+    edited = write_frame(frame_path, 200)
+    thumb_path = derivatives.derivative_path(frame_path, 'thumb')
+    later = time.time() + 60
+    os.utime(thumb_path, (later, later))
+    before = renders()
+    
+    assert derivatives.ensure(frame_path, 'thumb') == hashlib.sha256(edited).digest()
+    assert renders() == before + 1
+    assert derivatives.source_digest(thumb_path) == hashlib.sha256(edited).digest()
+    with Image.open(thumb_path) as thumb:
+        assert thumb.convert('RGB').getpixel((0, 0))[0] > 150
+
+
+def test_derivative_without_a_recorded_source_is_rendered_again(tmp_path):
+    derivatives = FrameDerivatives(max_workers=0)
+    frame_path = str(tmp_path / 'frame_001.png')
+    frame = write_frame(frame_path, 10)
+    thumb_path = derivatives.derivative_path(frame_path, 'thumb')
+    os.makedirs(os.path.dirname(thumb_path))
+    Image.new('RGB', (8, 8)).save(thumb_path, format='WEBP')
+    
+    assert derivatives.source_digest(thumb_path) is None
+    assert derivatives.ensure(frame_path, 'thumb') == hashlib.sha256(frame).digest()
@@ -0,0 +1,114 @@
+"""Tests for downstream regeneration after an edit."""
+import uuid
+import asyncio
+import pytest
+from app.models.storyboard import FrameData, StoryboardOutput
+from app.services.checkpoint import GenerationCheckpoint
+from app.services.downstream_regeneration_service import DownstreamRegenerationService
+from app.services.job_queue import JobQueue
+from app.services.job_store import JobStore
+
+
+class StubAgent:
+    """Image agent that appends each frame's description to the previous image."""
+    
+    def __init__(self, hang_on=None):
+        self.hang_on = hang_on
+        self.calls = []
+        self.cancelled = []
+    
+    async def agenerate_next_image(self, description, previous_image, user_id=None):
+        self.calls.append(description)
+        if description == self.hang_on:
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                self.cancelled.append(description)
+                raise
+        return previous_image + b' ' + description.encode('utf-8')
+
+
+@pytest.fixture
+def session_id():
+    session_id = str(uuid.uuid4())
+    checkpoint = GenerationCheckpoint(session_id)
+    checkpoint.save_storyboard(StoryboardOutput(
+        total_frames=4,
+        frames=[FrameData(frame_number=number, description=f'd{number}') for number in range(1, 5)]
+    ))
+    for frame_number in range(1, 5):
+        checkpoint.save_frame(frame_number, f'frame {frame_number}'.encode('utf-8'))
+    return session_id
+
+
+def regenerate(service, session_id, should_stop=None):
+    async def scenario():
+        return [
+            event async for event in service.aregenerate_downstream_stream(session_id, 1, should_stop=should_stop)
+        ]
+    return asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
+
+def test_chain_regenerates_every_later_frame(session_id):
+    events = regenerate(DownstreamRegenerationService(StubAgent()), session_id)
+    
+    assert [event['frame_number'] for event in events if event['type'] == 'frame_regenerated'] == [2, 3, 4]
+    checkpoint = GenerationCheckpoint(session_id)
+    assert checkpoint.load_frame(1) == b'frame 1'
+    assert checkpoint.load_frame(4) == b'frame 1 d2 d3 d4'
+
+
+def test_superseded_chain_stops_between_frames(session_id):
+    agent = StubAgent()
+    checkpoint = GenerationCheckpoint(session_id)
+    
+    events = regenerate(
+        DownstreamRegenerationService(agent),
+        session_id,
+        should_stop=lambda: checkpoint.load_frame(2) != b'frame 2'
+    )
+    
+    # Frame 2 was saved before the stop and is kept; nothing after it runs
+    assert events[-1]['type'] == 'cascade_stopped'
+    assert events[-1]['frame_numbers'] == [2]
+    assert agent.calls == ['d2']
+    assert checkpoint.load_frame(2) == b'frame 1 d2'
+    assert checkpoint.load_frame(3) == b'frame 3'
+
+
+def test_image_generated_after_the_stop_is_not_saved(session_id):
+    agent = StubAgent()
+    
+    events = regenerate(DownstreamRegenerationService(agent), session_id, should_stop=lambda: 'd2' in agent.calls)
+    
+    assert events[-1]['type'] == 'cascade_stopped'
+    assert events[-1]['frame_numbers'] == []
+    assert GenerationCheckpoint(session_id).load_frame(2) == b'frame 2'
+
+
+def test_superseded_chain_abandons_the_call_in_flight(session_id, monkeypatch):
+    monkeypatch.setattr(DownstreamRegenerationService, 'STOP_POLL_SECONDS', 0.01)
+    agent = StubAgent(hang_on='d3')
+    
+    events = regenerate(DownstreamRegenerationService(agent), session_id, should_stop=lambda: 'd3' in agent.calls)
+    
+    assert events[-1]['type'] == 'cascade_stopped'
+    assert events[-1]['frame_numbers'] == [2]
+    assert agent.cancelled == ['d3']
+    checkpoint = GenerationCheckpoint(session_id)
+    assert checkpoint.load_frame(3) == b'frame 3'
+    assert checkpoint.load_frame(4) == b'frame 4'
+
+
+def test_later_edit_supersedes_the_cascade(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    session_id = str(uuid.uuid4())
+    edit_job_id = store.create_job(JobQueue.EDIT_FRAME, {'session_id': session_id})
+    store.create_job(JobQueue.CASCADE, {'session_id': session_id, 'edit_job_id': edit_job_id})
+    other_session_edit = store.create_job(JobQueue.EDIT_FRAME, {'session_id': str(uuid.uuid4())})
+    
+    assert not store.has_newer_job(JobQueue.CASCADE_SUPERSEDED_BY, session_id, edit_job_id)
+    assert not store.has_newer_job(JobQueue.CASCADE_SUPERSEDED_BY, session_id, other_session_edit)
+    
+    store.create_job(JobQueue.BATCH_EDIT, {'session_id': session_id})
+    assert store.has_newer_job(JobQueue.CASCADE_SUPERSEDED_BY, session_id, edit_job_id)
@@ -0,0 +1,65 @@
+"""Tests for the image cache and the agent's use of it."""
+import os
+import time
+import asyncio
+import pytest
+from app.agents import image_generation_agent
+from app.agents.fake_backend import FakeBackend
+from app.agents.image_cache import ImageCache
+from app.agents.image_generation_agent import ImageGenerationAgent
+from app.metrics import metrics
+
+
+def counter(name: str) -> float:
+    return metrics.snapshot()['counters'].get(name, 0)
+
+
+class FullDiskCache(ImageCache):
+    """Cache whose writes fail as if the disk were full."""
+    
+    def put(self, key: str, image_bytes: bytes) -> None:
+        raise OSError(28, 'No space left on device')
+
+
+@pytest.fixture
+def full_disk_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(image_generation_agent, 'image_cache', FullDiskCache(str(tmp_path), 1024 * 1024))
+
+
+def test_failed_cache_write_still_returns_the_image(full_disk_cache):
+    agent = ImageGenerationAgent(backend=FakeBackend(image_latency='fixed:0', error_rate=0))
+    failures = counter('image_cache.write_failures')
+    
+    assert agent.generate_first_image('A lighthouse at dusk.').startswith(b'\x89PNG')
+    assert counter('image_cache.write_failures') == failures + 1
+
+
+def test_failed_cache_write_still_returns_the_image_async(full_disk_cache):
+    agent = ImageGenerationAgent(backend=FakeBackend(image_latency='fixed:0', error_rate=0))
+    
+    image = asyncio.run(agent.agenerate_first_image('A lighthouse at dusk.'))
+    assert image.startswith(b'\x89PNG')
+
+
+def test_put_and_get_round_trip(tmp_path):
+    cache = ImageCache(str(tmp_path), 1024)
+    key = ImageCache.make_key('model', 'prompt')
+    
+    cache.put(key, b'image')
+    assert cache.get(key) == b'image'
+    assert ImageCache(str(tmp_path), 1024).stats() == {'entries': 1, 'bytes': 5}
+
+
+def test_index_scan_removes_stale_staging_files(tmp_path):
+    shard = tmp_path / 'ab'
+    shard.mkdir()
+    stale = shard / 'crashed.tmp'
+    stale.write_bytes(b'partial')
+    old = time.time() - ImageCache.STALE_STAGING_SECONDS - 60
+    os.utime(stale, (old, old))
+    in_progress = shard / 'writing.tmp'
+    in_progress.write_bytes(b'partial')
+    
+    assert ImageCache(str(tmp_path), 1024).stats() == {'entries': 0, 'bytes': 0}
+    assert not stale.exists()
+    assert in_progress.exists()
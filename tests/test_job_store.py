@@ -0,0 +1,84 @@
+"""Tests for the SQLite job store."""
+import time
+import sqlite3
+import threading
+from contextlib import closing
+from app.services.job_store import JobStatus, JobStore
+
+
+def backdate(store: JobStore, job_id: str, seconds: float) -> None:
+    """Move a job's finish time into the past."""
+    with closing(sqlite3.connect(store.db_path)) as conn, conn:
+        conn.execute('UPDATE jobs SET finished_at = finished_at - ? WHERE id = ?', (seconds, job_id))
+
+
+def test_each_job_is_claimed_exactly_once(tmp_path):
+    db_path = str(tmp_path / 'jobs.sqlite3')
+    job_ids = [JobStore(db_path).create_job('storyboard', {'index': index}) for index in range(40)]
+    claimed = []
+    claimed_lock = threading.Lock()
+    start = threading.Barrier(8)
+    
+    def claim_all():
+        # One store per thread, as separate processes would have
+        store = JobStore(db_path)
+        start.wait()
+        while (job := store.claim_next_job()) is not None:
+            with claimed_lock:
+                claimed.append(job['job_id'])
+    
+    threads = [threading.Thread(target=claim_all) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert sorted(claimed) == sorted(job_ids)
+    store = JobStore(db_path)
+    assert all(store.get_job(job_id)['status'] == JobStatus.RUNNING for job_id in job_ids)
+
+
+def test_claims_take_the_oldest_queued_job(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    first = store.create_job('storyboard', {})
+    time.sleep(0.01)
+    second = store.create_job('storyboard', {})
+    store.request_cancel(first)
+    
+    assert store.claim_next_job()['job_id'] == second
+    assert store.claim_next_job() is None
+
+
+def test_prune_deletes_old_finished_jobs_with_their_events(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    old = store.create_job('storyboard', {})
+    recent = store.create_job('storyboard', {})
+    running = store.create_job('storyboard', {})
+    for job_id in (old, recent, running):
+        store.append_event(job_id, {'type': 'progress'})
+    
+    store.claim_next_job()
+    store.claim_next_job()
+    store.claim_next_job()
+    store.mark_succeeded(old, {})
+    store.mark_failed(recent, 'boom')
+    backdate(store, old, 3600)
+    
+    assert store.prune_finished_jobs(60, dry_run=True) == 1
+    assert store.get_job(old) is not None
+    
+    assert store.prune_finished_jobs(60) == 1
+    assert store.get_job(old) is None
+    assert store.list_events(old) == []
+    assert store.get_job(recent)['status'] == JobStatus.FAILED
+    assert store.get_job(running)['event_count'] == 1
+
+
+def test_prune_never_deletes_unfinished_jobs(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    queued = store.create_job('storyboard', {})
+    with closing(sqlite3.connect(store.db_path)) as conn, conn:
+        conn.execute('UPDATE jobs SET created_at = created_at - 86400 WHERE id = ?', (queued,))
+    
+    assert store.prune_finished_jobs(0.001) == 0
+    assert store.get_job(queued)['status'] == JobStatus.QUEUED
@@ -0,0 +1,64 @@
+"""Tests for the shared metrics store."""
+import json
+import time
+import sqlite3
+from contextlib import closing
+from app.metrics import MetricsRegistry
+from app.services.metrics_store import MetricsPublisher, MetricsStore
+
+
+def publish_as(store: MetricsStore, owner: str, snapshot: dict, age: float = 0) -> None:
+    """Publish a snapshot on behalf of another process."""
+    with closing(sqlite3.connect(store.db_path)) as conn, conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO process_metrics (owner, role, updated_at, snapshot) VALUES (?, ?, ?, ?)',
+            (owner, 'worker', time.time() - age, json.dumps(snapshot))
+        )
+
+
+def test_aggregate_adds_up_every_process(tmp_path):
+    store = MetricsStore(str(tmp_path / 'metrics.sqlite3'), stale_seconds=60)
+    worker = MetricsRegistry()
+    worker.increment('jobs.completed', 3)
+    worker.observe('image.seconds', 4.0)
+    worker.set_gauge('image_cache.entries', 7)
+    publish_as(store, 'worker:1', worker.snapshot(), age=1)
+    
+    web = MetricsRegistry()
+    web.increment('jobs.completed')
+    web.increment('requests')
+    web.observe('image.seconds', 2.0)
+    web.set_gauge('image_cache.entries', 9)
+    MetricsPublisher(store, web, role='web').publish()
+    
+    aggregate = store.aggregate()
+    
+    assert aggregate['counters'] == {'jobs.completed': 4, 'requests': 1}
+    assert aggregate['gauges'] == {'image_cache.entries': 9}
+    summary = aggregate['summaries']['image.seconds']
+    assert (summary['count'], summary['min'], summary['max'], summary['mean']) == (2, 2.0, 4.0, 3.0)
+    assert [process['role'] for process in aggregate['processes']] == ['worker', 'web']
+
+
+def test_stale_processes_are_dropped(tmp_path):
+    store = MetricsStore(str(tmp_path / 'metrics.sqlite3'), stale_seconds=60)
+    exited = MetricsRegistry()
+    exited.increment('jobs.completed', 5)
+    publish_as(store, 'worker:1', exited.snapshot(), age=120)
+    
+    assert store.aggregate()['counters'] == {}
+    
+    MetricsPublisher(store, MetricsRegistry(), role='web').publish()
+    with closing(sqlite3.connect(store.db_path)) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM process_metrics').fetchone()[0] == 1
+
+
+def test_publisher_publishes_once_more_on_stop(tmp_path):
+    store = MetricsStore(str(tmp_path / 'metrics.sqlite3'), stale_seconds=60)
+    registry = MetricsRegistry()
+    publisher = MetricsPublisher(store, registry, role='worker')
+    publisher.start(3600)
+    registry.increment('jobs.completed')
+    publisher.stop()
+    
+    assert store.aggregate()['counters'] == {'jobs.completed': 1}
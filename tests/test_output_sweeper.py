@@ -0,0 +1,81 @@
+"""Tests for the output sweeper."""
+import os
+import time
+import uuid
+import sqlite3
+import pytest
+from contextlib import closing
+from app.config import settings
+from app.services.job_store import JobStore
+from app.services.output_sweeper import OutputSweeper
+from app.services.session_catalog import SessionCatalog
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return SessionCatalog(str(tmp_path / 'sessions.sqlite3'))
+
+
+@pytest.fixture
+def job_store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.sqlite3'))
+
+
+def expired_session(catalog: SessionCatalog) -> str:
+    """Create a session last used a day ago, with a frame on disk."""
+    session_id = str(uuid.uuid4())
+    session_dir = os.path.join(settings.OUTPUT_DIR, session_id)
+    os.makedirs(session_dir)
+    with open(os.path.join(session_dir, 'frame_001.png'), 'wb') as f:
+        f.write(b'\0' * 1000)
+    catalog.record_session(session_id, 'A story', 'frames', 'screen')
+    with closing(sqlite3.connect(catalog.db_path)) as conn, conn:
+        conn.execute('UPDATE sessions SET updated_at = ? WHERE id = ?', (time.time() - 86400, session_id))
+    return session_id
+
+
+def test_sessions_with_active_jobs_are_never_removed(catalog, job_store):
+    idle = expired_session(catalog)
+    queued = expired_session(catalog)
+    running = expired_session(catalog)
+    announced = expired_session(catalog)
+    finished = expired_session(catalog)
+    
+    job_store.create_job('edit', {'session_id': running})
+    job_store.claim_next_job()
+    job_store.create_job('edit', {'session_id': queued})
+    # A new storyboard names its session in a progress event, not its payload
+    new_job_id = job_store.create_job('storyboard', {'user_description': 'A story'})
+    job_store.append_event(new_job_id, {'type': 'session_started', 'session_id': announced})
+    done_job_id = job_store.create_job('edit', {'session_id': finished})
+    job_store.mark_succeeded(done_job_id, {})
+    
+    sweeper = OutputSweeper(
+        job_store,
+        catalog,
+        ttl_seconds=3600,
+        quota_bytes=0,
+        min_idle_seconds=0
+    )
+    report = sweeper.sweep()
+    
+    kept = {queued, running, announced}
+    assert {session['session_id'] for session in report['removed']} == {idle, finished}
+    assert set(report['in_flight']) == kept
+    for session_id in kept:
+        assert os.path.isdir(os.path.join(settings.OUTPUT_DIR, session_id))
+        assert catalog.get_session(session_id) is not None
+    for session_id in (idle, finished):
+        assert not os.path.exists(os.path.join(settings.OUTPUT_DIR, session_id))
+        assert catalog.get_session(session_id) is None
+
+
+def test_dry_run_removes_nothing(catalog, job_store):
+    session_id = expired_session(catalog)
+    sweeper = OutputSweeper(job_store, catalog, ttl_seconds=3600, quota_bytes=0, min_idle_seconds=0)
+    
+    report = sweeper.sweep(dry_run=True)
+    
+    assert [session['session_id'] for session in report['removed']] == [session_id]
+    assert os.path.isdir(os.path.join(settings.OUTPUT_DIR, session_id))
+    assert catalog.get_session(session_id) is not None
@@ -0,0 +1,97 @@
+"""Tests for the fair rate limiter."""
+import time
+import asyncio
+import sqlite3
+import threading
+import pytest
+from app.agents.rate_limiter import FairRateLimiter, RateLimitExceededError, TokenBucket
+
+
+class FailingBucket:
+    """Bucket whose first call fails as if its database were locked."""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def try_acquire(self) -> float:
+        self.calls += 1
+        if self.calls == 1:
+            raise sqlite3.OperationalError('database is locked')
+        return 0.0
+
+
+def test_failed_bucket_call_releases_the_ticket():
+    limiter = FairRateLimiter(FailingBucket(), max_wait_seconds=1)
+    
+    with pytest.raises(sqlite3.OperationalError):
+        limiter.acquire('a')
+    assert limiter.waiting() == {}
+    
+    started = time.monotonic()
+    limiter.acquire('b')
+    assert time.monotonic() - started < 0.5
+
+
+def test_failed_bucket_call_releases_the_ticket_async():
+    limiter = FairRateLimiter(FailingBucket(), max_wait_seconds=1)
+    
+    async def scenario():
+        with pytest.raises(sqlite3.OperationalError):
+            await limiter.acquire_async('a')
+        assert limiter.waiting() == {}
+        await asyncio.wait_for(limiter.acquire_async('b'), timeout=0.5)
+    
+    asyncio.run(scenario())
+
+
+def test_timed_out_waiter_leaves_the_queue():
+    limiter = FairRateLimiter(TokenBucket(1, 1), max_wait_seconds=0.2)
+    limiter.acquire('a')
+    
+    with pytest.raises(RateLimitExceededError):
+        limiter.acquire('a')
+    assert limiter.waiting() == {}
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    limiter = FairRateLimiter(TokenBucket(1, 1), max_wait_seconds=5)
+    limiter.acquire('a')
+    
+    async def scenario():
+        task = asyncio.ensure_future(limiter.acquire_async('b'))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    asyncio.run(scenario())
+    assert limiter.waiting() == {}
+
+
+def test_users_are_served_round_robin():
+    limiter = FairRateLimiter(TokenBucket(50, 1), max_wait_seconds=5)
+    limiter.acquire('a')  # Empty the bucket, so every call below queues
+    order = []
+    
+    async def call(user_id):
+        await limiter.acquire_async(user_id)
+        order.append(user_id)
+    
+    async def scenario():
+        calls = [asyncio.ensure_future(call('a')) for _ in range(4)]
+        await asyncio.sleep(0)
+        calls += [asyncio.ensure_future(call('b')) for _ in range(2)]
+        await asyncio.gather(*calls)
+    
+    asyncio.run(scenario())
+    assert order == ['a', 'b', 'a', 'b', 'a', 'a']
+
+
+def test_blocking_waiters_share_the_queue():
+    limiter = FairRateLimiter(TokenBucket(50, 1), max_wait_seconds=5)
+    threads = [threading.Thread(target=limiter.acquire, args=(user_id,)) for user_id in 'aab']
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert limiter.waiting() == {}
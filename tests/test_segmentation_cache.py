@@ -0,0 +1,58 @@
+"""Tests for the segmentation cache."""
+import os
+import time
+import asyncio
+from app.models.storyboard import FrameData, StoryboardOutput
+from app.services.segmentation_cache import SegmentationCache
+
+
+def storyboard(description: str) -> StoryboardOutput:
+    return StoryboardOutput(total_frames=1, frames=[FrameData(frame_number=1, description=description)])
+
+
+def age(path: str, seconds: float) -> None:
+    """Move a file's modification time into the past."""
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    key = SegmentationCache.make_key('A cat. A dog.', 'model')
+    SegmentationCache(str(tmp_path), 60, 8).put(key, storyboard('A cat.'))
+    
+    assert SegmentationCache(str(tmp_path), 60, 8).get(key) == storyboard('A cat.')
+
+
+def test_async_get_and_put(tmp_path):
+    cache = SegmentationCache(str(tmp_path), 60, 0)
+    key = SegmentationCache.make_key('A cat.', 'model')
+    
+    async def scenario():
+        assert await cache.aget(key) is None
+        await cache.aput(key, storyboard('A cat.'))
+        return await cache.aget(key)
+    
+    assert asyncio.run(scenario()) == storyboard('A cat.')
+
+
+def test_prune_removes_expired_entries_never_read_again(tmp_path):
+    cache = SegmentationCache(str(tmp_path), 60, 8)
+    cache.put('old', storyboard('old'))
+    cache.put('new', storyboard('new'))
+    age(cache._path('old'), 120)
+    stale_staging = tmp_path / 'crashed.tmp'
+    stale_staging.write_text('{')
+    age(str(stale_staging), SegmentationCache.STALE_STAGING_SECONDS + 60)
+    
+    assert cache.prune() == 1
+    assert sorted(os.listdir(tmp_path)) == ['new.json']
+
+
+def test_disk_tier_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(SegmentationCache, 'PRUNE_EVERY_WRITES', 1)
+    cache = SegmentationCache(str(tmp_path), 60, 0, max_disk_entries=3)
+    for index in range(6):
+        cache.put(f'key{index}', storyboard(str(index)))
+        age(cache._path(f'key{index}'), 10 - index)
+    
+    assert sorted(os.listdir(tmp_path)) == ['key3.json', 'key4.json', 'key5.json']
@@ -0,0 +1,63 @@
+"""
+Job Worker Entry Point
+
+Runs queued storyboard jobs outside the web server.
+"""
+import signal
+import threading
+from app.services import GenerationCheckpoint, JobStore, JobQueue, ServiceRegistry
+from app.metrics import metrics
+from app.services.metrics_store import MetricsPublisher, MetricsStore
+from app.services.output_sweeper import OutputSweeper
+from app.services.session_catalog import session_catalog
+from app.services.workspace import JobWorkspace
+from app.config import settings
+
+
+def main() -> None:
+    """Claim and run jobs until SIGTERM or SIGINT, then let running jobs finish."""
+    # Clear scratch space left behind by jobs killed mid-run
+    JobWorkspace.remove_stale(settings.WORKSPACE_MAX_AGE_SECONDS)
+    
+    # Catalog sessions written before the session catalog existed
+    GenerationCheckpoint.index_existing_sessions()
+    
+    job_store = JobStore(settings.JOB_DB_PATH)
+    job_store.fail_orphaned_jobs()
+    job_queue = JobQueue(
+        job_store,
+        registry=ServiceRegistry(),
+        max_workers=settings.JOB_WORKERS
+    )
+    output_sweeper = OutputSweeper(
+        job_store,
+        session_catalog,
+        ttl_seconds=settings.OUTPUT_TTL_SECONDS,
+        quota_bytes=settings.OUTPUT_QUOTA_BYTES,
+        min_idle_seconds=settings.OUTPUT_MIN_IDLE_SECONDS,
+        job_retention_seconds=settings.JOB_RETENTION_SECONDS,
+        dry_run=settings.OUTPUT_SWEEP_DRY_RUN
+    )
+    output_sweeper.start(settings.OUTPUT_SWEEP_INTERVAL_SECONDS)
+    
+    # The web server's /metrics reports the worker's metrics from the shared store
+    metrics_publisher = MetricsPublisher(
+        MetricsStore(settings.METRICS_DB_PATH, settings.METRICS_STALE_SECONDS),
+        metrics,
+        role='worker'
+    )
+    metrics_publisher.start(settings.METRICS_PUBLISH_SECONDS)
+    
+    stopping = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stopping.set())
+    stopping.wait()
+    
+    # Queued jobs stay in the store for the next worker
+    output_sweeper.stop()
+    job_queue.shutdown(wait=True)
+    metrics_publisher.stop()
+
+
+if __name__ == '__main__':
+    main()
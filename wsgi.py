@@ -0,0 +1,8 @@
+"""
+WSGI Entry Point
+
+Application object for production servers (see gunicorn.conf.py).
+"""
+from app import create_app
+
+app = create_app()